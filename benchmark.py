@@ -0,0 +1,360 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Генератор синтетических данных и набор замеров производительности
+для JournalDatabase.
+
+Генерирует базы журналов заданного размера с той же схемой и похожим
+распределением значений, что и реальная база, и замеряет время загрузки,
+память на запись, загрузку колоночной копии в pandas, задержку фильтрации
+и поиска по ISSN, а также скорость экспорта. Работает без графического интерфейса, результат выводится
+в виде сравнительной таблицы.
+
+Запуск:
+    python benchmark.py
+    python benchmark.py --sizes 1000 100000 1000000
+    python benchmark.py --generate 100000 --output journals_100k.json
+    python benchmark.py --sizes 100000 --memory-budget 8000
+
+С --memory-budget загрузка базы дополнительно проверяется
+profiling.memory_budget: если пик памяти при загрузке превышает заданное
+число байт на запись, программа завершается с кодом 1 (для проверки
+в CI, что изменения не увеличили потребление памяти).
+"""
+
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import columnar
+from db_manager import JournalDatabase
+from normalize import split_issns
+from profiling import memory_budget
+from relevance import parse_interval
+
+
+# Размеры баз по умолчанию
+DEFAULT_SIZES = (1000, 100000, 1000000)
+
+# Максимальное число записей для замера экспорта в Excel
+EXPORT_SAMPLE_LIMIT = 20000
+
+# Распределения значений, близкие к реальной базе
+VAK_CATEGORY_WEIGHTS = {"1": 20, "2": 30, "3": 35, "none": 15}
+WHITE_LEVEL_WEIGHTS = {"1": 5, "2": 10, "3": 20, "4": 25, "0": 5, "none": 35}
+RSCI_SHARE = 0.12
+RELEVANCE_SHARE = 0.9
+
+SPECIALTIES = [
+    "2.3.4. Управление в организационных системах (технические науки)",
+    "2.3.1. Системный анализ, управление и обработка информации, статистика (технические науки)",
+    "2.3.3. Автоматизация и управление технологическими процессами и производствами (технические науки)",
+    "2.3.5. Математическое и программное обеспечение вычислительных систем, комплексов и компьютерных сетей (технические науки)",
+    "2.3.6. Методы и системы защиты информации, информационная безопасность (технические науки)",
+    "2.3.7. Компьютерное моделирование и автоматизация проектирования (технические науки)",
+    "2.3.8. Информатика и информационные процессы (технические науки)",
+    "5.2.3. Региональная и отраслевая экономика (экономические науки)",
+    "5.2.6. Менеджмент (экономические науки)",
+    "1.2.2. Математическое моделирование, численные методы и комплексы программ (технические науки)",
+]
+
+TITLE_PREFIXES = [
+    "Вестник", "Известия", "Труды", "Вопросы", "Проблемы", "Журнал",
+    "Научный вестник", "Записки", "Доклады", "Бюллетень",
+]
+TITLE_SUBJECTS = [
+    "управления", "информатики", "кибернетики", "экономики",
+    "автоматизации", "системного анализа", "вычислительной техники",
+    "информационных технологий", "прикладной математики", "моделирования",
+]
+TITLE_OWNERS = [
+    "", "Московского университета", "Санкт-Петербургского университета",
+    "Томского политехнического университета", "Российской академии наук",
+    "Уральского федерального университета", "Новосибирского университета",
+]
+
+
+def _weighted_choice(rng, weights):
+    return rng.choices(list(weights), weights=list(weights.values()))[0]
+
+
+def _issn(rng):
+    """
+    Случайный ISSN с корректной контрольной цифрой
+    """
+    digits = [rng.randint(0, 9) for _ in range(7)]
+    total = sum(digit * weight for digit, weight in zip(digits, range(8, 1, -1)))
+    check = (11 - total % 11) % 11
+    check_char = "X" if check == 10 else str(check)
+    body = "".join(map(str, digits))
+    return f"{body[:4]}-{body[4:]}{check_char}"
+
+
+def _date_range(rng, relevant):
+    start_year = rng.randint(2015, 2024)
+    start = f"с {rng.randint(1, 28):02d}.{rng.randint(1, 12):02d}.{start_year}"
+    if relevant and rng.random() < 0.7:
+        return start
+    end_year = rng.randint(2026, 2030) if relevant else rng.randint(2018, 2024)
+    return f"{start} по {rng.randint(1, 28):02d}.{rng.randint(1, 12):02d}.{end_year}"
+
+
+def generate_journals(count, seed=0):
+    """
+    Генерация синтетической базы журналов
+
+    Args:
+        count (int): Количество журналов
+        seed (int): Начальное значение генератора случайных чисел
+
+    Returns:
+        list: Список журналов в формате базы
+    """
+    rng = random.Random(seed)
+    journals = []
+
+    for number in range(1, count + 1):
+        name = " ".join(part for part in (
+            rng.choice(TITLE_PREFIXES),
+            rng.choice(TITLE_SUBJECTS),
+            rng.choice(TITLE_OWNERS),
+        ) if part)
+        if rng.random() < 0.3:
+            name = f"{name}. Серия {rng.randint(1, 12)}"
+
+        # Около 10% журналов имеют два склеенных ISSN, 3% - без ISSN
+        roll = rng.random()
+        if roll < 0.03:
+            issn = ""
+        elif roll < 0.13:
+            issn = f"{_issn(rng)}{_issn(rng)}"
+        else:
+            issn = _issn(rng)
+
+        relevant = rng.random() < RELEVANCE_SHARE
+        specialty_count = rng.randint(1, 4)
+        specialties = [SPECIALTIES[0]] + rng.sample(SPECIALTIES[1:], specialty_count - 1)
+
+        white_level = _weighted_choice(rng, WHITE_LEVEL_WEIGHTS)
+        rcsi_url = "none"
+        if white_level != "none":
+            rcsi_url = (
+                "https://journalrank.rcsi.science/ru/record-sources/details/"
+                f"{rng.randint(1000, 99999)}/"
+            )
+
+        journals.append({
+            "id": str(number),
+            "name_of_publication": name,
+            "issn": issn,
+            "issns": split_issns(issn),
+            "specialties": [
+                {
+                    "scientific_specialty": specialty,
+                    "date": date,
+                    "interval": parse_interval(date)
+                }
+                for specialty, date in (
+                    (specialty, _date_range(rng, relevant))
+                    for specialty in specialties
+                )
+            ],
+            "vak_category": _weighted_choice(rng, VAK_CATEGORY_WEIGHTS),
+            "white_level": white_level,
+            "RSCI": white_level != "none" and rng.random() < RSCI_SHARE / 0.65,
+            "rcsi_url": rcsi_url,
+            "elibrary_url": (
+                "https://elibrary.ru/titles.asp?rubriccode=&sortorder=4"
+                f"&titlename={issn[:9]}&order=1"
+            ),
+            "relevance": relevant
+        })
+
+    return journals
+
+
+def _median_ms(func, repeats):
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+
+def run_benchmark(size, workdir, seed=0, repeats=5, budget_per_record=None):
+    """
+    Замер производительности JournalDatabase на базе заданного размера
+
+    Args:
+        size (int): Количество журналов
+        workdir (str): Директория для временных файлов
+        seed (int): Начальное значение генератора
+        repeats (int): Количество повторов для замеров задержки
+        budget_per_record (float, optional): Допустимый пик памяти при
+                                             загрузке в байтах на запись
+
+    Returns:
+        dict: Результаты замеров
+    """
+    filename = os.path.join(workdir, f"journals_{size}.json")
+    journals = generate_journals(size, seed)
+    with open(filename, 'w', encoding='utf-8') as file:
+        json.dump(journals, file, ensure_ascii=False)
+    file_size = os.path.getsize(filename)
+    del journals
+
+    # Загрузка и память
+    tracemalloc.start()
+    start = time.perf_counter()
+    db = JournalDatabase(filename)
+    load_seconds = time.perf_counter() - start
+    memory, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    # Проверка бюджета памяти на повторной загрузке
+    within_budget = None
+    if budget_per_record:
+        try:
+            with memory_budget(int(budget_per_record * size)):
+                JournalDatabase(filename)
+            within_budget = True
+        except AssertionError as e:
+            print(f"{size} журналов: {e}", file=sys.stderr)
+            within_budget = False
+
+    # Загрузка колоночной копии в pandas (если установлен pyarrow)
+    arrow_seconds = float("nan")
+    if columnar.is_available() and db.save_columnar():
+        start = time.perf_counter()
+        columnar.read_dataframe(db.columnar_filename)
+        arrow_seconds = time.perf_counter() - start
+
+    # Фильтрация по типичным наборам фильтров
+    filter_sets = [
+        {"vak_categories": ["1", "2"], "white_levels": ["1", "2"]},
+        {"in_rsci": True},
+        {"vak_categories": ["none"], "white_levels": ["3"]},
+    ]
+    filter_ms = statistics.median(
+        _median_ms(lambda f=filters: db.filter_journals(**f), repeats)
+        for filters in filter_sets
+    )
+
+    # Поиск по ISSN
+    rng = random.Random(seed + 1)
+    issns = [
+        journal["issn"] for journal in rng.sample(db.journals, min(50, size))
+        if journal["issn"]
+    ]
+    lookup_ms = statistics.median(
+        _median_ms(lambda issn=issn: db.get_journal_by_issn(issn), 1)
+        for issn in issns
+    )
+
+    # Экспорт на ограниченной выборке
+    export_rows = db.journals[:EXPORT_SAMPLE_LIMIT]
+    export_file = os.path.join(workdir, f"export_{size}.xlsx")
+    start = time.perf_counter()
+    db.export_to_excel(export_rows, export_file)
+    export_seconds = time.perf_counter() - start
+
+    return {
+        "size": size,
+        "file_mb": file_size / 1024 / 1024,
+        "load_s": load_seconds,
+        "arrow_load_s": arrow_seconds,
+        "bytes_per_record": memory / size,
+        "filter_ms": filter_ms,
+        "lookup_ms": lookup_ms,
+        "export_rows_per_s": len(export_rows) / export_seconds,
+        "within_budget": within_budget,
+    }
+
+
+def print_table(results):
+    """
+    Вывод сравнительной таблицы результатов
+    """
+    columns = [
+        ("Записей", "size", "{:d}"),
+        ("JSON, МБ", "file_mb", "{:.1f}"),
+        ("Загрузка, с", "load_s", "{:.2f}"),
+        ("Arrow в pandas, с", "arrow_load_s", "{:.2f}"),
+        ("Байт/запись", "bytes_per_record", "{:.0f}"),
+        ("Фильтр, мс", "filter_ms", "{:.2f}"),
+        ("ISSN, мс", "lookup_ms", "{:.3f}"),
+        ("Экспорт, строк/с", "export_rows_per_s", "{:.0f}"),
+    ]
+    rows = [
+        [fmt.format(result[key]) for _, key, fmt in columns]
+        for result in results
+    ]
+    widths = [
+        max(len(title), *(len(row[i]) for row in rows))
+        for i, (title, _, _) in enumerate(columns)
+    ]
+    print("  ".join(title.rjust(width) for (title, _, _), width in zip(columns, widths)))
+    for row in rows:
+        print("  ".join(value.rjust(width) for value, width in zip(row, widths)))
+
+
+def main(argv=None):
+    """
+    Точка входа для командной строки
+    """
+    arg_parser = argparse.ArgumentParser(
+        description="Замеры производительности базы журналов"
+    )
+    arg_parser.add_argument(
+        "--sizes", type=int, nargs="+", default=list(DEFAULT_SIZES),
+        help="Размеры баз для замеров"
+    )
+    arg_parser.add_argument("--seed", type=int, default=0)
+    arg_parser.add_argument("--repeats", type=int, default=5)
+    arg_parser.add_argument(
+        "--generate", type=int, metavar="N",
+        help="Только сгенерировать базу из N журналов"
+    )
+    arg_parser.add_argument(
+        "--output", default="vak_journals_synthetic.json",
+        help="Файл для сгенерированной базы"
+    )
+    arg_parser.add_argument(
+        "--memory-budget", type=float, metavar="BYTES",
+        help="Допустимый пик памяти при загрузке, байт на запись"
+    )
+    args = arg_parser.parse_args(argv)
+
+    if args.generate:
+        with open(args.output, 'w', encoding='utf-8') as file:
+            json.dump(
+                generate_journals(args.generate, args.seed),
+                file, ensure_ascii=False, indent=2
+            )
+        print(f"Сгенерировано {args.generate} журналов в файл {args.output}")
+        return 0
+
+    results = []
+    with tempfile.TemporaryDirectory() as workdir:
+        for size in args.sizes:
+            print(f"Замер для {size} журналов...", file=sys.stderr)
+            results.append(run_benchmark(
+                size, workdir, args.seed, args.repeats, args.memory_budget
+            ))
+
+    print_table(results)
+    if any(result["within_budget"] is False for result in results):
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
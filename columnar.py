@@ -0,0 +1,249 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Колоночная копия базы журналов в формате Arrow IPC (Feather v2).
+
+Копия лежит рядом с JSON-файлом (vak_journals_2.3.4.arrow), хранится
+без сжатия и открывается через отображение файла в память, поэтому
+загрузка и выбор отдельных колонок не копируют данные. Строковые поля
+с небольшим числом различных значений (категория ВАК, уровень белого
+списка и т.п.) хранятся как словарные колонки и в pandas становятся
+категориями. Вложенные поля (специальности, список ISSN, показатели
+elibrary) хранятся как строки JSON; показатели elibrary дополнительно
+раскладываются в числовые колонки metric_<показатель> для анализа.
+
+В метаданных копии записаны версия и отметка (время изменения, размер)
+JSON-файла, из которого она получена; если JSON-файл с тех пор
+изменился, копия считается устаревшей.
+
+Для работы нужен пакет pyarrow (необязательная зависимость):
+    pip install pyarrow
+
+Загрузка в pandas:
+    from columnar import read_dataframe
+    df = read_dataframe("vak_journals_2.3.4.arrow",
+                        columns=["issn", "white_level", "metric_science_index"])
+"""
+
+import json
+import os
+
+try:
+    import pyarrow as pa
+    from pyarrow import feather
+except ImportError:
+    pa = None
+
+from elibrary import ELIBRARY_METRIC_TITLES
+from snapshots import write_bytes_atomic
+
+
+COLUMNAR_EXTENSION = ".arrow"
+
+# Строковая колонка хранится словарем, если различных значений
+# не больше этой доли от числа записей
+DICTIONARY_MAX_RATIO = 0.5
+
+# Префикс колонок с показателями elibrary
+METRIC_PREFIX = "metric_"
+
+METADATA_KEY = b"journals"
+
+# Служебная колонка с хешами записей
+HASH_COLUMN = "__content_hash"
+
+
+def is_available():
+    """
+    Установлен ли pyarrow
+    """
+    return pa is not None
+
+
+def columnar_path(json_filename):
+    """
+    Путь к колоночной копии для JSON-файла базы
+    """
+    base, _ = os.path.splitext(json_filename)
+    return base + COLUMNAR_EXTENSION
+
+
+def _column(values):
+    """
+    Колонка Arrow для значений одного поля
+
+    Returns:
+        tuple: (массив Arrow, True если значения закодированы в JSON)
+    """
+    present = [value for value in values if value is not None]
+    if all(isinstance(value, str) for value in present):
+        array = pa.array(values, type=pa.string())
+        if len(set(present)) <= max(1, len(values) * DICTIONARY_MAX_RATIO):
+            array = array.dictionary_encode()
+        return array, False
+    if all(isinstance(value, bool) for value in present):
+        return pa.array(values, type=pa.bool_()), False
+    if all(isinstance(value, (int, float)) and not isinstance(value, bool)
+           for value in present):
+        return pa.array(values), False
+    encoded = [
+        None if value is None else json.dumps(value, ensure_ascii=False)
+        for value in values
+    ]
+    return pa.array(encoded, type=pa.string()), True
+
+
+def journals_to_table(journals, version=None, stamp=None, hashes=None):
+    """
+    Преобразование списка журналов в таблицу Arrow
+
+    Args:
+        journals (list): Журналы
+        version (str, optional): Версия JSON-файла (JournalStore)
+        stamp (tuple, optional): Время изменения и размер JSON-файла
+        hashes (list, optional): Хеши записей (journal_store.content_hash)
+                                 в порядке журналов; сохраняются, чтобы
+                                 не вычислять их при загрузке
+
+    Returns:
+        pyarrow.Table: Таблица с метаданными
+    """
+    fields = []
+    for journal in journals:
+        for key in journal:
+            if key not in fields:
+                fields.append(key)
+
+    columns = {}
+    json_fields = []
+    for field in fields:
+        array, is_json = _column([journal.get(field) for journal in journals])
+        columns[field] = array
+        if is_json:
+            json_fields.append(field)
+
+    # Показатели elibrary отдельными числовыми колонками
+    metric_fields = []
+    for key in ELIBRARY_METRIC_TITLES:
+        values = [
+            (journal.get("elibrary_metrics") or {}).get(key)
+            for journal in journals
+        ]
+        if any(value is not None for value in values):
+            name = METRIC_PREFIX + key
+            columns[name] = pa.array(
+                [None if value is None else float(value) for value in values],
+                type=pa.float64()
+            )
+            metric_fields.append(name)
+
+    if hashes is not None:
+        columns[HASH_COLUMN] = pa.array(hashes, type=pa.string())
+
+    metadata = {
+        "version": version,
+        "stamp": list(stamp) if stamp else None,
+        "fields": fields,
+        "json_fields": json_fields,
+        "metric_fields": metric_fields,
+    }
+    table = pa.table(columns)
+    return table.replace_schema_metadata(
+        {METADATA_KEY: json.dumps(metadata).encode('utf-8')}
+    )
+
+
+def table_metadata(table):
+    """
+    Метаданные колоночной копии (версия и отметка JSON-файла, поля)
+    """
+    raw = (table.schema.metadata or {}).get(METADATA_KEY)
+    return json.loads(raw) if raw else {}
+
+
+def table_to_journals(table):
+    """
+    Восстановление записей журналов из таблицы. Пустые значения
+    не попадают в записи (как отсутствующие поля в JSON).
+
+    Returns:
+        list: Журналы
+    """
+    metadata = table_metadata(table)
+    json_fields = set(metadata.get("json_fields", []))
+    fields = [
+        field for field in metadata.get("fields", table.column_names)
+        if field in table.column_names
+    ]
+
+    columns = []
+    for field in fields:
+        values = table.column(field).to_pylist()
+        if field in json_fields:
+            # Один разбор JSON на колонку вместо разбора каждого значения
+            values = json.loads(
+                "[" + ",".join("null" if value is None else value for value in values) + "]"
+            )
+        columns.append(values)
+
+    return [
+        {field: value for field, value in zip(fields, row) if value is not None}
+        for row in zip(*columns)
+    ]
+
+
+def table_hashes(table):
+    """
+    Хеши записей из служебной колонки или None, если их нет
+    """
+    if HASH_COLUMN not in table.column_names:
+        return None
+    return table.column(HASH_COLUMN).to_pylist()
+
+
+def write_table(journals, filename, version=None, stamp=None, hashes=None):
+    """
+    Сохранение колоночной копии (файл заменяется атомарно)
+
+    Args:
+        journals (list): Журналы
+        filename (str): Путь к файлу .arrow
+        version (str, optional): Версия JSON-файла
+        stamp (tuple, optional): Время изменения и размер JSON-файла
+        hashes (list, optional): Хеши записей в порядке журналов
+    """
+    table = journals_to_table(journals, version, stamp, hashes)
+    sink = pa.BufferOutputStream()
+    # Без сжатия, чтобы файл можно было читать без копирования
+    feather.write_feather(table, sink, compression="uncompressed")
+    write_bytes_atomic(filename, sink.getvalue().to_pybytes())
+
+
+def read_table(filename, columns=None):
+    """
+    Открытие колоночной копии через отображение в память
+
+    Args:
+        filename (str): Путь к файлу .arrow
+        columns (list, optional): Загрузить только эти колонки
+
+    Returns:
+        pyarrow.Table: Таблица (данные не копируются в память процесса)
+    """
+    return feather.read_table(filename, columns=columns, memory_map=True)
+
+
+def read_dataframe(filename, columns=None):
+    """
+    Загрузка колоночной копии в pandas. Словарные колонки становятся
+    категориями.
+
+    Args:
+        filename (str): Путь к файлу .arrow
+        columns (list, optional): Загрузить только эти колонки
+
+    Returns:
+        pandas.DataFrame
+    """
+    return read_table(filename, columns).to_pandas()
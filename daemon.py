@@ -0,0 +1,228 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Фоновое обновление базы журналов по расписанию.
+
+Демон периодически (со случайным разбросом, чтобы несколько копий
+не обращались к сайту одновременно) проверяет журналы, у которых истек
+срок свежести (поле "checked_at"): найденные - проверенные раньше чем
+FRESHNESS_TTL_DAYS дней назад, не найденные - раньше чем
+UNRESOLVED_TTL_DAYS дней назад или ни разу. Остальные журналы
+не запрашиваются. Время проверки записывается только после успешного
+запроса, поэтому журнал, проверка которого завершилась ошибкой,
+проверяется в следующий раз.
+Уже найденные журналы перепроверяются по сохраненной ссылке rcsi_url
+(один запрос на журнал); поиск выполняется, только если ссылка
+перестала работать.
+В файл базы переносятся только перепроверенные записи (см.
+journal_store), затем сохраняется новая версия; запущенные окна
+программы замечают изменение файла и подгружают изменившиеся записи.
+
+Запуск:
+    python daemon.py
+    python daemon.py --interval-hours 12 --ttl-days 14
+    python daemon.py --unresolved-ttl-days 60
+    python daemon.py --once
+    python daemon.py --once --search
+"""
+
+import argparse
+import asyncio
+import datetime
+import os
+import random
+import sys
+import time
+
+from journal_store import JournalStore
+from snapshots import SnapshotStore, get_app_dir
+
+
+JSON_FILENAME = "vak_journals_2.3.4.json"
+
+# Интервал между обновлениями и его случайный разброс (доля интервала)
+INTERVAL_HOURS = 6
+INTERVAL_JITTER = 0.2
+
+# Через сколько дней проверка журнала считается устаревшей
+FRESHNESS_TTL_DAYS = 7
+
+# То же для журналов, не найденных в РЦНИ: они появляются там редко,
+# а каждая их проверка - полный поиск
+UNRESOLVED_TTL_DAYS = 30
+
+
+def next_delay(interval_hours=INTERVAL_HOURS, jitter=INTERVAL_JITTER, rng=random):
+    """
+    Пауза до следующего обновления в секундах
+
+    Args:
+        interval_hours (float): Средний интервал в часах
+        jitter (float): Разброс как доля интервала (0.2 - плюс-минус 20%)
+    """
+    base = interval_hours * 3600
+    return max(60.0, base * (1 + rng.uniform(-jitter, jitter)))
+
+
+def stale_before(ttl_days=FRESHNESS_TTL_DAYS, now=None):
+    """
+    Граница свежести: журналы, проверенные раньше, проверяются снова
+
+    Returns:
+        str: Время в формате ISO 8601
+    """
+    now = now or datetime.datetime.now()
+    return (now - datetime.timedelta(days=ttl_days)).isoformat(timespec="seconds")
+
+
+def count_stale(journals, cutoff, unresolved_cutoff=None):
+    """
+    Количество журналов, которые нужно проверить
+
+    Args:
+        journals (list): Журналы
+        cutoff (str): Граница свежести найденных журналов
+        unresolved_cutoff (str, optional): Граница свежести не найденных
+                                           журналов; None - проверять все
+    """
+    stale = 0
+    for journal in journals:
+        last_checked = journal.get("checked_at", "")
+        if not journal.get("white_level") or journal.get("white_level") == "none":
+            stale += unresolved_cutoff is None or last_checked < unresolved_cutoff
+        else:
+            stale += last_checked < cutoff
+    return stale
+
+
+async def refresh_stale(ttl_days=FRESHNESS_TTL_DAYS, revalidate=True,
+                        unresolved_ttl_days=UNRESOLVED_TTL_DAYS):
+    """
+    Одно обновление: проверка устаревших журналов и публикация результата
+
+    Args:
+        ttl_days (float): Срок свежести проверки журнала
+        revalidate (bool): Проверять найденные журналы по rcsi_url;
+                           False - полный поиск, как для новых журналов
+        unresolved_ttl_days (float): Срок свежести проверки не найденного
+                                     журнала
+
+    Returns:
+        str: Идентификатор новой версии или None, если изменений нет
+    """
+    import parser
+    from page_archive import PageArchive
+    from resolution_trace import TraceLog
+
+    full_path = os.path.join(get_app_dir(), JSON_FILENAME)
+    if not os.path.exists(full_path):
+        # Базы еще нет - выполняем полное обновление
+        await parser.main_async()
+        return None
+
+    base = JournalStore(full_path).read()
+    journals = base.journals
+
+    cutoff = stale_before(ttl_days)
+    unresolved_cutoff = stale_before(unresolved_ttl_days)
+    stale = count_stale(journals, cutoff, unresolved_cutoff)
+    print(f"Устаревших журналов: {stale} из {len(journals)}")
+    if not stale:
+        return None
+
+    parser.set_page_archive(
+        PageArchive(os.path.join(get_app_dir(), parser.PAGE_ARCHIVE_FILENAME))
+    )
+    parser.set_trace_log(TraceLog())
+    journals = await parser.check_journals_status(
+        journals, recheck_before=cutoff, revalidate=revalidate,
+        recheck_unresolved_before=unresolved_cutoff
+    )
+
+    # Сохраняются только перепроверенные записи; изменения, сделанные
+    # за это время другими процессами, не теряются
+    saved = parser.save_to_json(journals, JSON_FILENAME, base)
+    if saved is not None:
+        journals = saved
+    version = SnapshotStore().commit(journals)
+    if version:
+        print(f"Сохранена версия базы {version}")
+    return version
+
+
+def run(interval_hours=INTERVAL_HOURS, jitter=INTERVAL_JITTER,
+        ttl_days=FRESHNESS_TTL_DAYS, once=False, revalidate=True,
+        unresolved_ttl_days=UNRESOLVED_TTL_DAYS):
+    """
+    Цикл обновлений по расписанию
+
+    Args:
+        interval_hours (float): Средний интервал между обновлениями
+        jitter (float): Случайный разброс интервала
+        ttl_days (float): Срок свежести проверки журнала
+        once (bool): Выполнить одно обновление и завершиться
+        revalidate (bool): Проверять найденные журналы по rcsi_url
+        unresolved_ttl_days (float): Срок свежести проверки не найденного
+                                     журнала
+    """
+    while True:
+        started = datetime.datetime.now()
+        print(f"[{started:%Y-%m-%d %H:%M:%S}] Обновление устаревших журналов")
+        try:
+            asyncio.run(refresh_stale(ttl_days, revalidate, unresolved_ttl_days))
+        except Exception as e:
+            print(f"Ошибка при обновлении: {e}")
+
+        if once:
+            return
+
+        delay = next_delay(interval_hours, jitter)
+        next_run = datetime.datetime.now() + datetime.timedelta(seconds=delay)
+        print(f"Следующее обновление: {next_run:%Y-%m-%d %H:%M:%S}")
+        time.sleep(delay)
+
+
+def main(argv=None):
+    """
+    Точка входа для командной строки
+    """
+    arg_parser = argparse.ArgumentParser(
+        description="Фоновое обновление базы журналов по расписанию"
+    )
+    arg_parser.add_argument(
+        "--interval-hours", type=float, default=INTERVAL_HOURS,
+        help="Средний интервал между обновлениями в часах"
+    )
+    arg_parser.add_argument(
+        "--jitter", type=float, default=INTERVAL_JITTER,
+        help="Случайный разброс интервала (доля, 0.2 = 20%%)"
+    )
+    arg_parser.add_argument(
+        "--ttl-days", type=float, default=FRESHNESS_TTL_DAYS,
+        help="Через сколько дней проверка журнала устаревает"
+    )
+    arg_parser.add_argument(
+        "--unresolved-ttl-days", type=float, default=UNRESOLVED_TTL_DAYS,
+        help="Через сколько дней устаревает проверка не найденного журнала"
+    )
+    arg_parser.add_argument(
+        "--once", action="store_true", help="Выполнить одно обновление"
+    )
+    arg_parser.add_argument(
+        "--search", action="store_true",
+        help="Искать устаревшие журналы заново, а не по сохраненным ссылкам"
+    )
+    args = arg_parser.parse_args(argv)
+
+    try:
+        run(args.interval_hours, args.jitter, args.ttl_days, args.once,
+            revalidate=not args.search,
+            unresolved_ttl_days=args.unresolved_ttl_days)
+    except KeyboardInterrupt:
+        print("Остановлено")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
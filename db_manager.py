@@ -5,11 +5,22 @@
 Модуль для работы с данными журналов и их хранением.
 """
 
-import json
 import os
 import pandas as pd
+import re
 import sys
 
+import columnar
+from elibrary import ELIBRARY_METRIC_TITLES
+from export_cache import ExportCache, cache_key
+from filter_expr import FilterContext, compile_filter
+from journal_store import JournalStore, StoreSnapshot, content_hash
+from normalize import clean_issn, journal_key, split_issns
+from profiling import profiled
+from relevance import RelevanceIndex, as_of_ordinal
+from search_index import JournalSearchIndex
+from snapshots import diff_hashes, index_records
+
 
 class JournalDatabase:
     """
@@ -17,12 +28,16 @@ class JournalDatabase:
     Выполняет загрузку, сохранение и фильтрацию журналов.
     """
     
-    def __init__(self, filename="vak_journals_2.3.4.json"):
+    def __init__(self, filename="vak_journals_2.3.4.json", use_columnar=False):
         """
         Инициализация базы данных журналов
         
         Args:
             filename (str): Имя файла с данными журналов
+            use_columnar (bool): Загружать данные из колоночной копии
+                                 (.arrow рядом с JSON), если она актуальна,
+                                 и обновлять ее при загрузке и сохранении.
+                                 Требует pyarrow; без него используется JSON
         """
         # Определяем директорию приложения (директория, где находится EXE)
         if getattr(sys, 'frozen', False):
@@ -33,34 +48,67 @@ class JournalDatabase:
             app_dir = os.path.dirname(os.path.abspath(__file__))
             
         self.filename = os.path.join(app_dir, filename)
+        self.store = JournalStore(self.filename)
+        self.columnar_filename = columnar.columnar_path(self.filename)
+        self.use_columnar = use_columnar and columnar.is_available()
+        # Версия файла, от которой считаются изменения при сохранении
+        self.snapshot = None
         self.journals = []
+        # Порядки сортировки: {поле: список индексов журналов}
+        self.sort_orders = {}
+        # Число актуальных журналов по сочетаниям
+        # (категория ВАК, уровень белого списка, RSCI)
+        self.facet_counts = {}
+        # Дата, поисковый запрос, показатели и выражение, для которых
+        # посчитаны facet_counts
+        self.facet_counts_key = None
+        self.search_index = JournalSearchIndex([])
+        self.relevance_index = RelevanceIndex([])
+        # Индексы по значениям полей для выражений фильтра
+        # (строятся при первом использовании)
+        self._filter_index = None
+        # Время изменения и размер файла на момент загрузки или сохранения
+        self.data_stamp = None
+        # Готовые выгрузки в Excel по наборам фильтров
+        self.export_cache = ExportCache()
         self.load_data()
     
+    @profiled()
     def load_data(self):
         """
-        Загрузка данных из JSON файла
+        Загрузка данных из JSON файла или из его колоночной копии
         
         Returns:
             bool: True, если загрузка прошла успешно, иначе False
         """
         try:
             if os.path.exists(self.filename):
-                with open(self.filename, 'r', encoding='utf-8') as file:
-                    self.journals = json.load(file)
+                stamp = self._file_stamp()
+                if not (self.use_columnar and self._load_columnar(stamp)):
+                    self.snapshot = self.store.read()
+                    self.journals = self.snapshot.journals
+                    if self.use_columnar:
+                        self.save_columnar(stamp)
+                self.data_stamp = stamp
+                self._rebuild_indexes()
                 return True
             return False
         except Exception as e:
             print(f"Ошибка при загрузке данных: {e}")
             return False
     
-    def save_data(self, journals=None):
+    def save_data(self, journals=None, changed=None):
         """
-        Сохранение данных в JSON файл
+        Сохранение данных в JSON файл. Сохраняются только изменения
+        относительно загруженной версии; изменения, сделанные за это время
+        другими процессами, подгружаются в базу.
         
         Args:
             journals (list, optional): Список журналов для сохранения. 
                                       По умолчанию None, что означает 
                                       сохранение self.journals
+            changed (list, optional): Измененные записи, если известны
+                                      (остальные не сравниваются заново)
         
         Returns:
             bool: True, если сохранение прошло успешно, иначе False
@@ -69,13 +117,452 @@ class JournalDatabase:
             journals = self.journals
         
         try:
-            with open(self.filename, 'w', encoding='utf-8') as file:
-                json.dump(journals, file, ensure_ascii=False, indent=2)
+            snapshot = self.store.commit(self.snapshot, journals, changed)
+            self.snapshot = snapshot
+            if journals is self.journals and snapshot.journals is not journals:
+                self.apply_changes(snapshot.journals)
+            self.data_stamp = self._file_stamp()
+            if self.use_columnar:
+                self.save_columnar(self.data_stamp)
             return True
         except Exception as e:
             print(f"Ошибка при сохранении данных: {e}")
             return False
     
+    def _load_columnar(self, stamp):
+        """
+        Загрузка из колоночной копии, если она получена из текущей
+        версии JSON-файла
+        
+        Args:
+            stamp (tuple): Время изменения и размер JSON-файла
+        
+        Returns:
+            bool: True, если данные загружены
+        """
+        if not os.path.exists(self.columnar_filename):
+            return False
+        try:
+            table = columnar.read_table(self.columnar_filename)
+            metadata = columnar.table_metadata(table)
+            if tuple(metadata.get("stamp") or ()) != tuple(stamp or ()):
+                return False
+            journals = columnar.table_to_journals(table)
+            hashes = columnar.table_hashes(table)
+            if hashes is not None:
+                hashes = dict(zip(index_records(journals), hashes))
+            self.snapshot = StoreSnapshot(metadata.get("version"), journals, hashes)
+            self.journals = journals
+            return True
+        except Exception as e:
+            print(f"Ошибка при загрузке колоночной копии: {e}")
+            return False
+    
+    def save_columnar(self, stamp=None):
+        """
+        Сохранение колоночной копии загруженной версии JSON-файла
+        
+        Args:
+            stamp (tuple, optional): Время изменения и размер JSON-файла,
+                                     из которого получены данные;
+                                     по умолчанию текущие
+        
+        Returns:
+            bool: True, если сохранение прошло успешно, иначе False
+        """
+        if not columnar.is_available():
+            print("Для колоночной копии нужен пакет pyarrow")
+            return False
+        if self.snapshot is None:
+            return False
+        
+        try:
+            journals = self.snapshot.journals
+            records = index_records(journals)
+            hashes = [self.snapshot.hashes.get(key) for key in records]
+            columnar.write_table(
+                journals, self.columnar_filename, self.snapshot.version,
+                stamp or self._file_stamp(), hashes
+            )
+            return True
+        except Exception as e:
+            print(f"Ошибка при сохранении колоночной копии: {e}")
+            return False
+    
+    def data_version(self):
+        """
+        Версия загруженных данных (хеш содержимого файла)
+        
+        Returns:
+            str: Версия или None, если данные не загружены из файла
+        """
+        return self.snapshot.version if self.snapshot is not None else None
+    
+    def _rebuild_indexes(self):
+        """
+        Перестроение порядков сортировки и индексов после изменения данных
+        """
+        self._build_sort_orders()
+        self.search_index = JournalSearchIndex(self.journals)
+        self.relevance_index = RelevanceIndex(self.journals)
+        self._filter_index = None
+        self.facet_counts_key = None
+        self._build_facet_counts()
+    
+    def _file_stamp(self):
+        try:
+            stat = os.stat(self.filename)
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+    
+    def file_changed(self):
+        """
+        Проверка, изменился ли файл данных после загрузки или сохранения
+        (например, его обновил другой процесс). Читается только время
+        изменения и размер файла.
+        
+        Returns:
+            bool: True, если файл изменился
+        """
+        stamp = self._file_stamp()
+        return stamp is not None and stamp != self.data_stamp
+    
+    def read_file(self):
+        """
+        Чтение файла данных без изменения базы (можно вызывать
+        из фонового потока)
+        
+        Returns:
+            tuple: (версия файла StoreSnapshot, отметка файла)
+                   или (None, None) при ошибке
+        """
+        try:
+            stamp = self._file_stamp()
+            return self.store.read(), stamp
+        except Exception as e:
+            print(f"Ошибка при загрузке данных: {e}")
+            return None, None
+    
+    def apply_changes(self, journals, stamp=None, snapshot=None):
+        """
+        Применение новой версии данных: изменившиеся записи обновляются
+        на месте, новые добавляются, удаленные убираются. Неизменившиеся
+        записи остаются теми же объектами.
+        
+        Args:
+            journals (list): Новый список журналов
+            stamp (tuple, optional): Отметка файла из read_file
+            snapshot (StoreSnapshot, optional): Версия файла из read_file;
+                                                от нее считаются изменения
+                                                при следующем сохранении
+            
+        Returns:
+            dict: Списки ключей added, removed, changed
+        """
+        old_records = index_records(self.journals)
+        new_records = index_records(journals)
+        # Сравниваются записи целиком, включая время проверки, чтобы
+        # данные в памяти совпадали с файлом
+        diff = diff_hashes(
+            {key: content_hash(record) for key, record in old_records.items()},
+            {key: content_hash(record) for key, record in new_records.items()}
+        )
+        if stamp is not None:
+            self.data_stamp = stamp
+        if snapshot is not None:
+            self.snapshot = snapshot
+        if not any(diff.values()):
+            return diff
+        
+        for key in diff["changed"]:
+            record = old_records[key]
+            record.clear()
+            record.update(new_records[key])
+        self.journals = [
+            old_records.get(key, record) for key, record in new_records.items()
+        ]
+        self._rebuild_indexes()
+        return diff
+    
+    # Ключи сортировки по полям для порядков sort_orders
+    SORT_KEYS = {
+        "name_of_publication": lambda j: j.get(
+            "name_of_publication", ""
+        ).lower(),
+        "issn": lambda j: j.get("issn", ""),
+        "vak_category": lambda j: j.get("vak_category", "none"),
+        "white_level": lambda j: j.get("white_level", "none"),
+        "RSCI": lambda j: not j.get("RSCI", False),
+    }
+    
+    # Поля индексов filter_index по значениям
+    VALUE_INDEX_FIELDS = {
+        "vak_category": "none",
+        "white_level": "none",
+        "RSCI": False,
+    }
+    
+    def update_journal(self, journal, changes):
+        """
+        Изменение одного журнала (например, после повторной проверки)
+        и сохранение. Порядки сортировки и индексы обновляются только
+        для этой записи, без перестроения по всей базе.
+        
+        Args:
+            journal (dict): Запись журнала из self.journals
+            changes (dict): Новые значения полей
+        
+        Returns:
+            bool: True, если сохранение прошло успешно, иначе False
+        """
+        position = next(
+            (index for index, item in enumerate(self.journals) if item is journal),
+            None
+        )
+        if position is None:
+            return False
+        
+        old_sort_values = {
+            field: key(journal) for field, key in self.SORT_KEYS.items()
+        }
+        old_values = {
+            field: journal.get(field, default)
+            for field, default in self.VALUE_INDEX_FIELDS.items()
+        }
+        journal.update(changes)
+        
+        # Переставляем запись в порядках сортировки, где изменился ключ
+        for field, key in self.SORT_KEYS.items():
+            value = key(journal)
+            if value == old_sort_values[field]:
+                continue
+            order = self.sort_orders[field]
+            order.remove(position)
+            # Порядок устойчивый: при равных ключах - по номеру записи
+            low, high = 0, len(order)
+            while low < high:
+                middle = (low + high) // 2
+                other = order[middle]
+                if (key(self.journals[other]), other) < (value, position):
+                    low = middle + 1
+                else:
+                    high = middle
+            order.insert(low, position)
+        
+        # Индексы выражений фильтра - только множества с этой записью
+        if self._filter_index is not None:
+            for field, default in self.VALUE_INDEX_FIELDS.items():
+                value = journal.get(field, default)
+                if value == old_values[field]:
+                    continue
+                by_value = self._filter_index[field]
+                by_value.get(old_values[field], set()).discard(position)
+                by_value.setdefault(value, set()).add(position)
+            self._filter_index.pop("last_expression", None)
+        # Счетчики фильтров пересчитываются при следующем обращении
+        self.facet_counts_key = None
+        
+        return self.save_data(changed=[journal])
+    
+    def _build_sort_orders(self):
+        """
+        Предварительное вычисление порядков сортировки по полям,
+        чтобы интерфейс не сортировал журналы при каждом щелчке
+        """
+        self.sort_orders = {}
+        for field, key in self.SORT_KEYS.items():
+            values = [key(journal) for journal in self.journals]
+            self.sort_orders[field] = sorted(
+                range(len(values)), key=values.__getitem__
+            )
+    
+    def _build_facet_counts(
+        self, as_of=None, query=None, min_metrics=None, expression=None
+    ):
+        """
+        Подсчет актуальных журналов по сочетаниям значений фильтров.
+        Позволяет считать результат любой комбинации фильтров без
+        просмотра всех журналов.
+        
+        Args:
+            as_of: Дата актуальности (по умолчанию сегодня)
+            query: Строка поиска; если задана, считаются только
+                   найденные журналы
+            min_metrics: Минимальные значения показателей elibrary;
+                         если заданы, считаются только проходящие их журналы
+            expression: Выражение фильтра; если задано, считаются только
+                        подходящие под него журналы
+        
+        Raises:
+            FilterSyntaxError: если в выражении есть ошибка
+        """
+        expression = expression.strip() if expression else None
+        key = (
+            as_of_ordinal(as_of), query or None,
+            tuple(sorted(min_metrics.items())) if min_metrics else None,
+            expression or None
+        )
+        if key == self.facet_counts_key:
+            return self.facet_counts
+        
+        positions = (
+            self.search_index.search(query) if query
+            else range(len(self.journals))
+        )
+        relevant = self.relevance_index.relevant_positions(as_of)
+        if expression:
+            # Выражение вычисляется один раз на набор фильтров, а не для
+            # каждого счетчика; его номера уже отобраны по актуальности
+            relevant = self._select_expression(expression, as_of)
+        
+        facet_counts = {}
+        for position in positions:
+            if position not in relevant:
+                continue
+            journal = self.journals[position]
+            if min_metrics and not self.matches_filters(
+                journal, min_metrics=min_metrics
+            ):
+                continue
+            facet = (
+                journal.get("vak_category", "none"),
+                journal.get("white_level", "none"),
+                journal.get("RSCI", False)
+            )
+            facet_counts[facet] = facet_counts.get(facet, 0) + 1
+        
+        self.facet_counts = facet_counts
+        self.facet_counts_key = key
+        return facet_counts
+    
+    def count_journals(
+        self, vak_categories=None, white_levels=None, in_rsci=None, 
+        query=None, as_of=None, min_metrics=None, expression=None
+    ):
+        """
+        Количество журналов, которое вернет filter_journals с теми же
+        параметрами. Вычисляется по заранее подсчитанным сочетаниям:
+        при смене категорий, уровней или RSCI база заново не просматривается.
+        
+        Args:
+            vak_categories: Список категорий ВАК для фильтрации
+            white_levels: Список уровней белого списка для фильтрации
+            in_rsci: Булево значение для фильтрации по RSCI
+            query: Строка поиска по названию и шифрам специальностей
+            as_of: Дата актуальности (по умолчанию сегодня)
+            min_metrics: Минимальные значения показателей elibrary
+            expression: Выражение фильтра
+            
+        Returns:
+            int: Количество подходящих журналов
+        
+        Raises:
+            FilterSyntaxError: если в выражении есть ошибка
+        """
+        query = query.strip() if query else None
+        facet_counts = self._build_facet_counts(
+            as_of, query, min_metrics, expression
+        )
+        
+        total = 0
+        for (vak, white, rsci), count in facet_counts.items():
+            if vak_categories and vak not in vak_categories:
+                continue
+            if white_levels and white not in white_levels:
+                continue
+            if in_rsci is not None and rsci != in_rsci:
+                continue
+            total += count
+        return total
+    
+    def filter_index(self):
+        """
+        Индексы по значениям полей для выражений фильтра: категория ВАК,
+        уровень белого списка, RSCI и ISSN (все ISSN журнала)
+        
+        Returns:
+            dict: {поле: {значение: множество номеров журналов}};
+                  "issn_keys" - отсортированный список ISSN,
+                  "last_expression" - результат последнего выражения
+        """
+        if self._filter_index is not None:
+            return self._filter_index
+        
+        index = {"vak_category": {}, "white_level": {}, "RSCI": {}, "issn": {}}
+        for position, journal in enumerate(self.journals):
+            index["vak_category"].setdefault(
+                journal.get("vak_category", "none"), set()
+            ).add(position)
+            index["white_level"].setdefault(
+                journal.get("white_level", "none"), set()
+            ).add(position)
+            index["RSCI"].setdefault(
+                journal.get("RSCI", False), set()
+            ).add(position)
+            issns = journal.get("issns") or split_issns(journal.get("issn", ""))
+            for issn in issns:
+                index["issn"].setdefault(clean_issn(issn), set()).add(position)
+        index["issn_keys"] = sorted(index["issn"])
+        
+        self._filter_index = index
+        return index
+    
+    def query(self, expression, as_of=None, only_relevant=True):
+        """
+        Фильтрация по выражению (см. filter_expr)
+        
+        Args:
+            expression (str): Выражение фильтра, например
+                              'white in (1, 2) and title ~ "эконом"'
+            as_of: Дата актуальности (по умолчанию сегодня)
+            only_relevant (bool): Только журналы, актуальные на дату
+                                  (как в filter_journals)
+        
+        Returns:
+            list: Журналы в порядке базы
+        
+        Raises:
+            FilterSyntaxError: если в выражении есть ошибка
+        """
+        positions = self._select_expression(expression, as_of, only_relevant)
+        return [self.journals[position] for position in sorted(positions)]
+    
+    def _select_expression(self, expression, as_of=None, only_relevant=True):
+        """
+        Номера журналов, подходящих под выражение. Результат последнего
+        выражения запоминается: счетчики фильтров в интерфейсе
+        запрашивают его много раз подряд.
+        """
+        key = (expression.strip(), as_of_ordinal(as_of), only_relevant)
+        cached = self.filter_index().get("last_expression")
+        if cached and cached[0] == key:
+            return cached[1]
+        
+        plan = compile_filter(key[0])
+        context = FilterContext(self, as_of)
+        candidates = context.relevant_positions() if only_relevant else None
+        positions = plan.select(context, candidates)
+        self.filter_index()["last_expression"] = (key, positions)
+        return positions
+    
+    def search(self, query, limit=None):
+        """
+        Полнотекстовый поиск журналов по словам названия (в том числе
+        по началу слова) и шифрам специальностей
+        
+        Args:
+            query (str): Строка запроса, например "вестн упр 2.3.4"
+            limit (int, optional): Максимальное число результатов
+        
+        Returns:
+            list: Журналы, упорядоченные по релевантности
+        """
+        indices = self.search_index.search(query)
+        if limit is not None:
+            indices = indices[:limit]
+        return [self.journals[index] for index in indices]
+    
     def get_journals(self):
         """
         Получение списка всех журналов
@@ -98,16 +585,35 @@ class JournalDatabase:
         if not issn:
             return None
         
-        # Очищаем ISSN от лишних символов
-        clean_issn = issn.strip().replace("-", "")
+        # Ищем по любому из ISSN журнала (печатному или электронному)
+        wanted = set(split_issns(issn))
+        if not wanted:
+            return None
         
         for journal in self.journals:
-            current_issn = journal.get("issn", "").strip().replace("-", "")
-            if current_issn == clean_issn:
+            issns = journal.get("issns") or split_issns(journal.get("issn", ""))
+            if wanted.intersection(issns):
                 return journal
         
         return None
     
+    def get_journal_by_key(self, key):
+        """
+        Поиск журнала по устойчивому ключу (normalize.journal_key).
+        Нужен, когда запись могла быть заменена при подгрузке изменений
+        из файла.
+        
+        Args:
+            key (str): Ключ журнала
+        
+        Returns:
+            dict: Запись журнала из базы или None, если журнала больше нет
+        """
+        for journal in self.journals:
+            if journal_key(journal) == key:
+                return journal
+        return None
+    
     def get_vak_categories(self):
         """
         Получение списка всех категорий ВАК
@@ -140,8 +646,58 @@ class JournalDatabase:
         
         return sorted(list(levels))
     
+    @staticmethod
+    def matches_filters(
+        journal, vak_categories=None, white_levels=None, in_rsci=None,
+        min_metrics=None
+    ):
+        """
+        Проверка журнала по категориям ВАК, уровням белого списка, RSCI
+        и показателям elibrary
+        
+        Args:
+            journal: Запись журнала
+            vak_categories: Список категорий ВАК для фильтрации
+            white_levels: Список уровней белого списка для фильтрации
+            in_rsci: Булево значение для фильтрации по RSCI
+            min_metrics: Словарь {показатель elibrary: минимальное значение},
+                         например {"science_index": 1.0}; журналы без
+                         показателя не проходят фильтр
+            
+        Returns:
+            bool: True, если журнал проходит все фильтры
+        """
+        # Фильтрация по категориям ВАК
+        if vak_categories:
+            journal_vak = journal.get("vak_category", "none")
+            if journal_vak not in vak_categories:
+                return False
+        
+        # Фильтрация по уровням белого списка
+        if white_levels:
+            journal_white = journal.get("white_level", "none")
+            if journal_white not in white_levels:
+                return False
+        
+        # Фильтрация по RSCI
+        if in_rsci is not None:
+            journal_rsci = journal.get("RSCI", False)
+            if journal_rsci != in_rsci:
+                return False
+        
+        # Фильтрация по показателям elibrary
+        if min_metrics:
+            metrics = journal.get("elibrary_metrics") or {}
+            for metric, minimum in min_metrics.items():
+                value = metrics.get(metric)
+                if value is None or value < minimum:
+                    return False
+        
+        return True
+    
     def filter_journals(
-        self, vak_categories=None, white_levels=None, in_rsci=None
+        self, vak_categories=None, white_levels=None, in_rsci=None, 
+        query=None, as_of=None, min_metrics=None, expression=None
     ):
         """
         Фильтрация журналов по заданным критериям
@@ -150,40 +706,130 @@ class JournalDatabase:
             vak_categories: Список категорий ВАК для фильтрации
             white_levels: Список уровней белого списка для фильтрации
             in_rsci: Булево значение для фильтрации по RSCI
+            query: Строка поиска по названию и шифрам специальностей;
+                   при ее наличии журналы упорядочены по релевантности
+            as_of: Дата (datetime.date), на которую журнал должен входить
+                   в перечень; по умолчанию сегодня
+            min_metrics: Минимальные значения показателей elibrary
+                         (см. matches_filters)
+            expression: Выражение фильтра (см. filter_expr); применяется
+                        вместе с остальными критериями
             
         Returns:
             list: Отфильтрованный список журналов
+        
+        Raises:
+            FilterSyntaxError: если в выражении есть ошибка
         """
         filtered_journals = []
+        relevant = self.relevance_index.relevant_positions(as_of)
+        if expression and expression.strip():
+            # Номера журналов, актуальных и подходящих под выражение
+            relevant = self._select_expression(expression, as_of)
         
-        for journal in self.journals:
-            # Показываем только актуальные журналы
-            if journal.get("relevance", True) is False:
+        positions = range(len(self.journals))
+        if query and query.strip():
+            positions = self.search_index.search(query.strip())
+        
+        for position in positions:
+            # Показываем только журналы, актуальные на дату
+            # (и подходящие под выражение)
+            if position not in relevant:
                 continue
-                
-            # Фильтрация по категориям ВАК
-            if vak_categories:
-                journal_vak = journal.get("vak_category", "none")
-                if journal_vak not in vak_categories:
-                    continue
+            journal = self.journals[position]
             
-            # Фильтрация по уровням белого списка
-            if white_levels:
-                journal_white = journal.get("white_level", "none")
-                if journal_white not in white_levels:
-                    continue
+            if self.matches_filters(
+                journal, vak_categories, white_levels, in_rsci, min_metrics
+            ):
+                filtered_journals.append(journal)
+        
+        return filtered_journals
+    
+    def filter_journals_batch(self, filter_sets, as_of=None):
+        """
+        Фильтрация по нескольким наборам фильтров за один проход по базе
+        
+        Args:
+            filter_sets: Словарь {имя: фильтры}; фильтры - словарь с ключами
+                         vak_categories, white_levels, rsci, query,
+                         min_metrics и expression (как в filter_journals,
+                         rsci соответствует in_rsci)
+            as_of: Дата актуальности (по умолчанию сегодня)
             
-            # Фильтрация по RSCI
-            if in_rsci is not None:
-                journal_rsci = journal.get("RSCI", False)
-                if journal_rsci != in_rsci:
+        Returns:
+            dict: {имя: список журналов}
+        """
+        relevant = self.relevance_index.relevant_positions(as_of)
+        results = {name: [] for name in filter_sets}
+        
+        # Результаты поиска по названию считаем заранее для каждого набора
+        search_positions = {}
+        for name, filters in filter_sets.items():
+            query = (filters.get("query") or "").strip()
+            if query:
+                search_positions[name] = set(self.search_index.search(query))
+        
+        # И журналы, подходящие под выражение
+        expression_positions = {}
+        for name, filters in filter_sets.items():
+            expression = (filters.get("expression") or "").strip()
+            if expression:
+                expression_positions[name] = self._select_expression(
+                    expression, as_of
+                )
+        
+        for position, journal in enumerate(self.journals):
+            if position not in relevant:
+                continue
+            for name, filters in filter_sets.items():
+                if (name in search_positions
+                        and position not in search_positions[name]):
                     continue
-            
-            # Журнал прошел все фильтры
-            filtered_journals.append(journal)
+                if (name in expression_positions
+                        and position not in expression_positions[name]):
+                    continue
+                if self.matches_filters(
+                    journal,
+                    filters.get("vak_categories"),
+                    filters.get("white_levels"),
+                    filters.get("rsci"),
+                    filters.get("min_metrics")
+                ):
+                    results[name].append(journal)
         
-        return filtered_journals
+        return results
+    
+    @staticmethod
+    def _to_dataframe(journals):
+        """
+        Создание DataFrame для экспорта
+        """
+        # Колонки показателей elibrary добавляются, только если они есть
+        # хотя бы у одного журнала
+        metric_keys = [
+            key for key in ELIBRARY_METRIC_TITLES
+            if any(key in (journal.get("elibrary_metrics") or {})
+                   for journal in journals)
+        ]
+        
+        data = []
+        for journal in journals:
+            row = {
+                "Название журнала": journal.get("name_of_publication", ""),
+                "ISSN": journal.get("issn", ""),
+                "Категория ВАК": journal.get("vak_category", "none"),
+                "Уровень белого списка": journal.get("white_level", "none"),
+                "RSCI": "Да" if journal.get("RSCI") else "Нет",
+                "Ссылка elibrary": journal.get("elibrary_url", ""),
+                "Ссылка РЦНИ": journal.get("rcsi_url", "")
+            }
+            metrics = journal.get("elibrary_metrics") or {}
+            for key in metric_keys:
+                row[ELIBRARY_METRIC_TITLES[key]] = metrics.get(key)
+            data.append(row)
+        return pd.DataFrame(data)
     
+    @profiled()
     def export_to_excel(
         self, journals, output_file="vak_journals_filtered.xlsx"
     ):
@@ -198,23 +844,87 @@ class JournalDatabase:
             bool: True в случае успеха, False в случае ошибки
         """
         try:
-            # Создаем DataFrame для экспорта
-            data = []
-            for journal in journals:
-                data.append({
-                    "Название журнала": journal.get("name_of_publication", ""),
-                    "ISSN": journal.get("issn", ""),
-                    "Категория ВАК": journal.get("vak_category", "none"),
-                    "Уровень белого списка": journal.get("white_level", "none"),
-                    "RSCI": "Да" if journal.get("RSCI") else "Нет",
-                    "Ссылка elibrary": journal.get("elibrary_url", ""),
-                    "Ссылка РЦНИ": journal.get("rcsi_url", "")
-                })
-            
             # Создаем DataFrame и сохраняем в Excel
-            df = pd.DataFrame(data)
+            df = self._to_dataframe(journals)
             df.to_excel(output_file, index=False, engine='openpyxl')
             
             return True
         except Exception:
-            return False 
\ No newline at end of file
+            return False
+    
+    def export_filtered(self, filters, output_file, as_of=None):
+        """
+        Фильтрация и экспорт в Excel. Если такая же выгрузка (те же
+        фильтры, версия данных и дата) уже делалась, готовый файл
+        копируется из кэша.
+        
+        Args:
+            filters: Фильтры - словарь с ключами vak_categories,
+                     white_levels, rsci, query, min_metrics и expression
+                     (как в filter_journals_batch)
+            output_file: Путь к выходному файлу Excel
+            as_of: Дата актуальности (по умолчанию сегодня)
+            
+        Returns:
+            int: Количество выгруженных журналов (0 - журналы не найдены,
+                 файл не создается) или None при ошибке
+        
+        Raises:
+            FilterSyntaxError: если в выражении есть ошибка
+        """
+        version = self.data_version()
+        key = cache_key(filters, "xlsx", version, as_of) if version else None
+        if key:
+            info = self.export_cache.get(key, output_file)
+            if info is not None:
+                return info.get("count", 0)
+        
+        journals = self.filter_journals(
+            vak_categories=filters.get("vak_categories"),
+            white_levels=filters.get("white_levels"),
+            in_rsci=filters.get("rsci"),
+            query=filters.get("query"),
+            as_of=as_of,
+            min_metrics=filters.get("min_metrics"),
+            expression=filters.get("expression")
+        )
+        if not journals:
+            return 0
+        if not self.export_to_excel(journals, output_file):
+            return None
+        if key:
+            self.export_cache.put(key, output_file, version, {"count": len(journals)})
+        return len(journals)
+    
+    def export_sheets_to_excel(self, sheets, output_file):
+        """
+        Экспорт нескольких списков журналов на отдельные листы одной книги
+        
+        Args:
+            sheets: Словарь {название листа: список журналов}
+            output_file: Путь к выходному файлу Excel
+            
+        Returns:
+            bool: True в случае успеха, False в случае ошибки
+        """
+        try:
+            used_names = set()
+            with pd.ExcelWriter(output_file, engine='openpyxl') as writer:
+                for title, journals in sheets.items():
+                    # Excel допускает до 31 символа без []:*?/\
+                    sheet_name = re.sub(r'[\[\]:*?/\\]', '_', title)[:31]
+                    sheet_name = sheet_name or "Лист"
+                    base_name = sheet_name
+                    suffix = 2
+                    while sheet_name in used_names:
+                        tail = f" ({suffix})"
+                        sheet_name = base_name[:31 - len(tail)] + tail
+                        suffix += 1
+                    used_names.add(sheet_name)
+                    
+                    self._to_dataframe(journals).to_excel(
+                        writer, sheet_name=sheet_name, index=False
+                    )
+            return True
+        except Exception:
+            return False
@@ -0,0 +1,361 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Дополнение записей журналов показателями elibrary.ru.
+
+Для каждого журнала открывается страница поиска из поля elibrary_url,
+в результатах находится ссылка на страницу журнала (title_about), и
+с нее извлекаются показатели РИНЦ и SCIENCE INDEX. Страницы загружаются
+параллельно с ограничением числа одновременных запросов к одному
+серверу. При временной ошибке (5xx, 429, обрыв соединения, таймаут)
+загрузка повторяется до ELIBRARY_RETRIES раз с растущей паузой.
+Результаты хранятся в файле elibrary_cache.json и повторно
+не загружаются, пока не истек срок хранения (ELIBRARY_CACHE_TTL_DAYS).
+
+Проверка без обращения к elibrary.ru - на локальном сервере-заменителе
+(см. elibrary_standin.py).
+
+Показатели сохраняются в записи журнала в поле "elibrary_metrics":
+    {"impact_factor_2y": 0.512, "science_index": 1.2, ...,
+     "title_url": "https://elibrary.ru/title_about_new.asp?id=..."}
+"""
+
+import asyncio
+import datetime
+import json
+import os
+import re
+from urllib.parse import urljoin, urlparse
+
+import aiohttp
+from bs4 import BeautifulSoup
+
+from normalize import clean_issn, normalize_title
+from snapshots import get_app_dir
+
+
+ELIBRARY_CACHE_FILENAME = "elibrary_cache.json"
+
+# Сколько дней показатели из кэша считаются свежими
+ELIBRARY_CACHE_TTL_DAYS = 7
+
+# Максимум одновременных запросов к одному серверу
+ELIBRARY_HOST_LIMIT = 2
+
+ELIBRARY_TIMEOUT = 30
+
+# Повторы при временных ошибках и пауза перед первым повтором (секунды,
+# удваивается с каждой попыткой)
+ELIBRARY_RETRIES = 2
+ELIBRARY_RETRY_DELAY = 1.0
+
+# Коды ответа, после которых загрузку стоит повторить
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+# Показатели страницы журнала: (ключ в записи, начало подписи на странице)
+ELIBRARY_METRICS = (
+    ("impact_factor_2y", "двухлетний импакт-фактор ринц"),
+    ("impact_factor_5y", "пятилетний импакт-фактор ринц"),
+    ("science_index", "показатель журнала в рейтинге science index"),
+    ("science_index_rank", "место в рейтинге science index"),
+    ("hirsch_index", "индекс хирша"),
+    ("publications", "число статей в ринц"),
+    ("citations", "число цитирований"),
+)
+
+# Подписи колонок при экспорте
+ELIBRARY_METRIC_TITLES = {
+    "impact_factor_2y": "Импакт-фактор РИНЦ (2 года)",
+    "impact_factor_5y": "Импакт-фактор РИНЦ (5 лет)",
+    "science_index": "SCIENCE INDEX",
+    "science_index_rank": "Место в SCIENCE INDEX",
+    "hirsch_index": "Индекс Хирша",
+    "publications": "Статей в РИНЦ",
+    "citations": "Цитирований",
+}
+
+HEADERS = {
+    'User-Agent': ('Mozilla/5.0 (Windows NT 10.0; Win64; x64) '
+                  'AppleWebKit/537.36 (KHTML, like Gecko) '
+                  'Chrome/91.0.4472.124 Safari/537.36'),
+    'Accept-Language': 'ru-RU,ru;q=0.8,en-US;q=0.5,en;q=0.3',
+}
+
+NUMBER_PATTERN = re.compile(r'-?\d[\d\s ]*(?:[.,]\d+)?')
+
+
+def parse_number(text):
+    """
+    Первое число в тексте ("1 234", "0,512")
+
+    Returns:
+        float | int | None: Число или None, если чисел нет
+    """
+    match = NUMBER_PATTERN.search(text or "")
+    if not match:
+        return None
+    value = re.sub(r'[\s ]', '', match.group()).replace(',', '.')
+    try:
+        return float(value) if '.' in value else int(value)
+    except ValueError:
+        return None
+
+
+def find_title_link(soup, page_url, issn="", journal_name=""):
+    """
+    Поиск ссылки на страницу журнала в результатах поиска elibrary
+
+    Args:
+        soup (BeautifulSoup): Страница результатов поиска
+        page_url (str): Адрес страницы (для относительных ссылок)
+        issn (str): ISSN журнала
+        journal_name (str): Название журнала
+
+    Returns:
+        str: Абсолютный адрес страницы журнала или None
+    """
+    links = soup.find_all('a', href=re.compile(r'title_about(_new)?\.asp\?id='))
+    if not links:
+        return None
+    if len(links) == 1:
+        return urljoin(page_url, links[0]['href'])
+
+    # Несколько кандидатов: сначала совпадение ISSN в строке результата,
+    # затем совпадение нормализованного названия
+    cleaned_issn = clean_issn(issn)
+    normalized_name = normalize_title(journal_name)
+    for link in links:
+        row = link.find_parent('tr')
+        row_text = row.get_text(" ") if row else link.get_text(" ")
+        if cleaned_issn and cleaned_issn in clean_issn(row_text):
+            return urljoin(page_url, link['href'])
+    for link in links:
+        if normalized_name and normalize_title(link.get_text()) == normalized_name:
+            return urljoin(page_url, link['href'])
+    return urljoin(page_url, links[0]['href'])
+
+
+def parse_title_metrics(soup):
+    """
+    Извлечение показателей со страницы журнала elibrary
+
+    Args:
+        soup (BeautifulSoup): Страница title_about
+
+    Returns:
+        dict: {ключ показателя: значение} для найденных показателей
+    """
+    metrics = {}
+    for row in soup.find_all('tr'):
+        cells = row.find_all('td', recursive=False)
+        if len(cells) < 2:
+            continue
+        label = " ".join(cells[0].get_text(" ").split()).lower()
+        for key, caption in ELIBRARY_METRICS:
+            if key not in metrics and label.startswith(caption):
+                value = parse_number(cells[-1].get_text(" "))
+                if value is not None:
+                    metrics[key] = value
+                break
+    return metrics
+
+
+class ElibraryCache:
+    """
+    Кэш показателей elibrary на диске со сроком хранения.
+    """
+
+    def __init__(self, filename=None, ttl_days=ELIBRARY_CACHE_TTL_DAYS):
+        """
+        Args:
+            filename (str, optional): Файл кэша; по умолчанию
+                                      elibrary_cache.json рядом с программой
+            ttl_days (float): Срок хранения записей в днях
+        """
+        self.filename = filename or os.path.join(
+            get_app_dir(), ELIBRARY_CACHE_FILENAME
+        )
+        self.ttl = datetime.timedelta(days=ttl_days)
+        self.entries = {}
+
+    def load(self):
+        """
+        Загрузка кэша из файла
+        """
+        if not os.path.exists(self.filename):
+            return
+        try:
+            with open(self.filename, 'r', encoding='utf-8') as file:
+                self.entries = json.load(file)
+        except Exception as e:
+            print(f"Ошибка при загрузке кэша elibrary: {e}")
+            self.entries = {}
+
+    def save(self):
+        """
+        Сохранение кэша в файл
+
+        Returns:
+            bool: True, если сохранение прошло успешно, иначе False
+        """
+        try:
+            with open(self.filename, 'w', encoding='utf-8') as file:
+                json.dump(self.entries, file, ensure_ascii=False)
+            return True
+        except Exception as e:
+            print(f"Ошибка при сохранении кэша elibrary: {e}")
+            return False
+
+    def get(self, url, now=None):
+        """
+        Свежие показатели для адреса или None
+
+        Args:
+            url (str): Адрес страницы поиска журнала
+            now (datetime.datetime, optional): Текущее время
+        """
+        entry = self.entries.get(url)
+        if entry is None:
+            return None
+        now = now or datetime.datetime.now()
+        fetched_at = datetime.datetime.fromisoformat(entry["fetched_at"])
+        if now - fetched_at > self.ttl:
+            return None
+        return entry["metrics"]
+
+    def put(self, url, metrics):
+        """
+        Сохранение показателей (пустой словарь - журнал не найден)
+        """
+        self.entries[url] = {
+            "fetched_at": datetime.datetime.now().isoformat(timespec="seconds"),
+            "metrics": metrics
+        }
+
+
+def is_transient_error(error):
+    """
+    Временная ли ошибка загрузки (повтор может быть успешным)
+    """
+    if isinstance(error, aiohttp.ClientResponseError):
+        return error.status in RETRY_STATUSES
+    return isinstance(error, (aiohttp.ClientConnectionError, asyncio.TimeoutError))
+
+
+async def _fetch_page(session, url):
+    async with session.get(url, headers=HEADERS, timeout=ELIBRARY_TIMEOUT) as response:
+        response.raise_for_status()
+        return await response.text(errors="replace")
+
+
+async def fetch_journal_metrics(session, journal, fetch=None):
+    """
+    Загрузка показателей одного журнала
+
+    Args:
+        session: aiohttp.ClientSession
+        journal (dict): Запись журнала с полем elibrary_url
+        fetch (callable, optional): async fetch(session, url) -> str;
+                                    по умолчанию обычный GET
+
+    Returns:
+        dict: Показатели журнала (пустой, если журнал не найден)
+    """
+    fetch = fetch or _fetch_page
+    search_url = journal["elibrary_url"]
+
+    search_html = await fetch(session, search_url)
+    title_url = find_title_link(
+        BeautifulSoup(search_html, 'html.parser'),
+        search_url,
+        journal.get("issn", ""),
+        journal.get("name_of_publication", "")
+    )
+    if not title_url:
+        return {}
+
+    title_html = await fetch(session, title_url)
+    metrics = parse_title_metrics(BeautifulSoup(title_html, 'html.parser'))
+    metrics["title_url"] = title_url
+    return metrics
+
+
+async def enrich_journals(
+    journals, session, cache=None, host_limit=ELIBRARY_HOST_LIMIT, fetch=None,
+    retries=ELIBRARY_RETRIES, retry_delay=ELIBRARY_RETRY_DELAY
+):
+    """
+    Дополнение журналов показателями elibrary
+
+    Args:
+        journals (list): Журналы; у каждого найденного появляется
+                         поле "elibrary_metrics"
+        session: aiohttp.ClientSession
+        cache (ElibraryCache, optional): Кэш; по умолчанию загружается
+                                         из файла рядом с программой
+        host_limit (int): Максимум одновременных запросов к серверу
+        fetch (callable, optional): async fetch(session, url) -> str
+        retries (int): Сколько раз повторять загрузку при временной ошибке
+        retry_delay (float): Пауза перед первым повтором в секундах
+
+    Returns:
+        dict: Статистика: fetched, cached, failed, retried
+    """
+    if cache is None:
+        cache = ElibraryCache()
+        cache.load()
+
+    stats = {"fetched": 0, "cached": 0, "failed": 0, "retried": 0}
+    host_semaphores = {}
+    # Одна загрузка на адрес, даже если он встречается у нескольких записей
+    pending = {}
+
+    for journal in journals:
+        url = journal.get("elibrary_url")
+        if not url or url == "none":
+            continue
+        metrics = cache.get(url)
+        if metrics is not None:
+            stats["cached"] += 1
+            if metrics:
+                journal["elibrary_metrics"] = metrics
+            continue
+        pending.setdefault(url, []).append(journal)
+
+    async def enrich(url, group):
+        host = urlparse(url).netloc
+        semaphore = host_semaphores.setdefault(host, asyncio.Semaphore(host_limit))
+        for attempt in range(retries + 1):
+            error = None
+            async with semaphore:
+                try:
+                    metrics = await fetch_journal_metrics(session, group[0], fetch)
+                except Exception as e:
+                    error = e
+            if error is None:
+                break
+            if attempt == retries or not is_transient_error(error):
+                print(f"Ошибка при загрузке показателей elibrary {url}: {error}")
+                stats["failed"] += 1
+                return
+            # Пауза вне семафора, чтобы не занимать место другого запроса
+            stats["retried"] += 1
+            await asyncio.sleep(retry_delay * 2 ** attempt)
+        cache.put(url, metrics)
+        stats["fetched"] += 1
+        if metrics:
+            for journal in group:
+                journal["elibrary_metrics"] = metrics
+
+    if pending:
+        print(f"Загрузка показателей elibrary для {len(pending)} журналов...")
+        await asyncio.gather(*(enrich(url, group) for url, group in pending.items()))
+        cache.save()
+
+    print(
+        f"Показатели elibrary: загружено {stats['fetched']}, "
+        f"из кэша {stats['cached']}, ошибок {stats['failed']}, "
+        f"повторов {stats['retried']}"
+    )
+    return stats
@@ -0,0 +1,247 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Локальный сервер-заменитель elibrary.ru для проверки модуля elibrary.
+
+Сервер на aiohttp.web отдает страницы поиска (titles.asp) и страницы
+журналов (title_about_new.asp) в том же виде, что и elibrary.ru, считает
+одновременные запросы и по настройке отвечает ошибками, поэтому
+на нем проверяются ограничение числа запросов к серверу, кэш со сроком
+хранения и повторы при временных ошибках без обращения к настоящему сайту.
+
+Запуск самопроверки:
+    python elibrary_standin.py
+
+Программа завершается с кодом 1, если какая-либо проверка не прошла.
+Сервер можно использовать и отдельно:
+
+    async with StandinServer(journal_count=10) as server:
+        journals = server.journals()
+        await elibrary.enrich_journals(journals, session, cache=...)
+"""
+
+import argparse
+import asyncio
+import datetime
+import os
+import socket
+import sys
+import tempfile
+
+import aiohttp
+from aiohttp import web
+
+import elibrary
+
+
+class StandinServer:
+    """
+    Сервер-заменитель elibrary.ru на 127.0.0.1 со свободным портом.
+    """
+
+    def __init__(self, journal_count=10, delay=0.02, fail_first=None,
+                 missing=()):
+        """
+        Args:
+            journal_count (int): Сколько журналов знает сервер
+            delay (float): Задержка ответа в секундах (чтобы запросы
+                           перекрывались во времени)
+            fail_first (dict, optional): {номер журнала: сколько первых
+                                         запросов поиска ответить 503}
+            missing (iterable): Номера журналов, которых нет в поиске
+        """
+        self.journal_count = journal_count
+        self.delay = delay
+        self.fail_first = dict(fail_first or {})
+        self.missing = set(missing)
+        self.active = 0
+        self.peak = 0
+        self.requests = 0
+        self.base_url = None
+        self._runner = None
+
+    def journals(self):
+        """
+        Записи журналов с elibrary_url, указывающими на этот сервер
+
+        Returns:
+            list: Журналы в формате базы
+        """
+        return [
+            {
+                "name_of_publication": f"Журнал {number}",
+                "issn": f"{1000 + number:04d}-{number % 10000:04d}",
+                "elibrary_url": f"{self.base_url}/titles.asp?number={number}"
+            }
+            for number in range(self.journal_count)
+        ]
+
+    async def _handle(self, request, render):
+        self.requests += 1
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+        try:
+            await asyncio.sleep(self.delay)
+            return render(request)
+        finally:
+            self.active -= 1
+
+    def _search_page(self, request):
+        number = int(request.query.get("number", -1))
+        if self.fail_first.get(number, 0) > 0:
+            self.fail_first[number] -= 1
+            return web.Response(status=503, text="Service Unavailable")
+        if number in self.missing or not 0 <= number < self.journal_count:
+            rows = ""
+        else:
+            rows = (
+                f'<tr><td><a href="title_about_new.asp?id={number}">'
+                f'Журнал {number}</a></td></tr>'
+            )
+        return web.Response(
+            text=f"<html><body><table>{rows}</table></body></html>",
+            content_type="text/html"
+        )
+
+    def _title_page(self, request):
+        number = int(request.query.get("id", -1))
+        if not 0 <= number < self.journal_count:
+            return web.Response(status=404, text="Not Found")
+        return web.Response(
+            text=(
+                "<html><body><table>"
+                f"<tr><td>Пятилетний импакт-фактор РИНЦ</td><td>0,{number:03d}</td></tr>"
+                f"<tr><td>Показатель журнала в рейтинге SCIENCE INDEX</td><td>{number}</td></tr>"
+                "</table></body></html>"
+            ),
+            content_type="text/html"
+        )
+
+    async def start(self):
+        """
+        Запуск сервера
+        """
+        app = web.Application()
+        app.router.add_get(
+            "/titles.asp", lambda request: self._handle(request, self._search_page)
+        )
+        app.router.add_get(
+            "/title_about_new.asp",
+            lambda request: self._handle(request, self._title_page)
+        )
+        self._runner = web.AppRunner(app)
+        await self._runner.setup()
+        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        sock.bind(("127.0.0.1", 0))
+        site = web.SockSite(self._runner, sock)
+        await site.start()
+        self.base_url = f"http://127.0.0.1:{sock.getsockname()[1]}"
+
+    async def stop(self):
+        """
+        Остановка сервера
+        """
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    async def __aenter__(self):
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.stop()
+
+
+async def self_check(journal_count=20, host_limit=3):
+    """
+    Прогон elibrary.enrich_journals на сервере-заменителе
+
+    Args:
+        journal_count (int): Сколько журналов запрашивать
+        host_limit (int): Ограничение одновременных запросов к серверу
+
+    Returns:
+        list: Описания непрошедших проверок (пустой, если все в порядке)
+    """
+    failures = []
+
+    def check(condition, message):
+        if not condition:
+            failures.append(message)
+
+    # Журнал 1 отвечает 503 один раз (повтор успешен), журнал 2 - больше,
+    # чем допускается повторов (ошибка), журнала 3 нет в поиске
+    retries = 1
+    fail_first = {1: 1, 2: retries + 1}
+
+    with tempfile.TemporaryDirectory() as workdir:
+        cache = elibrary.ElibraryCache(os.path.join(workdir, "cache.json"))
+        async with StandinServer(journal_count, fail_first=fail_first,
+                                 missing={3}) as server:
+            async with aiohttp.ClientSession() as session:
+                journals = server.journals()
+                stats = await elibrary.enrich_journals(
+                    journals, session, cache=cache, host_limit=host_limit,
+                    retries=retries, retry_delay=0.01
+                )
+                check(server.peak <= host_limit,
+                      f"одновременных запросов {server.peak} > {host_limit}")
+                check(server.peak > 1, "запросы не выполнялись параллельно")
+                check(stats["retried"] == 2,
+                      f"повторов {stats['retried']}, ожидалось 2")
+                check(stats["failed"] == 1,
+                      f"ошибок {stats['failed']}, ожидалась 1")
+                check(stats["fetched"] == journal_count - 1,
+                      f"загружено {stats['fetched']}, ожидалось {journal_count - 1}")
+                check("elibrary_metrics" in journals[1],
+                      "журнал после повтора не получил показатели")
+                check("elibrary_metrics" not in journals[2],
+                      "журнал с ошибкой получил показатели")
+                check("elibrary_metrics" not in journals[3],
+                      "ненайденный журнал получил показатели")
+                check(journals[5].get("elibrary_metrics", {}).get("science_index") == 5,
+                      "показатели журнала разобраны неверно")
+
+                # Повторный прогон: все, кроме журнала с ошибкой, из кэша
+                cache = elibrary.ElibraryCache(cache.filename)
+                cache.load()
+                requests_before = server.requests
+                stats = await elibrary.enrich_journals(
+                    server.journals(), session, cache=cache,
+                    host_limit=host_limit, retries=retries, retry_delay=0.01
+                )
+                check(stats["cached"] == journal_count - 1,
+                      f"из кэша {stats['cached']}, ожидалось {journal_count - 1}")
+                check(server.requests - requests_before == 2,
+                      "при повторном прогоне запрошены закэшированные журналы")
+
+                # Истекший срок хранения: запись кэша больше не выдается
+                url = journals[0]["elibrary_url"]
+                later = datetime.datetime.now() + cache.ttl + datetime.timedelta(seconds=1)
+                check(cache.get(url) is not None, "свежая запись не найдена в кэше")
+                check(cache.get(url, now=later) is None,
+                      "устаревшая запись выдана из кэша")
+    return failures
+
+
+def main(argv=None):
+    arg_parser = argparse.ArgumentParser(
+        description="Проверка модуля elibrary на локальном сервере-заменителе"
+    )
+    arg_parser.add_argument("--journals", type=int, default=20)
+    arg_parser.add_argument("--host-limit", type=int, default=3)
+    args = arg_parser.parse_args(argv)
+
+    failures = asyncio.run(self_check(args.journals, args.host_limit))
+    for message in failures:
+        print(f"Ошибка: {message}")
+    if failures:
+        return 1
+    print("Все проверки пройдены")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,213 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Кэш выгрузок в Excel.
+
+Готовый файл выгрузки сохраняется в директорию export_cache рядом с
+программой под ключом из нормализованного набора фильтров, формата
+выгрузки, версии базы (хеш содержимого файла данных, см. journal_store)
+и даты актуальности. Повторная выгрузка с теми же фильтрами копирует
+готовый файл вместо фильтрации и записи книги.
+
+Выгрузки прежних версий базы удаляются при сохранении новой выгрузки,
+а общий размер кэша ограничен EXPORT_CACHE_MAX_MB: при превышении
+удаляются давно не использовавшиеся файлы.
+"""
+
+import datetime
+import hashlib
+import json
+import os
+import shutil
+
+from relevance import as_of_ordinal
+from snapshots import get_app_dir, write_json_atomic
+
+
+EXPORT_CACHE_DIRNAME = "export_cache"
+
+# Предельный общий размер файлов в кэше
+EXPORT_CACHE_MAX_MB = 200
+
+
+def normalize_filters(filters):
+    """
+    Нормализация набора фильтров: порядок значений в списках и пробелы
+    в строке поиска не влияют на ключ, пустые фильтры отбрасываются
+
+    Args:
+        filters (dict): Фильтры (vak_categories, white_levels, rsci, query,
+                        min_metrics, expression; прочие ключи сохраняются)
+
+    Returns:
+        dict: Нормализованные фильтры
+    """
+    normalized = {}
+    for key, value in filters.items():
+        if key == "query" and value:
+            value = " ".join(value.lower().split())
+        elif key == "expression" and value:
+            value = value.strip()
+        elif isinstance(value, (list, tuple, set)):
+            value = sorted(value)
+        if value is None or value == "" or value == [] or value == {}:
+            continue
+        normalized[key] = value
+    return normalized
+
+
+def cache_key(filters, export_format, data_version, as_of=None):
+    """
+    Ключ выгрузки
+
+    Args:
+        filters (dict | list): Фильтры или список наборов фильтров
+                               (для пакетной выгрузки)
+        export_format (str): Формат выгрузки, например "xlsx"
+        data_version (str): Версия базы
+        as_of (datetime.date | int, optional): Дата актуальности
+                                               (по умолчанию сегодня)
+
+    Returns:
+        str: Шестнадцатеричный хеш
+    """
+    if isinstance(filters, dict):
+        filters = normalize_filters(filters)
+    else:
+        filters = [normalize_filters(item) for item in filters]
+    data = json.dumps({
+        "filters": filters,
+        "format": export_format,
+        "version": data_version,
+        "as_of": as_of_ordinal(as_of),
+    }, ensure_ascii=False, sort_keys=True)
+    return hashlib.sha1(data.encode('utf-8')).hexdigest()[:20]
+
+
+class ExportCache:
+    """
+    Кэш готовых файлов выгрузки с ограничением размера.
+    """
+
+    def __init__(self, directory=None, max_mb=EXPORT_CACHE_MAX_MB):
+        """
+        Args:
+            directory (str, optional): Директория кэша; по умолчанию
+                                       export_cache рядом с программой
+            max_mb (float): Предельный общий размер файлов в мегабайтах
+        """
+        self.directory = directory or os.path.join(
+            get_app_dir(), EXPORT_CACHE_DIRNAME
+        )
+        self.index_file = os.path.join(self.directory, "index.json")
+        self.max_bytes = int(max_mb * 1024 * 1024)
+
+    def _load_index(self):
+        if not os.path.exists(self.index_file):
+            return {}
+        try:
+            with open(self.index_file, 'r', encoding='utf-8') as file:
+                return json.load(file)
+        except Exception as e:
+            print(f"Ошибка при чтении кэша выгрузок: {e}")
+            return {}
+
+    def _save_index(self, index):
+        write_json_atomic(self.index_file, index, indent=2)
+
+    def get(self, key, output_file):
+        """
+        Копирование готовой выгрузки в output_file
+
+        Args:
+            key (str): Ключ из cache_key
+            output_file (str): Куда скопировать файл
+
+        Returns:
+            dict: Сведения, сохраненные вместе с выгрузкой (put), или None,
+                  если выгрузки нет в кэше
+        """
+        index = self._load_index()
+        entry = index.get(key)
+        if entry is None:
+            return None
+        path = os.path.join(self.directory, entry["file"])
+        try:
+            shutil.copyfile(path, output_file)
+        except OSError:
+            # Файл удален вручную или не копируется - собираем заново
+            index.pop(key, None)
+            self._save_index(index)
+            return None
+
+        entry["used"] = datetime.datetime.now().isoformat(timespec="seconds")
+        self._save_index(index)
+        return entry.get("info", {})
+
+    def put(self, key, source_file, data_version, info=None):
+        """
+        Сохранение выгрузки в кэш. Выгрузки других версий базы удаляются,
+        затем удаляются давно не использовавшиеся файлы сверх лимита.
+
+        Args:
+            key (str): Ключ из cache_key
+            source_file (str): Готовый файл выгрузки
+            data_version (str): Версия базы, из которой получена выгрузка
+            info (dict, optional): Сведения о выгрузке (например, число
+                                   журналов), возвращаются из get
+
+        Returns:
+            bool: True, если выгрузка сохранена, иначе False
+        """
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            extension = os.path.splitext(source_file)[1]
+            filename = f"{key}{extension}"
+            shutil.copyfile(source_file, os.path.join(self.directory, filename))
+
+            index = self._load_index()
+            for old_key, entry in list(index.items()):
+                if entry.get("version") != data_version:
+                    self._remove(index, old_key)
+            index[key] = {
+                "file": filename,
+                "version": data_version,
+                "bytes": os.path.getsize(source_file),
+                "used": datetime.datetime.now().isoformat(timespec="seconds"),
+                "info": info or {},
+            }
+            self._evict(index)
+            self._save_index(index)
+            return True
+        except Exception as e:
+            print(f"Ошибка при сохранении выгрузки в кэш: {e}")
+            return False
+
+    def _remove(self, index, key):
+        entry = index.pop(key)
+        path = os.path.join(self.directory, entry["file"])
+        if os.path.exists(path):
+            os.remove(path)
+
+    def _evict(self, index):
+        """
+        Удаление давно не использовавшихся выгрузок сверх лимита размера
+        """
+        total = sum(entry["bytes"] for entry in index.values())
+        for key in sorted(index, key=lambda item: index[item]["used"]):
+            if total <= self.max_bytes:
+                break
+            total -= index[key]["bytes"]
+            self._remove(index, key)
+
+    def clear(self):
+        """
+        Удаление всех выгрузок
+        """
+        if not os.path.isdir(self.directory):
+            return
+        index = self._load_index()
+        for key in list(index):
+            self._remove(index, key)
+        self._save_index(index)
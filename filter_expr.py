@@ -0,0 +1,746 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Язык выражений для фильтрации журналов.
+
+Выражение разбирается один раз и превращается в план: условия, для
+которых у базы есть индекс (категория ВАК, уровень белого списка, RSCI,
+ISSN, полнотекстовый поиск, актуальность на дату), вычисляются сразу
+как множества номеров журналов, а остальные условия проверяются только
+для оставшихся кандидатов, от дешевых к дорогим. Планы кэшируются по
+строке выражения.
+
+Условия:
+    vak = 1                      категория ВАК (vak in (1, 2), vak != none)
+    white in (1, 2)              уровень белого списка
+    rsci = yes                   RSCI (yes/no, да/нет, true/false)
+    issn = 1234-5678             любой из ISSN журнала
+    issn ^= 1234                 ISSN начинается с
+    search = "вестн упр"         полнотекстовый поиск (как строка поиска)
+    title ~ "эконом|финанс"      регулярное выражение по названию
+    title ^= "вестник"           название начинается с
+    included >= 2022-01-01       дата включения по какой-либо специальности
+    included in 2020-01-01..2022-12-31
+    active                       журнал актуален на дату фильтрации
+    active = 2023-05-01          журнал актуален на указанную дату
+    has rcsi_url                 поле заполнено (не пустое и не "none")
+    science_index >= 1.0         показатели elibrary (impact_factor_2y, ...)
+
+Условия объединяются через and, or, not (или и, или, не) и скобки:
+    (vak in (1, 2) or white = 1) and not has rcsi_url
+
+Пример:
+    plan = compile_filter('white in (1, 2) and title ~ "эконом"')
+    positions = plan.select(FilterContext(db))
+"""
+
+import bisect
+import datetime
+import functools
+import re
+
+from elibrary import ELIBRARY_METRIC_TITLES
+from normalize import clean_issn, normalize_title, split_issns
+from relevance import as_of_ordinal, specialty_interval
+
+
+# Сколько скомпилированных выражений хранить
+PLAN_CACHE_SIZE = 256
+
+# Поля с индексом по значению: имя в выражении -> поле записи
+VALUE_FIELDS = {
+    "vak": "vak_category",
+    "white": "white_level",
+    "rsci": "RSCI",
+}
+
+DEFAULTS = {
+    "vak_category": "none",
+    "white_level": "none",
+    "RSCI": False,
+}
+
+BOOLEAN_WORDS = {
+    "yes": True, "true": True, "да": True, "1": True,
+    "no": False, "false": False, "нет": False, "0": False,
+}
+
+KEYWORDS = {
+    "and": "and", "и": "and",
+    "or": "or", "или": "or",
+    "not": "not", "не": "not",
+    "in": "in", "has": "has",
+}
+
+COMPARISONS = ("=", "!=", "<", "<=", ">", ">=")
+
+# Относительная стоимость проверки одной записи
+COST_VALUE = 1
+COST_NUMBER = 2
+COST_DATE = 4
+COST_REGEX = 8
+
+TOKEN_PATTERN = re.compile(r'''
+    (?P<space>\s+)
+  | (?P<string>"(?:[^"\\]|\\.)*"|'(?:[^'\\]|\\.)*')
+  | (?P<op>>=|<=|!=|\^=|=|<|>|~)
+  | (?P<punct>[(),])
+  | (?P<word>[^\s()",'=<>!~^]+)
+''', re.VERBOSE)
+
+RANGE_PATTERN = re.compile(r'^(.*?)\.\.(.*)$')
+
+
+class FilterSyntaxError(ValueError):
+    """
+    Ошибка в выражении фильтра.
+    """
+
+    def __init__(self, message, position=None):
+        if position is not None:
+            message = f"{message} (позиция {position + 1})"
+        super().__init__(message)
+        self.position = position
+
+
+def _tokenize(expression):
+    """
+    Разбиение выражения на лексемы
+
+    Returns:
+        list: Кортежи (тип, значение, позиция)
+    """
+    tokens = []
+    position = 0
+    while position < len(expression):
+        match = TOKEN_PATTERN.match(expression, position)
+        if not match:
+            raise FilterSyntaxError(
+                f"Неожиданный символ '{expression[position]}'", position
+            )
+        kind = match.lastgroup
+        text = match.group()
+        if kind == "string":
+            text = re.sub(r'\\(.)', r'\1', text[1:-1])
+        elif kind == "word" and text.lower() in KEYWORDS:
+            kind, text = "keyword", KEYWORDS[text.lower()]
+        if kind != "space":
+            tokens.append((kind, text, position))
+        position = match.end()
+    tokens.append(("end", "", position))
+    return tokens
+
+
+def _parse_date(text, position):
+    """
+    Дата ГГГГ-ММ-ДД или ДД.ММ.ГГГГ в виде порядкового номера
+    """
+    for date_format in ("%Y-%m-%d", "%d.%m.%Y"):
+        try:
+            return datetime.datetime.strptime(text, date_format).date().toordinal()
+        except ValueError:
+            continue
+    raise FilterSyntaxError(f"Неверная дата '{text}'", position)
+
+
+def _parse_number(text, position):
+    try:
+        return float(text.replace(",", "."))
+    except ValueError:
+        raise FilterSyntaxError(f"Ожидалось число, получено '{text}'", position)
+
+
+def _compare(value, op, other):
+    if op == "=":
+        return value == other
+    if op == "!=":
+        return value != other
+    if op == "<":
+        return value < other
+    if op == "<=":
+        return value <= other
+    if op == ">":
+        return value > other
+    return value >= other
+
+
+def _is_present(value):
+    if value is None or value is False:
+        return False
+    if isinstance(value, str):
+        return bool(value.strip()) and value.strip().lower() != "none"
+    if isinstance(value, (list, dict)):
+        return bool(value)
+    return True
+
+
+class FilterContext:
+    """
+    Данные для выполнения плана: база, дата актуальности и
+    вычисленные множества номеров журналов.
+    """
+
+    def __init__(self, db, as_of=None):
+        """
+        Args:
+            db (JournalDatabase): База журналов
+            as_of: Дата актуальности для условия active (по умолчанию сегодня)
+        """
+        self.db = db
+        self.journals = db.journals
+        self.as_of = as_of
+        self.selections = {}
+
+    def all_positions(self):
+        return set(range(len(self.journals)))
+
+    def relevant_positions(self, as_of=None):
+        """
+        Номера журналов, актуальных на дату
+        """
+        day = as_of_ordinal(as_of if as_of is not None else self.as_of)
+        return self.db.relevance_index.relevant_positions(day)
+
+
+class Node:
+    """
+    Узел плана фильтрации.
+
+    indexed - условие вычисляется по индексам базы целиком (select),
+    cost - относительная стоимость проверки одной записи (test).
+    """
+
+    indexed = False
+    cost = 0
+
+    def select(self, context):
+        """
+        Номера подходящих журналов (только для indexed)
+
+        Returns:
+            set: Номера журналов в db.journals
+        """
+        key = id(self)
+        if key not in context.selections:
+            context.selections[key] = self._select(context)
+        return context.selections[key]
+
+    def _select(self, context):
+        raise NotImplementedError
+
+    def test(self, position, journal, context):
+        """
+        Проверка одного журнала
+        """
+        return position in self.select(context)
+
+
+class ValueCondition(Node):
+    """
+    Равенство или принадлежность списку для поля с индексом по значению.
+    """
+
+    indexed = True
+    cost = COST_VALUE
+
+    def __init__(self, field, values, negate=False):
+        self.field = field
+        self.values = frozenset(values)
+        self.negate = negate
+
+    def _select(self, context):
+        index = context.db.filter_index()[self.field]
+        selected = set()
+        for value in self.values:
+            selected |= index.get(value, set())
+        if self.negate:
+            return context.all_positions() - selected
+        return selected
+
+    def test(self, position, journal, context):
+        value = journal.get(self.field, DEFAULTS[self.field])
+        return (value in self.values) != self.negate
+
+
+class IssnCondition(Node):
+    """
+    Совпадение или начало любого из ISSN журнала.
+    """
+
+    indexed = True
+    cost = COST_VALUE
+
+    def __init__(self, value, prefix=False):
+        self.value = clean_issn(value)
+        self.prefix = prefix
+
+    def _select(self, context):
+        index = context.db.filter_index()["issn"]
+        if not self.prefix:
+            return set(index.get(self.value, set()))
+        keys = context.db.filter_index()["issn_keys"]
+        selected = set()
+        start = bisect.bisect_left(keys, self.value)
+        for key in keys[start:]:
+            if not key.startswith(self.value):
+                break
+            selected |= index[key]
+        return selected
+
+    def test(self, position, journal, context):
+        issns = journal.get("issns") or split_issns(journal.get("issn", ""))
+        for issn in issns:
+            issn = clean_issn(issn)
+            if issn.startswith(self.value) if self.prefix else issn == self.value:
+                return True
+        return False
+
+
+class SearchCondition(Node):
+    """
+    Полнотекстовый поиск по названию и шифрам специальностей.
+    """
+
+    indexed = True
+    cost = COST_VALUE
+
+    def __init__(self, query):
+        self.query = query
+
+    def _select(self, context):
+        return set(context.db.search_index.search(self.query))
+
+
+class ActiveCondition(Node):
+    """
+    Актуальность журнала на дату.
+    """
+
+    indexed = True
+    cost = COST_VALUE
+
+    def __init__(self, day=None):
+        self.day = day
+
+    def _select(self, context):
+        return context.relevant_positions(self.day)
+
+
+class TitleCondition(Node):
+    """
+    Регулярное выражение или начало нормализованного названия.
+    """
+
+    def __init__(self, pattern, op):
+        self.op = op
+        if op == "~":
+            self.cost = COST_REGEX
+            self.regex = re.compile(pattern, re.IGNORECASE)
+        else:
+            self.cost = COST_VALUE
+            self.normalized = normalize_title(pattern)
+
+    def test(self, position, journal, context):
+        title = journal.get("name_of_publication", "")
+        if self.op == "~":
+            return self.regex.search(title) is not None
+        normalized = normalize_title(title)
+        if self.op == "^=":
+            return normalized.startswith(self.normalized)
+        return (normalized == self.normalized) == (self.op == "=")
+
+
+class IncludedCondition(Node):
+    """
+    Дата включения в перечень по какой-либо специальности.
+    """
+
+    cost = COST_DATE
+
+    def __init__(self, op, day, until=None):
+        self.op = op
+        self.day = day
+        self.until = until
+
+    def test(self, position, journal, context):
+        for specialty in journal.get("specialties", []):
+            interval = specialty_interval(specialty)
+            if not interval or interval[0] is None:
+                continue
+            start = interval[0]
+            if self.op == "in":
+                if self.day <= start <= self.until:
+                    return True
+            elif _compare(start, self.op, self.day):
+                return True
+        return False
+
+
+class MetricCondition(Node):
+    """
+    Сравнение показателя elibrary с числом. Журналы без показателя
+    не проходят условие.
+    """
+
+    cost = COST_NUMBER
+
+    def __init__(self, metric, op, value):
+        self.metric = metric
+        self.op = op
+        self.value = value
+
+    def test(self, position, journal, context):
+        value = (journal.get("elibrary_metrics") or {}).get(self.metric)
+        return value is not None and _compare(value, self.op, self.value)
+
+
+class HasCondition(Node):
+    """
+    Поле записи заполнено.
+    """
+
+    cost = COST_VALUE
+
+    def __init__(self, field):
+        self.field = field
+
+    def test(self, position, journal, context):
+        return _is_present(journal.get(self.field))
+
+
+class NotNode(Node):
+    """
+    Отрицание условия.
+    """
+
+    def __init__(self, child):
+        self.child = child
+        self.indexed = child.indexed
+        self.cost = child.cost
+
+    def _select(self, context):
+        return context.all_positions() - self.child.select(context)
+
+    def test(self, position, journal, context):
+        return not self.child.test(position, journal, context)
+
+
+class AndNode(Node):
+    """
+    Все условия. Условия по индексам вычисляются первыми, остальные
+    проверяются для оставшихся кандидатов в порядке стоимости.
+    """
+
+    def __init__(self, children):
+        self.children = sorted(
+            children, key=lambda child: (not child.indexed, child.cost)
+        )
+        self.indexed_children = [child for child in self.children if child.indexed]
+        self.row_children = [child for child in self.children if not child.indexed]
+        self.indexed = not self.row_children
+        self.cost = sum(child.cost for child in self.children)
+
+    def candidates(self, context, candidates=None):
+        """
+        Номера журналов, подходящих по всем условиям
+
+        Args:
+            candidates (set, optional): Рассматривать только эти номера
+        """
+        selections = sorted(
+            (child.select(context) for child in self.indexed_children), key=len
+        )
+        if candidates is not None:
+            selections.insert(0, candidates)
+        if selections:
+            result = set(selections[0])
+            for selection in selections[1:]:
+                result &= selection
+                if not result:
+                    return result
+        else:
+            result = context.all_positions()
+
+        journals = context.journals
+        for child in self.row_children:
+            result = {
+                position for position in result
+                if child.test(position, journals[position], context)
+            }
+            if not result:
+                break
+        return result
+
+    def _select(self, context):
+        return self.candidates(context)
+
+    def test(self, position, journal, context):
+        return all(
+            child.test(position, journal, context) for child in self.children
+        )
+
+
+class OrNode(Node):
+    """
+    Хотя бы одно условие.
+    """
+
+    def __init__(self, children):
+        self.children = sorted(children, key=lambda child: child.cost)
+        self.indexed = all(child.indexed for child in self.children)
+        self.cost = sum(child.cost for child in self.children)
+
+    def _select(self, context):
+        result = set()
+        for child in self.children:
+            result |= child.select(context)
+        return result
+
+    def test(self, position, journal, context):
+        return any(
+            child.test(position, journal, context) for child in self.children
+        )
+
+
+class _Parser:
+    """
+    Разбор выражения методом рекурсивного спуска.
+    """
+
+    def __init__(self, expression):
+        self.tokens = _tokenize(expression)
+        self.index = 0
+
+    def peek(self):
+        return self.tokens[self.index]
+
+    def take(self):
+        token = self.tokens[self.index]
+        self.index += 1
+        return token
+
+    def accept(self, kind, text=None):
+        token = self.peek()
+        if token[0] == kind and (text is None or token[1] == text):
+            self.index += 1
+            return token
+        return None
+
+    def expect(self, kind, text=None, what=None):
+        token = self.accept(kind, text)
+        if token is None:
+            found = self.peek()
+            raise FilterSyntaxError(
+                f"Ожидалось {what or text or kind}, получено "
+                f"'{found[1] or 'конец выражения'}'", found[2]
+            )
+        return token
+
+    def parse(self):
+        node = self.parse_or()
+        self.expect("end", what="конец выражения")
+        return node
+
+    def parse_or(self):
+        children = [self.parse_and()]
+        while self.accept("keyword", "or"):
+            children.append(self.parse_and())
+        if len(children) == 1:
+            return children[0]
+        return OrNode(self._flatten(children, OrNode))
+
+    def parse_and(self):
+        children = [self.parse_not()]
+        while self.accept("keyword", "and"):
+            children.append(self.parse_not())
+        if len(children) == 1:
+            return children[0]
+        return AndNode(self._flatten(children, AndNode))
+
+    @staticmethod
+    def _flatten(children, node_type):
+        flat = []
+        for child in children:
+            if isinstance(child, node_type):
+                flat.extend(child.children)
+            else:
+                flat.append(child)
+        return flat
+
+    def parse_not(self):
+        if self.accept("keyword", "not"):
+            child = self.parse_not()
+            if isinstance(child, NotNode):
+                return child.child
+            return NotNode(child)
+        if self.accept("punct", "("):
+            node = self.parse_or()
+            self.expect("punct", ")", "')'")
+            return node
+        return self.parse_condition()
+
+    def parse_value(self):
+        token = self.take()
+        if token[0] not in ("word", "string"):
+            raise FilterSyntaxError(
+                f"Ожидалось значение, получено '{token[1] or 'конец выражения'}'",
+                token[2]
+            )
+        return token[1], token[2]
+
+    def parse_list(self):
+        """
+        Значение или список значений в скобках
+        """
+        if not self.accept("punct", "("):
+            return [self.parse_value()]
+        values = [self.parse_value()]
+        while self.accept("punct", ","):
+            values.append(self.parse_value())
+        self.expect("punct", ")", "')'")
+        return values
+
+    def parse_condition(self):
+        if self.accept("keyword", "has"):
+            field, _ = self.parse_value()
+            return HasCondition(field)
+
+        token = self.take()
+        if token[0] != "word":
+            raise FilterSyntaxError(
+                f"Ожидалось условие, получено '{token[1] or 'конец выражения'}'",
+                token[2]
+            )
+        name, position = token[1].lower(), token[2]
+
+        if name == "active":
+            if self.accept("op", "="):
+                value, value_position = self.parse_value()
+                return ActiveCondition(_parse_date(value, value_position))
+            return ActiveCondition()
+
+        if self.accept("keyword", "in"):
+            op = "in"
+        else:
+            op_token = self.peek()
+            if op_token[0] != "op":
+                raise FilterSyntaxError(
+                    f"Ожидалась операция после '{token[1]}'", op_token[2]
+                )
+            op = self.take()[1]
+
+        if name in VALUE_FIELDS:
+            return self._value_condition(name, op, position)
+        if name == "issn":
+            return self._issn_condition(op, position)
+        if name == "search":
+            self._check_op(op, ("=",), name, position)
+            return SearchCondition(self.parse_value()[0])
+        if name == "title":
+            self._check_op(op, ("=", "!=", "^=", "~"), name, position)
+            pattern, pattern_position = self.parse_value()
+            try:
+                return TitleCondition(pattern, op)
+            except re.error as e:
+                raise FilterSyntaxError(
+                    f"Неверное регулярное выражение: {e}", pattern_position
+                )
+        if name == "included":
+            return self._included_condition(op, position)
+        if name in ELIBRARY_METRIC_TITLES:
+            self._check_op(op, COMPARISONS, name, position)
+            value, value_position = self.parse_value()
+            return MetricCondition(name, op, _parse_number(value, value_position))
+        raise FilterSyntaxError(f"Неизвестное поле '{token[1]}'", position)
+
+    @staticmethod
+    def _check_op(op, allowed, name, position):
+        if op not in allowed:
+            raise FilterSyntaxError(
+                f"Операция '{op}' недоступна для поля '{name}'", position
+            )
+
+    def _value_condition(self, name, op, position):
+        self._check_op(op, ("=", "!=", "in"), name, position)
+        field = VALUE_FIELDS[name]
+        values = []
+        for value, value_position in self.parse_list():
+            if field == "RSCI":
+                if value.lower() not in BOOLEAN_WORDS:
+                    raise FilterSyntaxError(
+                        f"Ожидалось yes или no, получено '{value}'", value_position
+                    )
+                value = BOOLEAN_WORDS[value.lower()]
+            values.append(value)
+        return ValueCondition(field, values, negate=(op == "!="))
+
+    def _issn_condition(self, op, position):
+        self._check_op(op, ("=", "^=", "in"), "issn", position)
+        conditions = [
+            IssnCondition(value, prefix=(op == "^="))
+            for value, _ in self.parse_list()
+        ]
+        return conditions[0] if len(conditions) == 1 else OrNode(conditions)
+
+    def _included_condition(self, op, position):
+        self._check_op(op, COMPARISONS + ("in",), "included", position)
+        value, value_position = self.parse_value()
+        if op != "in":
+            return IncludedCondition(op, _parse_date(value, value_position))
+        match = RANGE_PATTERN.match(value)
+        if not match:
+            raise FilterSyntaxError(
+                "Ожидался период вида 2020-01-01..2022-12-31", value_position
+            )
+        return IncludedCondition(
+            "in",
+            _parse_date(match.group(1), value_position),
+            _parse_date(match.group(2), value_position)
+        )
+
+
+class FilterPlan:
+    """
+    Скомпилированное выражение фильтра.
+    """
+
+    def __init__(self, expression, root):
+        self.expression = expression
+        self.root = root
+
+    def select(self, context, candidates=None):
+        """
+        Номера журналов, подходящих под выражение
+
+        Args:
+            context (FilterContext): Данные для выполнения
+            candidates (set, optional): Рассматривать только эти номера
+                                        (например, актуальные журналы)
+
+        Returns:
+            set: Номера журналов в db.journals
+        """
+        root = self.root
+        if not isinstance(root, AndNode):
+            root = AndNode([root])
+        return root.candidates(context, candidates)
+
+
+@functools.lru_cache(maxsize=PLAN_CACHE_SIZE)
+def compile_filter(expression):
+    """
+    Разбор и компиляция выражения (результат кэшируется по строке)
+
+    Args:
+        expression (str): Выражение фильтра
+
+    Returns:
+        FilterPlan: План фильтрации
+
+    Raises:
+        FilterSyntaxError: если в выражении есть ошибка
+    """
+    if not expression or not expression.strip():
+        raise FilterSyntaxError("Пустое выражение")
+    return FilterPlan(expression, _Parser(expression).parse())
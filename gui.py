@@ -5,14 +5,21 @@
 Модуль с графическим интерфейсом для работы с журналами.
 """
 
+import datetime
 import os
 import threading
 import tkinter as tk
-from tkinter import ttk, messagebox
+from tkinter import ttk, messagebox, simpledialog
 
 # Импорт наших модулей
 from db_manager import JournalDatabase
+from filter_expr import FilterSyntaxError
+from normalize import journal_key
 from parser_wrapper import ParserWrapper
+from profiling import profile_block
+from presets import add_preset, batch_export, load_presets
+from results_grid import VirtualJournalGrid
+from snapshots import SnapshotStore
 
 
 class JournalAnalyzerApp:
@@ -20,6 +27,9 @@ class JournalAnalyzerApp:
     Основной класс графического интерфейса
     """
     
+    # Как часто проверять, не обновил ли файл базы другой процесс (мс)
+    DATA_POLL_MS = 5000
+    
     def __init__(self, root):
         """
         Инициализация интерфейса
@@ -28,8 +38,9 @@ class JournalAnalyzerApp:
             root: Корневой виджет tkinter
         """
         self.root = root
-        self.db = JournalDatabase()
+        self.db = JournalDatabase(use_columnar=True)
         self.parser = ParserWrapper()
+        self.snapshots = SnapshotStore()
         
         # Настройка стилей
         self._setup_styles()
@@ -52,14 +63,31 @@ class JournalAnalyzerApp:
         
         self.rsci_var = tk.StringVar(value="all")
         
+        # Строка поиска по названию и шифрам специальностей
+        self.search_var = tk.StringVar(value="")
+        self.search_after_id = None
+        
+        # Выражение фильтра (см. filter_expr)
+        self.expression_var = tk.StringVar(value="")
+        
         # Текущие отфильтрованные журналы
         self.filtered_journals = []
         
+        # Задачи, выполняемые в фоновом цикле парсера
+        self.update_future = None
+        self.recheck_future = None
+        
         # Создание интерфейса
         self._create_ui()
         
         # Заполнение списка журналов
         self.update_journal_list()
+        self.update_changes()
+        self.reload_results()
+        
+        # Отслеживание обновлений файла базы другими процессами
+        self.hot_reload_running = False
+        self.root.after(self.DATA_POLL_MS, self._poll_data_file)
     
     def _setup_styles(self):
         """
@@ -158,9 +186,20 @@ class JournalAnalyzerApp:
             background=secondary_color
         )
 
-    def _on_filter_changed(self, event):
+    def _on_filter_changed(self, event=None):
         """Обработчик изменения фильтров"""
-        self.update_journal_list()
+        self.update_results()
+    
+    def _on_search_changed(self, *args):
+        """Обработчик ввода в строку поиска (с небольшой задержкой)"""
+        if self.search_after_id is not None:
+            self.root.after_cancel(self.search_after_id)
+        self.search_after_id = self.root.after(150, self._run_search)
+    
+    def _run_search(self):
+        """Выполнение поиска после паузы во вводе"""
+        self.search_after_id = None
+        self.update_results()
     
     def _create_ui(self):
         """
@@ -217,56 +256,65 @@ class JournalAnalyzerApp:
         ttk.Checkbutton(
             vak_frame, 
             text="Категория 1", 
-            variable=self.vak_categories["1"]
+            variable=self.vak_categories["1"],
+            command=self._on_filter_changed
         ).pack(anchor=tk.W, pady=1)
         
         ttk.Checkbutton(
             vak_frame, 
             text="Категория 2", 
-            variable=self.vak_categories["2"]
+            variable=self.vak_categories["2"],
+            command=self._on_filter_changed
         ).pack(anchor=tk.W, pady=1)
         
         ttk.Checkbutton(
             vak_frame, 
             text="Категория 3", 
-            variable=self.vak_categories["3"]
+            variable=self.vak_categories["3"],
+            command=self._on_filter_changed
         ).pack(anchor=tk.W, pady=1)
         
         ttk.Checkbutton(
             vak_frame, 
             text="Без категории", 
-            variable=self.vak_categories["none"]
+            variable=self.vak_categories["none"],
+            command=self._on_filter_changed
         ).pack(anchor=tk.W, pady=1)
         
         # Добавляем чекбоксы для белого списка
         ttk.Checkbutton(
             white_frame, 
             text="Уровень 1", 
-            variable=self.white_levels["1"]
+            variable=self.white_levels["1"],
+            command=self._on_filter_changed
         ).pack(anchor=tk.W, pady=1)
         
         ttk.Checkbutton(
             white_frame, 
             text="Уровень 2", 
-            variable=self.white_levels["2"]
+            variable=self.white_levels["2"],
+            command=self._on_filter_changed
         ).pack(anchor=tk.W, pady=1)
         
         ttk.Checkbutton(
             white_frame, 
             text="Уровень 3", 
-            variable=self.white_levels["3"]
+            variable=self.white_levels["3"],
+            command=self._on_filter_changed
         ).pack(anchor=tk.W, pady=1)
         
         ttk.Checkbutton(
             white_frame, 
             text="Уровень 4", 
-            variable=self.white_levels["4"]
+            variable=self.white_levels["4"],
+            command=self._on_filter_changed
         ).pack(anchor=tk.W, pady=1)
         
         ttk.Checkbutton(
             white_frame, 
             text="Не входит", 
-            variable=self.white_levels["none"]
+            variable=self.white_levels["none"],
+            command=self._on_filter_changed
         ).pack(anchor=tk.W, pady=1)
         
         # Добавляем радиокнопки для RSCI
@@ -274,23 +322,79 @@ class JournalAnalyzerApp:
             rsci_frame, 
             text="Все", 
             variable=self.rsci_var, 
-            value="all"
+            value="all",
+            command=self._on_filter_changed
         ).pack(anchor=tk.W, pady=1)
         
         ttk.Radiobutton(
             rsci_frame, 
             text="Да", 
             variable=self.rsci_var, 
-            value="yes"
+            value="yes",
+            command=self._on_filter_changed
         ).pack(anchor=tk.W, pady=1)
         
         ttk.Radiobutton(
             rsci_frame, 
             text="Нет", 
             variable=self.rsci_var, 
-            value="no"
+            value="no",
+            command=self._on_filter_changed
         ).pack(anchor=tk.W, pady=1)
         
+        # Таблица с результатами фильтрации
+        results_frame = ttk.LabelFrame(
+            main_frame, 
+            text="Журналы (двойной щелчок - открыть страницу журнала)", 
+            padding=5
+        )
+        results_frame.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
+        
+        search_frame = ttk.Frame(results_frame)
+        search_frame.pack(fill=tk.X, pady=(0, 5))
+        
+        ttk.Label(
+            search_frame, 
+            text="Поиск (название или шифр специальности):"
+        ).pack(side=tk.LEFT, padx=(0, 5))
+        
+        ttk.Entry(
+            search_frame, 
+            textvariable=self.search_var
+        ).pack(side=tk.LEFT, fill=tk.X, expand=True)
+        
+        self.search_var.trace_add("write", self._on_search_changed)
+        
+        expression_frame = ttk.Frame(results_frame)
+        expression_frame.pack(fill=tk.X, pady=(0, 5))
+        
+        ttk.Label(
+            expression_frame, 
+            text="Выражение (например, title ~ \"эконом\" and has rcsi_url):"
+        ).pack(side=tk.LEFT, padx=(0, 5))
+        
+        ttk.Entry(
+            expression_frame, 
+            textvariable=self.expression_var
+        ).pack(side=tk.LEFT, fill=tk.X, expand=True)
+        
+        self.expression_var.trace_add("write", self._on_search_changed)
+        
+        self.results_grid = VirtualJournalGrid(results_frame)
+        self.results_grid.pack(fill=tk.BOTH, expand=True)
+        
+        # Запоминаем виджеты фильтров для отображения счетчиков
+        self.facet_widgets = {}
+        for group, options, frame in (
+            ("vak", self.vak_categories, vak_frame),
+            ("white", self.white_levels, white_frame),
+            ("rsci", ("all", "yes", "no"), rsci_frame),
+        ):
+            for value, widget in zip(options, frame.winfo_children()):
+                self.facet_widgets[(group, value)] = (
+                    widget, widget.cget("text")
+                )
+        
         # Фрейм для статистики и кнопок
         bottom_frame = ttk.Frame(main_frame)
         bottom_frame.pack(fill=tk.X, padx=5, pady=5)
@@ -299,6 +403,7 @@ class JournalAnalyzerApp:
         self.total_journals_var = tk.StringVar(value="Всего: 0")
         self.white_list_journals_var = tk.StringVar(value="В БС: 0")
         self.rsci_journals_var = tk.StringVar(value="В RSCI: 0")
+        self.changes_var = tk.StringVar(value="")
         
         # Статистика и кнопки в одной строке
         stats_frame = ttk.LabelFrame(
@@ -326,6 +431,12 @@ class JournalAnalyzerApp:
             style="Stats.TLabel"
         ).pack(side=tk.LEFT, padx=5)
         
+        ttk.Label(
+            stats_frame, 
+            textvariable=self.changes_var,
+            style="Stats.TLabel"
+        ).pack(side=tk.LEFT, padx=5)
+        
         # Кнопки
         button_frame = ttk.Frame(bottom_frame)
         button_frame.pack(side=tk.RIGHT, padx=5)
@@ -337,6 +448,13 @@ class JournalAnalyzerApp:
             width=17
         ).pack(side=tk.LEFT, padx=2, pady=5)
         
+        ttk.Button(
+            button_frame, 
+            text="Перепроверить", 
+            command=self.recheck_selected,
+            width=15
+        ).pack(side=tk.LEFT, padx=2, pady=5)
+        
         ttk.Button(
             button_frame, 
             text="Экспорт в Excel", 
@@ -345,6 +463,20 @@ class JournalAnalyzerApp:
             style="Accent.TButton"
         ).pack(side=tk.LEFT, padx=2, pady=5)
         
+        ttk.Button(
+            button_frame, 
+            text="Сохранить шаблон", 
+            command=self.save_current_preset,
+            width=17
+        ).pack(side=tk.LEFT, padx=2, pady=5)
+        
+        ttk.Button(
+            button_frame, 
+            text="Пакетный экспорт", 
+            command=self.export_presets,
+            width=17
+        ).pack(side=tk.LEFT, padx=2, pady=5)
+        
         # Статусбар
         self.status_var = tk.StringVar(value="Готов к работе")
         status_bar = ttk.Label(
@@ -378,6 +510,98 @@ class JournalAnalyzerApp:
         # Обновляем статус
         self.status_var.set(f"База содержит {total} журналов")
     
+    def reload_results(self):
+        """
+        Передача таблице результатов новых данных базы
+        """
+        self.results_grid.set_source(self.db.get_journals(), self.db.sort_orders)
+        self.update_results()
+    
+    def update_results(self):
+        """
+        Обновление таблицы результатов по текущим фильтрам
+        """
+        filters = self._get_selected_filters()
+        # Один профиль на изменение фильтров: фильтрация и все счетчики
+        with profile_block("update_results"):
+            try:
+                self.filtered_journals = self.db.filter_journals(
+                    vak_categories=filters["vak_categories"],
+                    white_levels=filters["white_levels"],
+                    in_rsci=filters["rsci"],
+                    query=filters["query"],
+                    expression=filters["expression"]
+                )
+            except FilterSyntaxError as e:
+                # Выражение еще вводится - оставляем прежние результаты
+                self.status_var.set(f"Ошибка в выражении: {e}")
+                return
+            self.results_grid.set_rows(self.filtered_journals)
+            self.update_facets(filters)
+        
+        total = len(self.db.get_journals())
+        self.status_var.set(
+            f"Показано {len(self.filtered_journals)} из {total} журналов"
+        )
+    
+    def update_facets(self, filters):
+        """
+        Обновление счетчиков у фильтров: для каждого варианта показывается
+        число журналов, которое будет найдено, если его переключить
+        
+        Args:
+            filters: Текущие фильтры (результат _get_selected_filters)
+        """
+        def toggled(selected, value):
+            if value in selected:
+                return [item for item in selected if item != value]
+            return selected + [value]
+        
+        rsci_options = {"all": None, "yes": True, "no": False}
+        
+        for (group, value), (widget, text) in self.facet_widgets.items():
+            if group == "vak":
+                count = self.db.count_journals(
+                    toggled(filters["vak_categories"], value),
+                    filters["white_levels"],
+                    filters["rsci"],
+                    filters["query"],
+                    expression=filters["expression"]
+                )
+            elif group == "white":
+                count = self.db.count_journals(
+                    filters["vak_categories"],
+                    toggled(filters["white_levels"], value),
+                    filters["rsci"],
+                    filters["query"],
+                    expression=filters["expression"]
+                )
+            else:
+                count = self.db.count_journals(
+                    filters["vak_categories"],
+                    filters["white_levels"],
+                    rsci_options[value],
+                    filters["query"],
+                    expression=filters["expression"]
+                )
+            widget.configure(text=f"{text} ({count})")
+    
+    def update_changes(self):
+        """
+        Обновление сводки изменений с прошлого обновления.
+        Сравнение выполняется по хешам записей, старые версии
+        целиком не загружаются.
+        """
+        changes = self.snapshots.changes_since_previous(self.db.get_journals())
+        if not changes:
+            self.changes_var.set("")
+            return
+        
+        self.changes_var.set(
+            f"Изменения: +{len(changes['added'])} "
+            f"-{len(changes['removed'])} ~{len(changes['changed'])}"
+        )
+    
     def _get_selected_filters(self):
         """
         Получение выбранных фильтров
@@ -408,7 +632,9 @@ class JournalAnalyzerApp:
         return {
             "vak_categories": vak_selected,
             "white_levels": white_selected,
-            "rsci": rsci_filter
+            "rsci": rsci_filter,
+            "query": self.search_var.get().strip(),
+            "expression": self.expression_var.get().strip()
         }
     
     def filter_and_export(self):
@@ -430,7 +656,9 @@ class JournalAnalyzerApp:
         if not any([
             filters["vak_categories"], 
             filters["white_levels"], 
-            filters["rsci"] is not None
+            filters["rsci"] is not None,
+            filters["query"],
+            filters["expression"]
         ]):
             messagebox.showwarning(
                 "Нет фильтров", 
@@ -438,29 +666,29 @@ class JournalAnalyzerApp:
             )
             return
         
-        # Фильтруем журналы
-        filtered_journals = self.db.filter_journals(
-            vak_categories=filters["vak_categories"],
-            white_levels=filters["white_levels"],
-            in_rsci=filters["rsci"]
-        )
+        # Путь к файлу Excel
+        excel_path = os.path.join(os.getcwd(), "vak_journals_filtered.xlsx")
+        
+        # Фильтруем и экспортируем (повторная выгрузка берется из кэша)
+        try:
+            with profile_block("filter_and_export"):
+                count = self.db.export_filtered(filters, excel_path)
+        except FilterSyntaxError as e:
+            messagebox.showerror("Ошибка в выражении", str(e))
+            return
         
         # Проверяем, что есть результаты фильтрации
-        if not filtered_journals:
+        if count == 0:
             messagebox.showinfo(
                 "Результаты фильтрации", 
                 "По заданным критериям журналы не найдены."
             )
             return
         
-        # Путь к файлу Excel
-        excel_path = os.path.join(os.getcwd(), "vak_journals_filtered.xlsx")
-        
-        # Экспортируем в Excel
-        if self.db.export_to_excel(filtered_journals, excel_path):
+        if count is not None:
             # Показываем сообщение об успешном экспорте
             msg = (
-                f"Отфильтровано {len(filtered_journals)} журналов.\n"
+                f"Отфильтровано {count} журналов.\n"
             )
             messagebox.showinfo("Экспорт завершен", msg)
             
@@ -474,13 +702,107 @@ class JournalAnalyzerApp:
                 "Не удалось экспортировать данные."
             )
     
+    def save_current_preset(self):
+        """
+        Сохранение текущих фильтров как именованного шаблона
+        """
+        name = simpledialog.askstring(
+            "Сохранить шаблон", 
+            "Название шаблона:", 
+            parent=self.root
+        )
+        if not name or not name.strip():
+            return
+        
+        if add_preset(name.strip(), self._get_selected_filters()):
+            self.status_var.set(f"Шаблон \"{name.strip()}\" сохранен")
+        else:
+            messagebox.showerror(
+                "Ошибка", 
+                "Не удалось сохранить шаблон."
+            )
+    
+    def export_presets(self):
+        """
+        Экспорт по всем сохраненным шаблонам на отдельные листы одной книги
+        """
+        if not self.db.journals:
+            messagebox.showwarning(
+                "Нет данных", 
+                "База журналов пуста. Необходимо обновить базу."
+            )
+            return
+        
+        excel_path = os.path.join(os.getcwd(), "vak_journals_presets.xlsx")
+        counts = batch_export(self.db, load_presets(), output_file=excel_path)
+        
+        if counts is None:
+            messagebox.showerror(
+                "Ошибка экспорта", 
+                "Не удалось экспортировать данные."
+            )
+            return
+        
+        msg = "\n".join(
+            f"{name}: {count} журналов" for name, count in counts.items()
+        )
+        messagebox.showinfo("Пакетный экспорт завершен", msg)
+        
+        # Открываем файл
+        if os.name == 'nt':
+            os.startfile(excel_path)
+    
+    def _poll_data_file(self):
+        """
+        Периодическая проверка времени изменения файла базы
+        """
+        try:
+            is_busy = (
+                self.hot_reload_running
+                or (self.update_future is not None and not self.update_future.done())
+            )
+            if not is_busy and self.db.file_changed():
+                # Файл читается в фоновом потоке, изменения применяются
+                # в основном
+                self.hot_reload_running = True
+                threading.Thread(
+                    target=self._read_data_file, daemon=True
+                ).start()
+        finally:
+            self.root.after(self.DATA_POLL_MS, self._poll_data_file)
+    
+    def _read_data_file(self):
+        snapshot, stamp = self.db.read_file()
+        self.root.after(0, self._apply_data_file, snapshot, stamp)
+    
+    def _apply_data_file(self, snapshot, stamp):
+        """
+        Применение изменений, сделанных другим процессом
+        """
+        self.hot_reload_running = False
+        if snapshot is None:
+            return
+        
+        diff = self.db.apply_changes(snapshot.journals, stamp, snapshot)
+        changed = sum(len(keys) for keys in diff.values())
+        if not changed:
+            return
+        
+        self.update_journal_list()
+        self.update_changes()
+        self.reload_results()
+        self.status_var.set(
+            f"База обновлена: добавлено {len(diff['added'])}, "
+            f"изменено {len(diff['changed'])}, удалено {len(diff['removed'])}"
+        )
+    
     def start_update_data(self):
         """
-        Запускает обновление данных в отдельном потоке
+        Запускает обновление данных в фоновом цикле парсера
         """
         # Проверяем, не запущено ли уже обновление
-        is_running = (hasattr(self, "update_thread") and 
-                      self.update_thread.is_alive())
+        is_running = (self.update_future is not None and 
+                      not self.update_future.done())
         
         if is_running:
             messagebox.showinfo(
@@ -499,27 +821,115 @@ class JournalAnalyzerApp:
         # Обновляем статус
         self.status_var.set("Обновление данных...")
         
-        # Запускаем обновление в отдельном потоке
-        self.update_thread = threading.Thread(
-            target=self._update_data_thread,
-            daemon=True
-        )
-        self.update_thread.start()
+        # Передаем обновление в фоновый цикл; результат обрабатывается
+        # в основном потоке
+        self.update_future = self.parser.refresh()
+        self.update_future.add_done_callback(self._update_done)
     
-    def _update_data_thread(self):
+    def _update_done(self, future):
         """
-        Выполняет обновление данных в отдельном потоке
+        Вызывается из потока парсера по завершении обновления
+        
+        Args:
+            future: Завершенная задача обновления
         """
         try:
-            # Обновляем данные
-            result = self.parser.run_parser()
-            
+            result = future.result()
             # Обновляем интерфейс в основном потоке
             self.root.after(0, self._update_completed, result)
         except Exception as e:
             # Обрабатываем ошибки в основном потоке
             self.root.after(0, self._update_failed, str(e))
     
+    def recheck_selected(self):
+        """
+        Повторная проверка статуса выделенного журнала в РЦНИ и RSCI
+        """
+        journal = self.results_grid.selected_journal()
+        if journal is None:
+            messagebox.showinfo(
+                "Перепроверка", 
+                "Выделите журнал в таблице"
+            )
+            return
+        
+        is_running = (self.recheck_future is not None and 
+                      not self.recheck_future.done())
+        if is_running:
+            messagebox.showinfo(
+                "Перепроверка", 
+                "Проверка журнала уже выполняется"
+            )
+            return
+        
+        self.status_var.set(
+            f"Проверка журнала {journal.get('name_of_publication', '')}..."
+        )
+        # Запись ищется по ключу после проверки: за это время ее могла
+        # заменить подгрузка изменений из файла
+        key = journal_key(journal)
+        name = journal.get("name_of_publication", "")
+        self.recheck_future = self.parser.recheck_journal(journal)
+        self.recheck_future.add_done_callback(
+            lambda future: self._recheck_done(key, name, future)
+        )
+    
+    def _recheck_done(self, key, name, future):
+        """
+        Вызывается из потока парсера по завершении проверки журнала
+        """
+        try:
+            status = future.result()
+            self.root.after(0, self._recheck_completed, key, name, status)
+        except Exception as e:
+            self.root.after(0, self._update_failed, str(e))
+    
+    def _recheck_completed(self, key, name, status):
+        """
+        Сохранение результата проверки одного журнала
+        
+        Args:
+            key (str): Ключ проверенного журнала (normalize.journal_key)
+            name (str): Название журнала для сообщений
+            status (dict): Результат check_rcsi_status или None
+        """
+        if status is None:
+            self.status_var.set(f"Не удалось проверить журнал {name}")
+            return
+        
+        journal = self.db.get_journal_by_key(key)
+        if journal is None:
+            self.status_var.set(
+                f"Журнал {name} удален из базы во время проверки"
+            )
+            return
+        
+        # Время проверки записывается и для ненайденного журнала, как
+        # при обновлении базы (прежний статус при этом сохраняется)
+        changes = {
+            "checked_at": datetime.datetime.now().isoformat(timespec="seconds")
+        }
+        found = (status.get("white_level") != "none"
+                 or status.get("rcsi_url", "none") != "none")
+        if found:
+            changes.update(status)
+        
+        # Обновляется только эта запись и ее место в индексах базы
+        if not self.db.update_journal(journal, changes):
+            self.status_var.set("Ошибка при сохранении данных")
+            return
+        
+        if not found:
+            self.status_var.set(f"Журнал {name} не найден в РЦНИ")
+            return
+        
+        self.update_journal_list()
+        self.reload_results()
+        self.status_var.set(
+            f"Журнал {name}: уровень {status.get('white_level')}, "
+            f"RSCI: {'да' if status.get('RSCI') else 'нет'}"
+        )
+    
     def _update_completed(self, result):
         """
         Обработка завершения обновления данных
@@ -540,6 +950,8 @@ class JournalAnalyzerApp:
         
         # Обновляем статистику в интерфейсе
         self.update_journal_list()
+        self.update_changes()
+        self.reload_results()
         
         # Обновляем статус
         journals_count = result.get('journals_processed', 0)
@@ -0,0 +1,214 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Совместный доступ к файлу базы журналов из нескольких процессов.
+
+Базу одновременно используют GUI, парсер, демон обновления и
+координатор очереди. Чтобы они не мешали друг другу:
+
+- Читатели не берут блокировок. Файл всегда заменяется целиком
+  (snapshots.write_bytes_atomic), поэтому чтение видит одну полную
+  версию. Прочитанная версия (StoreSnapshot) закрепляется за читателем:
+  это неизменный идентификатор содержимого и хеши записей на момент
+  чтения.
+- Писатель в каждый момент один: запись выполняется под исключительной
+  блокировкой файла <база>.lock.
+- Писатель не перезаписывает чужие изменения. Под блокировкой заново
+  читается последняя версия, и в нее переносятся только записи, которые
+  писатель изменил, добавил или удалил относительно своей закрепленной
+  версии. Если ту же запись после этого изменил другой процесс,
+  сохраняется запись писателя (выигрывает последняя запись), а
+  конфликт выводится в консоль.
+
+Пример:
+    store = JournalStore(path)
+    snapshot = store.read()
+    journals = snapshot.journals
+    ... изменение журналов ...
+    snapshot = store.commit(snapshot, journals)
+"""
+
+import hashlib
+import json
+from contextlib import contextmanager
+
+from snapshots import LOCK_TIMEOUT, file_lock, index_records, write_bytes_atomic
+
+
+def content_hash(journal):
+    """
+    Хеш всей записи журнала, включая время проверки (в отличие от
+    snapshots.record_hash: для слияния важно любое изменение)
+    """
+    data = json.dumps(journal, ensure_ascii=False, sort_keys=True)
+    return hashlib.sha1(data.encode('utf-8')).hexdigest()[:16]
+
+
+class StoreSnapshot:
+    """
+    Закрепленная версия базы.
+    """
+
+    def __init__(self, version, journals, hashes=None):
+        """
+        Args:
+            version (str | None): Хеш содержимого файла; None - файла нет
+            journals (list): Журналы этой версии
+            hashes (dict, optional): Хеши записей {ключ: хеш} на момент
+                                     чтения; по умолчанию вычисляются
+        """
+        self.version = version
+        self.journals = journals
+        if hashes is None:
+            hashes = {
+                key: content_hash(record)
+                for key, record in index_records(journals).items()
+            }
+        self.hashes = hashes
+
+
+class JournalStore:
+    """
+    Файл базы журналов с одним писателем и неблокируемыми читателями.
+    """
+
+    def __init__(self, filename, indent=2, lock_timeout=LOCK_TIMEOUT):
+        """
+        Args:
+            filename (str): Полный путь к файлу базы
+            indent (int, optional): Отступ JSON
+            lock_timeout (float): Сколько секунд ждать блокировки
+        """
+        self.filename = filename
+        self.lock_filename = filename + ".lock"
+        self.indent = indent
+        self.lock_timeout = lock_timeout
+
+    def read(self):
+        """
+        Чтение текущей версии без блокировки
+
+        Returns:
+            StoreSnapshot: Версия базы (пустая, если файла нет)
+        """
+        try:
+            with open(self.filename, 'rb') as file:
+                data = file.read()
+        except FileNotFoundError:
+            return StoreSnapshot(None, [])
+        journals = json.loads(data.decode('utf-8'))
+        return StoreSnapshot(hashlib.sha1(data).hexdigest()[:16], journals)
+
+    def current_version(self):
+        """
+        Идентификатор текущей версии файла (без разбора JSON)
+
+        Returns:
+            str: Хеш содержимого или None, если файла нет
+        """
+        try:
+            with open(self.filename, 'rb') as file:
+                return hashlib.sha1(file.read()).hexdigest()[:16]
+        except FileNotFoundError:
+            return None
+
+    @contextmanager
+    def lock(self):
+        """
+        Исключительная блокировка писателя
+
+        Raises:
+            TimeoutError: если блокировку не удалось получить
+                          за lock_timeout секунд
+        """
+        with file_lock(
+            self.lock_filename, self.lock_timeout,
+            f"Файл базы занят другим процессом: {self.filename}"
+        ):
+            yield
+
+    def commit(self, base, journals, changed=None):
+        """
+        Сохранение изменений относительно закрепленной версии
+
+        Args:
+            base (StoreSnapshot | None): Версия, от которой получены
+                                         journals; None - перезаписать
+                                         файл целиком
+            journals (list): Журналы после изменения
+            changed (list, optional): Записи, измененные после чтения base;
+                                      хеши остальных записей берутся из
+                                      base без повторного вычисления
+
+        Returns:
+            StoreSnapshot: Сохраненная версия (с изменениями других
+                           писателей, если они были)
+        """
+        new_records = index_records(journals)
+        changed_ids = None
+        if changed is not None and base is not None:
+            changed_ids = {id(record) for record in changed}
+        new_hashes = {}
+        for key, record in new_records.items():
+            if (changed_ids is not None and id(record) not in changed_ids
+                    and key in base.hashes):
+                new_hashes[key] = base.hashes[key]
+            else:
+                new_hashes[key] = content_hash(record)
+
+        with self.lock():
+            latest = None
+            if base is not None:
+                # Файл не менялся с момента чтения - перечитывать его
+                # целиком не нужно
+                if self.current_version() == base.version:
+                    latest = base
+                else:
+                    latest = self.read()
+            if latest is None or latest.version == base.version:
+                merged, merged_hashes = journals, new_hashes
+            else:
+                merged, merged_hashes = self._merge(
+                    base, latest, new_records, new_hashes
+                )
+
+            data = json.dumps(
+                merged, ensure_ascii=False, indent=self.indent
+            ).encode('utf-8')
+            write_bytes_atomic(self.filename, data)
+
+        return StoreSnapshot(
+            hashlib.sha1(data).hexdigest()[:16], merged, merged_hashes
+        )
+
+    @staticmethod
+    def _merge(base, latest, new_records, new_hashes):
+        """
+        Перенос изменений писателя в последнюю версию
+
+        Returns:
+            tuple: (журналы, хеши записей)
+        """
+        records = index_records(latest.journals)
+        hashes = dict(latest.hashes)
+        conflicts = 0
+
+        for key, value in new_hashes.items():
+            if base.hashes.get(key) == value:
+                continue
+            # Запись изменена писателем; конфликт, если ее успел
+            # изменить и кто-то другой
+            if key in records and hashes.get(key) not in (base.hashes.get(key), value):
+                conflicts += 1
+            records[key] = new_records[key]
+            hashes[key] = value
+
+        for key in base.hashes:
+            if key not in new_hashes and key in records:
+                del records[key]
+                del hashes[key]
+
+        if conflicts:
+            print(f"Записей, одновременно измененных другим процессом: {conflicts}")
+        return list(records.values()), hashes
@@ -15,15 +15,17 @@ def main():
     """
     root = tk.Tk()
     root.title("Фильтр журналов 2.3.4")
-    root.geometry("800x400")
-    root.minsize(700, 350)
+    root.geometry("1000x650")
+    root.minsize(700, 500)
     
     # Создаем приложение
     app = JournalAnalyzerApp(root)
-    _ = app  # Подавляем предупреждение линтера о неиспользуемой переменной
     
     # Запускаем главный цикл
     root.mainloop()
+    
+    # Закрываем сессию и фоновый цикл парсера
+    app.parser.shutdown()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,92 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Функции нормализации ISSN и названий журналов.
+Используются парсером, базой данных и индексами.
+"""
+
+import re
+
+
+def clean_issn(issn):
+    """
+    Приводит ISSN к виду XXXX-XXXX
+    
+    Args:
+        issn (str): ISSN в произвольном виде
+        
+    Returns:
+        str: Очищенный ISSN или пустая строка
+    """
+    if not issn:
+        return ""
+    # Удаляем все символы, кроме цифр, X и x
+    cleaned = ''.join(
+        c for c in issn if c.isdigit() or c.upper() == 'X'
+    ).upper()
+    # Если длина больше 8, возможно склеены два ISSN - берем первый
+    if len(cleaned) > 8:
+        cleaned = cleaned[:8]
+    # Форматируем ISSN с дефисом 
+    if len(cleaned) == 8:
+        cleaned = f"{cleaned[:4]}-{cleaned[4:]}"
+    return cleaned
+
+
+def split_issns(issn):
+    """
+    Разбирает все ISSN из ячейки: печатный и электронный ISSN на сайте
+    часто склеены ("1234-56782345-678X") или разделены запятой
+    
+    Args:
+        issn (str): Текст ячейки ISSN
+        
+    Returns:
+        list: ISSN в виде XXXX-XXXX без повторов, в исходном порядке
+    """
+    if not issn:
+        return []
+    cleaned = ''.join(
+        c for c in issn if c.isdigit() or c.upper() == 'X'
+    ).upper()
+    issns = []
+    for start in range(0, len(cleaned) - 7, 8):
+        value = f"{cleaned[start:start + 4]}-{cleaned[start + 4:start + 8]}"
+        if value not in issns:
+            issns.append(value)
+    return issns
+
+
+def normalize_title(title):
+    """
+    Нормализует название журнала для сравнения: нижний регистр,
+    "ё" заменяется на "е", знаки препинания и лишние пробелы удаляются
+    
+    Args:
+        title (str): Название журнала
+        
+    Returns:
+        str: Нормализованное название
+    """
+    if not title:
+        return ""
+    title = title.lower().replace('ё', 'е')
+    return " ".join(re.sub(r'[^\w]+', ' ', title).split())
+
+
+def journal_key(journal):
+    """
+    Устойчивый ключ журнала, не зависящий от порядкового номера на сайте:
+    ISSN, а при его отсутствии - нормализованное название
+    
+    Args:
+        journal (dict): Запись журнала
+        
+    Returns:
+        str: Ключ журнала
+    """
+    issn = clean_issn(journal.get("issn", ""))
+    if issn:
+        return issn
+    return "title:" + normalize_title(journal.get("name_of_publication", ""))
@@ -0,0 +1,208 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Архив загруженных страниц.
+
+Все страницы, загруженные парсером, дописываются в один файл в сжатом
+виде (zlib). Каждая запись содержит URL, время загрузки, тип страницы
+и идентификатор обновления (crawl). Архив позволяет заново извлечь данные
+из страниц без обращения к сети, если логика разбора изменилась.
+
+Формат записи: 8 байт (длина заголовка и длина тела, big-endian),
+заголовок в JSON (UTF-8), тело - HTML, сжатый zlib.
+"""
+
+import datetime
+import json
+import os
+import struct
+import zlib
+
+
+RECORD_PREFIX = struct.Struct('>II')
+
+
+class PageArchive:
+    """
+    Архив страниц с дозаписью в конец файла.
+    """
+
+    def __init__(self, filename, crawl=None, entries=None):
+        """
+        Инициализация архива
+
+        Args:
+            filename (str): Путь к файлу архива
+            crawl (str, optional): Идентификатор текущего обновления;
+                                   по умолчанию - время создания архива
+            entries (list, optional): Уже прочитанные записи индекса
+                                      (self.entries другого экземпляра);
+                                      если заданы, файл не сканируется
+        """
+        self.filename = filename
+        self.crawl = crawl or datetime.datetime.now().strftime("%Y%m%d-%H%M%S")
+        self.entries = []
+        self.by_url = {}
+        self._scanned_size = 0
+        if entries is None:
+            self._scan()
+        else:
+            for entry in entries:
+                self._add_entry(entry)
+
+    def _scan(self):
+        """
+        Чтение заголовков записей без распаковки страниц
+        """
+        if not os.path.exists(self.filename):
+            return
+        with open(self.filename, 'rb') as file:
+            file.seek(self._scanned_size)
+            while True:
+                prefix = file.read(RECORD_PREFIX.size)
+                if len(prefix) < RECORD_PREFIX.size:
+                    break
+                header_size, body_size = RECORD_PREFIX.unpack(prefix)
+                header_bytes = file.read(header_size)
+                if len(header_bytes) < header_size:
+                    break
+                body_offset = file.tell()
+                file.seek(body_size, os.SEEK_CUR)
+                if file.tell() > os.fstat(file.fileno()).st_size:
+                    # Недописанная запись в конце файла
+                    break
+                header = json.loads(header_bytes.decode('utf-8'))
+                header["offset"] = body_offset
+                header["size"] = body_size
+                self._add_entry(header)
+                self._scanned_size = body_offset + body_size
+
+    def _add_entry(self, entry):
+        self.entries.append(entry)
+        self.by_url.setdefault(entry["url"], []).append(entry)
+
+    def append(self, url, html, kind="rcsi"):
+        """
+        Добавление страницы в архив
+
+        Args:
+            url (str): Адрес страницы
+            html (str): Текст страницы
+            kind (str): Тип страницы ("vak_list", "rcsi", "elibrary"
+                        или "title_index" - снимок индекса названий)
+        """
+        header = {
+            "url": url,
+            "fetched_at": datetime.datetime.now().isoformat(timespec="seconds"),
+            "kind": kind,
+            "crawl": self.crawl
+        }
+        header_bytes = json.dumps(header, ensure_ascii=False).encode('utf-8')
+        body = zlib.compress(html.encode('utf-8'), 6)
+
+        directory = os.path.dirname(self.filename)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        # Запись целиком одним вызовом, чтобы параллельные процессы
+        # не перемешивали данные
+        with open(self.filename, 'ab') as file:
+            file.write(
+                RECORD_PREFIX.pack(len(header_bytes), len(body))
+                + header_bytes + body
+            )
+            body_offset = file.tell() - len(body)
+
+        header["offset"] = body_offset
+        header["size"] = len(body)
+        self._add_entry(header)
+
+    def read(self, entry):
+        """
+        Чтение страницы по записи индекса
+
+        Args:
+            entry (dict): Запись из self.entries
+
+        Returns:
+            str: HTML страницы
+        """
+        with open(self.filename, 'rb') as file:
+            file.seek(entry["offset"])
+            return zlib.decompress(file.read(entry["size"])).decode('utf-8')
+
+    def latest(self, url, before=None):
+        """
+        Последняя загрузка страницы
+
+        Args:
+            url (str): Адрес страницы
+            before (str, optional): Учитывать только загрузки не позже
+                                    этого времени (ISO 8601)
+
+        Returns:
+            dict: Запись индекса или None
+        """
+        for entry in reversed(self.by_url.get(url, [])):
+            if before is None or entry["fetched_at"] <= before:
+                return entry
+        return None
+
+    def crawls(self, kind=None):
+        """
+        Идентификаторы обновлений в порядке появления в архиве
+
+        Args:
+            kind (str, optional): Учитывать только страницы этого типа
+        """
+        crawls = []
+        for entry in self.entries:
+            if kind and entry.get("kind") != kind:
+                continue
+            if entry["crawl"] not in crawls:
+                crawls.append(entry["crawl"])
+        return crawls
+
+    def pages(self, kind, crawl):
+        """
+        Записи страниц заданного типа из одного обновления
+        (для повторно загруженных URL - последняя загрузка)
+        """
+        pages = {}
+        for entry in self.entries:
+            if entry.get("kind") == kind and entry["crawl"] == crawl:
+                pages[entry["url"]] = entry
+        return list(pages.values())
+
+
+class OfflineSession:
+    """
+    Замена сетевой сессии, отдающая страницы из архива.
+    """
+
+    def __init__(self, archive, before=None):
+        """
+        Args:
+            archive (PageArchive): Архив страниц
+            before (str, optional): Использовать загрузки не позже
+                                    этого времени (ISO 8601)
+        """
+        self.archive = archive
+        self.before = before
+
+    def get_text(self, url):
+        """
+        Текст страницы из архива
+
+        Raises:
+            KeyError: если страницы нет в архиве
+        """
+        entry = self.archive.latest(url, self.before)
+        if entry is None:
+            raise KeyError(f"Страница отсутствует в архиве: {url}")
+        return self.archive.read(entry)
+
+    async def close(self):
+        """Совместимость с aiohttp.ClientSession"""
+        return None
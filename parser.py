@@ -4,28 +4,137 @@ import re
 import os
 import asyncio
 import aiohttp
+import argparse
+import contextlib
+import copy
 import datetime
 import sys
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from urllib.parse import urlencode
 
-def get_total_pages(soup):
+from elibrary import enrich_journals
+from journal_store import JournalStore
+from normalize import clean_issn, normalize_title, split_issns
+from page_archive import OfflineSession, PageArchive
+import profiling
+from relevance import parse_interval
+from resolution_trace import ResolutionTrace, TraceLog, traced
+from snapshots import SnapshotStore, index_records
+from title_index import TitleIndex
+
+# Максимальное число записей на странице, которое запрашиваем у сайта.
+# Если сайт отдает меньше, фактический размер страницы определяется
+# по числу строк на первой странице.
+RECORDS_PER_PAGE = 500
+
+# Сколько страниц списка ВАК загружается одновременно
+PAGE_WINDOW = 4
+
+# Ограничение на число страниц, если их количество не удалось определить
+MAX_PAGES = 1000
+
+# Архив загруженных страниц (см. set_page_archive)
+_page_archive = None
+
+# Журнал трасс проверки журналов (см. set_trace_log)
+_trace_log = None
+
+# Счетчики разрешения статуса по строкам результатов поиска:
+# detail_avoided - статус взят из строки, детальная страница не загружалась
+# detail_fetched - понадобилась детальная страница
+# ambiguous - несколько кандидатов, ни один не совпал по ISSN или названию
+# issn_catalogue - журнал найден по ISSN в локальном каталоге
+# secondary_issn - журнал найден не по первому ISSN из ячейки
+# revalidated - статус обновлен по сохраненной ссылке без поиска
+# stale_url - сохраненная ссылка перестала работать, выполнен поиск
+resolver_stats = Counter()
+
+RCSI_DETAILS_SELECTOR = 'a[href*="/record-sources/details/"]'
+
+# Заголовки для имитации браузера при запросах к РЦНИ
+RCSI_HEADERS = {
+    'User-Agent': ('Mozilla/5.0 (Windows NT 10.0; Win64; x64) '
+                  'AppleWebKit/537.36 (KHTML, like Gecko) '
+                  'Chrome/91.0.4472.124 Safari/537.36'),
+    'Accept': ('text/html,application/xhtml+xml,application/xml;q=0.9,'
+              'image/webp,*/*;q=0.8'),
+    'Accept-Language': 'ru-RU,ru;q=0.8,en-US;q=0.5,en;q=0.3',
+    'Connection': 'keep-alive',
+    'Upgrade-Insecure-Requests': '1',
+    'Cache-Control': 'max-age=0'
+}
+
+# Коды ответа, при которых сохраненная ссылка считается недействительной
+DEAD_URL_STATUSES = (404, 410)
+PAGE_ARCHIVE_FILENAME = "pages_archive.bin"
+
+# Адрес, под которым в архив страниц записывается снимок индекса
+# названий на начало проверки журналов
+TITLE_INDEX_ARCHIVE_URL = "title-index://snapshot"
+
+def build_page_url(base_url, page, records_per_page=RECORDS_PER_PAGE):
+    """
+    Формирует URL страницы списка журналов ВАК
+    
+    Args:
+        base_url (str): Базовый URL сайта
+        page (int): Номер страницы (с 1)
+        records_per_page (int): Число записей на странице
+        
+    Returns:
+        str: URL страницы
+    """
+    return (
+        f"{base_url.split('?')[0]}?page={page}"
+        f"&records_per_page={records_per_page}"
+        f"&q=&issn=&scientific_specialties=2.3.4&category="
+    )
+
+def get_total_records(soup):
+    """
+    Общее количество записей из информации пагинатора ("... из N записей")
+    
+    Args:
+        soup (BeautifulSoup): Разобранная первая страница
+        
+    Returns:
+        int: Количество записей или None, если его нет на странице
+    """
+    pagination_info = soup.select_one('div.dataTables_info')
+    if pagination_info:
+        match = re.search(r'из (\d+) записей', pagination_info.text)
+        if match:
+            return int(match.group(1))
+    return None
+
+def get_total_pages(soup, records_on_page=None):
     """
     Определяет общее количество страниц по информации в пагинаторе
+    
+    Args:
+        soup (BeautifulSoup): Разобранная первая страница
+        records_on_page (int, optional): Число записей (журналов, а не
+                                         строк таблицы) на первой странице -
+                                         фактический размер страницы, если
+                                         сайт отдал меньше запрошенного
+        
+    Returns:
+        int: Количество страниц или None, если определить его не удалось
     """
     try:
-        # Ищем текст с информацией о количестве записей
-        pagination_info = soup.select_one('div.dataTables_info')
-        if pagination_info:
-            info_text = pagination_info.text.strip()
-            
-            # Ищем общее количество записей в тексте
-            match = re.search(r'из (\d+) записей', info_text)
-            if match:
-                total_records = int(match.group(1))
-                records_per_page = 50  # На странице показывается 50 записей
-                total_pages = (
-                    (total_records + records_per_page - 1) // records_per_page
-                )
-                return total_pages
+        total_records = get_total_records(soup)
+        if total_records is not None:
+            # Сайт может отдать меньше записей, чем запрошено, поэтому
+            # размер страницы берем по первой странице, а не по запросу
+            records_per_page = RECORDS_PER_PAGE
+            if records_on_page:
+                records_per_page = min(records_per_page, records_on_page)
+            
+            total_pages = (
+                (total_records + records_per_page - 1) // records_per_page
+            )
+            return max(total_pages, 1)
         
         # Если не нашли информацию о записях, пробуем найти ссылки пагинации
         pagination = soup.select_one('div.dataTables_paginate')
@@ -45,51 +154,420 @@ def get_total_pages(soup):
                     max_page = max(page_numbers)
                     return max_page
         
-        # Если ничего не нашли, возвращаем 2 страницы по умолчанию
-        return 2
+        # Количество страниц неизвестно - страницы загружаются до неполной
+        return None
     except Exception:
-        # Если произошла ошибка, возвращаем 2 страницы по умолчанию
-        return 2
+        return None
 
-async def check_rcsi_status(issn, journal_name="", session=None):
+class LookupCoalescer:
+    """
+    Объединяет повторные проверки одного и того же журнала в рамках
+    одного обновления. Ключами служат нормализованные ISSN, а для
+    записей без ISSN - нормализованное название (разные журналы с общим
+    названием, например серии "Вестника", различаются по ISSN):
+    одновременные запросы с совпадающим ключом ждут одну и ту же задачу,
+    а завершенные результаты переиспользуются до конца прогона.
+    """
+    
+    def __init__(self, lookup):
+        """
+        Args:
+            lookup: Корутинная функция (issn, journal_name) -> dict
+        """
+        self.lookup = lookup
+        self.tasks = {}
+        self.lookups_started = 0
+        self.lookups_saved = 0
+    
+    @staticmethod
+    def _keys(issn, journal_name):
+        keys = [("issn", value) for value in split_issns(issn)]
+        if not keys:
+            title = normalize_title(journal_name)
+            if title:
+                keys.append(("title", title))
+        return keys
+    
+    async def check(self, issn, journal_name=""):
+        """
+        Возвращает статус журнала, запуская проверку только для
+        еще не встречавшихся ключей
+        
+        Returns:
+            dict: Копия результата проверки (вложенные level_history и
+                  subject_areas не разделяются между журналами)
+        """
+        keys = self._keys(issn, journal_name)
+        task = None
+        for key in keys:
+            if key in self.tasks:
+                task = self.tasks[key]
+                break
+        
+        if task is None:
+            task = asyncio.ensure_future(self.lookup(issn, journal_name))
+            self.lookups_started += 1
+        else:
+            self.lookups_saved += 1
+        
+        # Регистрируем задачу под всеми ключами журнала
+        for key in keys:
+            self.tasks.setdefault(key, task)
+        
+        return copy.deepcopy(await task)
+
+def extract_journal_details(soup):
+    """
+    Извлекает все доступные сведения с детальной страницы журнала
+    journalrank за один проход по документу.
+    
+    Args:
+        soup (BeautifulSoup): Разобранная детальная страница
+        
+    Returns:
+        dict: словарь с ключами:
+              white_level - уровень белого списка ("1"-"4", "0" или "none")
+              level_history - уровни по годам {"2023": "2", ...}
+              RSCI - True/False, либо None если бейджей на странице нет
+              vak_badge - есть ли отметка "Перечень ВАК"
+              subject_areas - список тематических областей
+              issns - список ISSN, указанных на странице
+    """
+    details = {
+        "white_level": "none",
+        "level_history": {},
+        "RSCI": None,
+        "vak_badge": False,
+        "subject_areas": [],
+        "issns": []
+    }
+    
+    # Текст страницы извлекаем один раз и переиспользуем
+    page_text = soup.get_text(" ")
+    page_text_lower = page_text.lower()
+    
+    # Текущий уровень журнала
+    level_elem = (
+        soup.select_one('.level-circle-value') 
+        or soup.select_one('.level-value')
+    )
+    if level_elem:
+        level_parts = level_elem.get_text().strip().split()
+        if level_parts and level_parts[0].isdigit():
+            details["white_level"] = level_parts[0]
+    
+    # Бейджи: если блок с бейджами есть, считаем его исчерпывающим
+    badges = soup.select('span.badge')
+    badge_titles = [
+        (badge.get('title') or badge.get_text()).strip().lower()
+        for badge in badges
+    ]
+    if badges:
+        details["RSCI"] = any(
+            "rsci" in title or "ядро рниш" in title
+            for title in badge_titles
+        )
+        details["vak_badge"] = any(
+            "перечень вак" in title for title in badge_titles
+        )
+    elif "rsci" in page_text_lower or "ядро рниш" in page_text_lower:
+        details["RSCI"] = True
+    
+    if not details["vak_badge"] and "перечень вак" in page_text_lower:
+        details["vak_badge"] = True
+    
+    # Журнал из перечня ВАК без уровня отмечаем как "0"
+    if details["white_level"] == "none" and details["vak_badge"]:
+        details["white_level"] = "0"
+    
+    # История уровней: строки таблиц вида "2023 | 2"
+    for row in soup.select('tr'):
+        cells = [
+            cell.get_text().strip() for cell in row.find_all(['td', 'th'])
+        ]
+        if len(cells) < 2 or not re.fullmatch(r'(19|20)\d{2}', cells[0]):
+            continue
+        level_match = re.search(r'\b([1-4])\b', " ".join(cells[1:]))
+        if level_match:
+            details["level_history"][cells[0]] = level_match.group(1)
+    
+    # Тематические области: список после заголовка с "тематик"/"област"
+    for header in soup.find_all(['h2', 'h3', 'h4', 'h5', 'dt', 'strong']):
+        header_text = header.get_text().strip().lower()
+        if "тематик" not in header_text and "област" not in header_text:
+            continue
+        container = header.find_next_sibling(['ul', 'ol', 'dd', 'div', 'p'])
+        if not container:
+            continue
+        items = container.find_all('li') or [container]
+        for item in items:
+            area = item.get_text().strip()
+            if area and area not in details["subject_areas"]:
+                details["subject_areas"].append(area)
+        break
+    
+    # Все ISSN, упомянутые на странице
+    for issn_match in re.finditer(r'\b(\d{4})-(\d{3}[\dXx])\b', page_text):
+        issn_value = f"{issn_match.group(1)}-{issn_match.group(2).upper()}"
+        if issn_value not in details["issns"]:
+            details["issns"].append(issn_value)
+    
+    return details
+
+async def fetch_text(session, url, headers, timeout, kind="rcsi"):
+    """
+    Загружает страницу и возвращает ее текст. Загруженная страница
+    сохраняется в архив, если он включен (set_page_archive). При работе
+    с OfflineSession страница берется из архива без обращения к сети.
+    
+    Args:
+        session: aiohttp.ClientSession или OfflineSession
+        url (str): Адрес страницы
+        headers (dict): Заголовки запроса
+        timeout (int): Таймаут запроса в секундах
+        kind (str): Тип страницы для архива ("vak_list", "rcsi" или "elibrary")
+        
+    Returns:
+        str: HTML страницы
+    """
+    if isinstance(session, OfflineSession):
+        return session.get_text(url)
+    
+    async with session.get(url, headers=headers, timeout=timeout) as response:
+        response.raise_for_status()
+        html_content = await response.text()
+    
+    if _page_archive is not None:
+        _page_archive.append(url, html_content, kind)
+    return html_content
+
+@contextlib.asynccontextmanager
+async def session_scope(session=None):
+    """
+    Использует переданную сессию или создает новую на время блока
+    
+    Args:
+        session (aiohttp.ClientSession, optional): Уже открытая сессия,
+                                                  которая не закрывается
+    """
+    if session is not None:
+        yield session
+    else:
+        async with aiohttp.ClientSession() as new_session:
+            yield new_session
+
+def set_page_archive(archive):
+    """
+    Включает сохранение всех загружаемых страниц в архив
+    
+    Args:
+        archive (PageArchive): Архив страниц или None для отключения
+    """
+    global _page_archive
+    _page_archive = archive
+
+def set_trace_log(trace_log):
+    """
+    Включает запись трасс проверки журналов в РЦНИ
+    
+    Args:
+        trace_log (TraceLog): Журнал трасс или None, чтобы отключить запись
+    """
+    global _trace_log
+    _trace_log = trace_log
+
+def absolute_rcsi_url(href):
+    """
+    Формирует полный URL journalrank из относительной ссылки
+    """
+    if href.startswith('http'):
+        return href
+    return f"https://journalrank.rcsi.science{href}"
+
+def remember_links(title_index, candidates):
+    """
+    Добавляет найденные журналы в локальный индекс названий (название
+    из строки результата, а не текст каждой ссылки на журнал), а ISSN
+    из строк результатов поиска - в каталог ISSN индекса
+    """
+    if title_index is None:
+        return
+    for candidate in candidates:
+        title_index.add(candidate["title"], candidate["url"])
+        title_index.add_issns(candidate["issns"], candidate["url"])
+
+def _result_container(link):
+    """
+    Наибольший элемент вокруг ссылки, в котором нет ссылок на другие
+    журналы (строка таблицы или карточка результата поиска)
+    """
+    container = link
+    for parent in link.parents:
+        if parent.name in ('body', 'html', '[document]'):
+            break
+        hrefs = {a.get('href') for a in parent.select(RCSI_DETAILS_SELECTOR)}
+        if len(hrefs) > 1:
+            break
+        container = parent
+    return container
+
+def extract_search_candidates(soup):
+    """
+    Извлекает из страницы результатов поиска journalrank сведения
+    о каждом найденном журнале, доступные без детальной страницы.
+    
+    Args:
+        soup (BeautifulSoup): Страница результатов поиска
+        
+    Returns:
+        list: Список словарей с ключами url, title, issns, white_level
+              (None, если уровня в строке нет), RSCI (None, если в строке
+              нет бейджей) и vak_badge
+    """
+    candidates = []
+    seen_urls = set()
+    for link in soup.select(RCSI_DETAILS_SELECTOR):
+        url = absolute_rcsi_url(link['href'])
+        if url in seen_urls:
+            continue
+        seen_urls.add(url)
+        
+        row = _result_container(link)
+        row_text = row.get_text(" ")
+        
+        white_level = None
+        level_elem = (
+            row.select_one('.level-circle-value')
+            or row.select_one('.level-value')
+        )
+        if level_elem:
+            level_parts = level_elem.get_text().strip().split()
+            if level_parts and level_parts[0].isdigit():
+                white_level = level_parts[0]
+        
+        rsci = None
+        vak_badge = False
+        badge_titles = [
+            (badge.get('title') or badge.get_text()).strip().lower()
+            for badge in row.select('span.badge')
+        ]
+        if badge_titles:
+            rsci = any(
+                "rsci" in title or "ядро рниш" in title
+                for title in badge_titles
+            )
+            vak_badge = any("перечень вак" in title for title in badge_titles)
+            # Журнал из перечня ВАК без уровня отмечаем как "0"
+            if white_level is None and vak_badge:
+                white_level = "0"
+        
+        issns = []
+        for issn_match in re.finditer(r'\b(\d{4})-(\d{3}[\dXx])\b', row_text):
+            issn_value = f"{issn_match.group(1)}-{issn_match.group(2).upper()}"
+            if issn_value not in issns:
+                issns.append(issn_value)
+        
+        # У журнала может быть несколько ссылок (название, значок,
+        # "Подробнее"): названием считается первый непустой текст ссылки
+        title = next(
+            (text for text in (
+                a.get_text().strip() for a in row.select(RCSI_DETAILS_SELECTOR)
+            ) if text),
+            ""
+        )
+        
+        candidates.append({
+            "url": url,
+            "title": title,
+            "issns": issns,
+            "white_level": white_level,
+            "RSCI": rsci,
+            "vak_badge": vak_badge
+        })
+    return candidates
+
+def select_candidate(candidates, issn="", journal_name=""):
+    """
+    Выбирает журнал среди результатов поиска: единственный результат,
+    затем единственное совпадение по ISSN, затем по названию
+    
+    Args:
+        candidates (list): Результат extract_search_candidates
+        issn (str): ISSN журнала (может содержать несколько ISSN)
+        journal_name (str): Название журнала
+        
+    Returns:
+        tuple: (кандидат или None, True если выбор неоднозначен)
+    """
+    if not candidates:
+        return None, False
+    if len(candidates) == 1:
+        return candidates[0], False
+    
+    issns = split_issns(issn)
+    if issns:
+        by_issn = [
+            c for c in candidates
+            if any(value in c["issns"] for value in issns)
+        ]
+        if len(by_issn) == 1:
+            return by_issn[0], False
+    
+    normalized_name = normalize_title(journal_name)
+    if normalized_name:
+        by_title = [
+            c for c in candidates
+            if normalize_title(c["title"]) == normalized_name
+        ]
+        if len(by_title) == 1:
+            return by_title[0], False
+    
+    return candidates[0], True
+
+async def check_rcsi_status(
+    issn, journal_name="", session=None, title_index=None
+):
     """
     Асинхронно проверяет статус журнала в базе РЦНИ и RSCI по его ISSN или названию.
     
+    Если строка результата поиска уже содержит уровень и бейджи журнала,
+    статус берется из нее без загрузки детальной страницы.
+    
     Args:
         issn (str): ISSN журнала для проверки
         journal_name (str): Название журнала (используется если поиск по ISSN 
                            не дал результатов)
         session (aiohttp.ClientSession): Сессия для выполнения запросов
+        title_index (TitleIndex): Локальный индекс названий journalrank;
+                                 если название найдено в нем, поиск по
+                                 названию на сайте не выполняется
         
     Returns:
-        dict: словарь с ключами 'white_level' и 'RSCI' и их значениями
+        dict: словарь с ключами 'white_level', 'RSCI', 'rcsi_url', а при
+              найденной детальной странице также 'level_history',
+              'vak_badge', 'subject_areas' и 'rcsi_issns'; None при
+              ошибке загрузки (журнал стоит проверить позже)
     """
     should_close_session = False
     if not session:
         session = aiohttp.ClientSession()
         should_close_session = True
     
+    # Трасса запросов: какие запросы выполнены и какая ветка дала итог
+    trace = ResolutionTrace(issn, journal_name)
+    
     try:
         if not issn and not journal_name:
+            trace.finish("no_identifiers")
             return {
                 "white_level": "none", 
                 "RSCI": False, 
                 "rcsi_url": "none"
             }
         
-        # Очищаем ISSN от возможных лишних символов
-        cleaned_issn = ""
-        if issn:
-            # Удаляем все символы, кроме цифр, X и x
-            cleaned_issn = ''.join(
-                c for c in issn if c.isdigit() or c.upper() == 'X'
-            )
-            # Если длина больше 8, возможно склеены два ISSN - берем первый
-            if len(cleaned_issn) > 8:
-                cleaned_issn = cleaned_issn[:8]
-            # Форматируем ISSN с дефисом 
-            if len(cleaned_issn) == 8:
-                cleaned_issn = f"{cleaned_issn[:4]}-{cleaned_issn[4:]}"
+        # Все ISSN из ячейки (печатный и электронный могут быть склеены)
+        issns = split_issns(issn)
+        cleaned_issn = issns[0] if issns else ""
         
         # Статус по умолчанию
         status = {
@@ -99,172 +577,306 @@ async def check_rcsi_status(issn, journal_name="", session=None):
         }
         
         # Заголовки для имитации браузера
-        headers = {
-            'User-Agent': ('Mozilla/5.0 (Windows NT 10.0; Win64; x64) '
-                          'AppleWebKit/537.36 (KHTML, like Gecko) '
-                          'Chrome/91.0.4472.124 Safari/537.36'),
-            'Accept': ('text/html,application/xhtml+xml,application/xml;q=0.9,'
-                      'image/webp,*/*;q=0.8'),
-            'Accept-Language': 'ru-RU,ru;q=0.8,en-US;q=0.5,en;q=0.3',
-            'Connection': 'keep-alive',
-            'Upgrade-Insecure-Requests': '1',
-            'Cache-Control': 'max-age=0'
-        }
+        headers = RCSI_HEADERS
         
-        # Сначала пробуем поиск по ISSN, если он есть
-        found_by_issn = False
-        if cleaned_issn:
+        async def search_by_issn(value):
+            """Поиск по одному ISSN; None, если ничего не найдено"""
             # Проверяем наличие в белом списке по точному URL с очищенным ISSN
             white_list_url = (
                 f"https://journalrank.rcsi.science/ru/record-sources/"
-                f"?s={cleaned_issn}&adv=true"
+                f"?s={value}&adv=true"
             )
             
             # Добавляем таймаут 15 секунд для запроса
-            async with session.get(
-                white_list_url, headers=headers, timeout=15
-            ) as response:
-                response.raise_for_status()
-                html_content = await response.text()
-                
-                # Парсим страницу с результатами поиска
-                soup = BeautifulSoup(html_content, 'html.parser')
-                
-                # Проверяем наличие результатов
-                no_results_text = soup.find(
-                    string=re.compile('Ничего не найдено')
+            html_content = await traced(trace, "issn_search", fetch_text(
+                session, white_list_url, headers, 15
+            ))
+            
+            # Парсим страницу с результатами поиска
+            soup = BeautifulSoup(html_content, 'html.parser')
+            
+            # Проверяем наличие результатов
+            if soup.find(string=re.compile('Ничего не найдено')):
+                trace.mark_last("empty")
+                return None
+            return soup
+        
+        # Сначала ищем ISSN в локальном каталоге, затем на сайте:
+        # первый ISSN, а если он не найден - остальные одновременно
+        found_by_issn = False
+        catalogue_url = None
+        if issns and title_index is not None:
+            catalogue_url = title_index.match_issns(issns)
+        
+        if catalogue_url:
+            found_by_issn = True
+            outcome = "issn_catalogue"
+            resolver_stats["issn_catalogue"] += 1
+            links = [{'href': catalogue_url}]
+            candidates = []
+        elif issns:
+            found_soup = await search_by_issn(issns[0])
+            if found_soup is None and len(issns) > 1:
+                # Ошибка одного поиска не должна отменять остальные
+                # и поиск по названию
+                other_soups = await asyncio.gather(
+                    *(search_by_issn(value) for value in issns[1:]),
+                    return_exceptions=True
                 )
-                
-                if not no_results_text:
-                    found_by_issn = True
-                    links = soup.select('a[href*="/record-sources/details/"]')
-                    # Продолжаем обработку найденного журнала...
-                else:
-                    # Не найден в базе РЦНИ, пробуем альтернативные методы
-                    pass
-        
-        # Если по ISSN не нашли и есть название журнала, пробуем поиск по названию
-        if not found_by_issn and journal_name:
+                for value, other_soup in zip(issns[1:], other_soups):
+                    if isinstance(other_soup, BeautifulSoup):
+                        found_soup = other_soup
+                        cleaned_issn = value
+                        resolver_stats["secondary_issn"] += 1
+                        break
+                # Не найдено, но часть поисков не выполнилась: итог
+                # "не найден" был бы неверным, журнал проверяется позже
+                if found_soup is None and any(
+                    isinstance(other_soup, BaseException)
+                    for other_soup in other_soups
+                ):
+                    trace.finish("error")
+                    return None
+            
+            if found_soup is not None:
+                found_by_issn = True
+                outcome = "issn_search"
+                links = found_soup.select(RCSI_DETAILS_SELECTOR)
+                candidates = extract_search_candidates(found_soup)
+                remember_links(title_index, candidates)
+        
+        # Если по ISSN не нашли, ищем название сначала в локальном индексе
+        local_match = None
+        if not found_by_issn and journal_name and title_index is not None:
+            local_match = title_index.match(journal_name)
+        
+        if local_match:
+            outcome = "title_index"
+            links = [{'href': local_match[0]}]
+            candidates = []
+        # Если и в индексе нет, пробуем поиск по названию на сайте
+        elif not found_by_issn and journal_name:
             # Формируем URL для поиска по названию
-            search_term = journal_name.replace(' ', '+')
             search_url = (
-                f"https://journalrank.rcsi.science/ru/search/"
-                f"?s={search_term}&adv=false"
+                "https://journalrank.rcsi.science/ru/search/?"
+                + urlencode({"s": " ".join(journal_name.split()), "adv": "false"})
             )
             
-            async with session.get(
-                search_url, headers=headers, timeout=15
-            ) as search_response:
-                search_response.raise_for_status()
-                search_html = await search_response.text()
-                
-                search_soup = BeautifulSoup(search_html, 'html.parser')
-                journal_links = search_soup.select(
-                    'a[href*="/record-sources/details/"]'
-                )
-                
-                if journal_links:
-                    # Найдены результаты при поиске по названию журнала
-                    links = journal_links
-                else:
-                    # Журнал не найден ни по ISSN, ни по названию в базе РЦНИ
-                    return status
+            search_html = await traced(
+                trace, "name_search",
+                fetch_text(session, search_url, headers, 15)
+            )
+            
+            search_soup = BeautifulSoup(search_html, 'html.parser')
+            journal_links = search_soup.select(RCSI_DETAILS_SELECTOR)
+            
+            if journal_links:
+                # Найдены результаты при поиске по названию журнала
+                outcome = "name_search"
+                links = journal_links
+                candidates = extract_search_candidates(search_soup)
+                remember_links(title_index, candidates)
+            else:
+                # Журнал не найден ни по ISSN, ни по названию в базе РЦНИ
+                trace.mark_last("empty")
+                trace.finish("not_found", status)
+                return status
         elif not found_by_issn:
             # Если поиск по ISSN не дал результатов и нет названия
+            trace.finish("not_found", status)
             return status
         
         # Обработка найденных результатов (по ISSN или названию)
         if links:
-            # Переходим на детальную страницу журнала
-            journal_detail_link = links[0]['href']
+            candidate, ambiguous = select_candidate(
+                candidates, issn, journal_name
+            )
+            if ambiguous:
+                resolver_stats["ambiguous"] += 1
             
-            # Формируем полный URL если это относительная ссылка
-            if not journal_detail_link.startswith('http'):
-                journal_detail_link = (
-                    f"https://journalrank.rcsi.science{journal_detail_link}"
-                )
+            # Если строка результата однозначна и содержит уровень и
+            # бейджи, детальная страница не нужна
+            if (candidate and not ambiguous
+                    and candidate["white_level"] is not None
+                    and candidate["RSCI"] is not None):
+                resolver_stats["detail_avoided"] += 1
+                status["rcsi_url"] = candidate["url"]
+                status["white_level"] = candidate["white_level"]
+                status["vak_badge"] = candidate["vak_badge"]
+                status["rcsi_issns"] = candidate["issns"]
+                status["RSCI"] = candidate["RSCI"]
+                trace.resolved_from = "search_row"
+                trace.finish(outcome, status)
+                return status
             
-            # Сохраняем ссылку на журнал
-            status["rcsi_url"] = journal_detail_link
+            # Переходим на детальную страницу журнала
+            resolver_stats["detail_fetched"] += 1
+            trace.resolved_from = "detail"
+            if candidate:
+                journal_detail_link = candidate["url"]
+            else:
+                journal_detail_link = absolute_rcsi_url(links[0]['href'])
             
-            # Запрашиваем детальную страницу
-            async with session.get(
-                journal_detail_link, headers=headers, timeout=15
-            ) as detail_response:
-                detail_response.raise_for_status()
-                detail_html = await detail_response.text()
-                
-                # Парсим детальную страницу
-                detail_soup = BeautifulSoup(detail_html, 'html.parser')
-                
-                # Проверяем уровень белого списка
-                level_found = False
-                
-                # Ищем уровень журнала 
-                level_elem = (
-                    detail_soup.select_one('.level-circle-value') 
-                    or detail_soup.select_one('.level-value')
-                )
-                if level_elem:
-                    level_text = level_elem.get_text().strip().split()[0]
-                    if level_text.isdigit():
-                        white_level = level_text  # Убираем префикс "K"
-                        status["white_level"] = white_level
-                        level_found = True
-                
-                # Если не нашли уровень, проверяем любое упоминание о ВАК
-                if not level_found:
-                    page_text = detail_soup.get_text().lower()
-                    vak_badge = (
-                        detail_soup.select_one(
-                            'span.badge[title*="Перечень ВАК"]'
-                        ) or 'перечень вак' in page_text
-                    )
-                    
-                    if vak_badge:
-                        status["white_level"] = "0"  # "0" вместо "K"
-                        level_found = True
-                
-                # Если журнал найден в белом списке, проверяем RSCI
-                if level_found:
-                    # Проверяем наличие RSCI на странице
-                    page_text = detail_soup.get_text().lower()
-                    rsci_badge = detail_soup.select_one(
-                        'span.badge[title*="RSCI"]'
-                    )
-                    if (rsci_badge or "rsci" in page_text 
-                            or "ядро рниш" in page_text):
-                        status["RSCI"] = True
-                    else:
-                        # Проверяем дополнительно по отдельному запросу с ISSN
-                        if cleaned_issn:
-                            rsci_url = (
-                                "https://journalrank.rcsi.science/ru/record-sources/"
-                                f"?s={cleaned_issn}&adv=true&rs=true"
-                            )
-                            
-                            async with session.get(
-                                rsci_url, headers=headers, timeout=15
-                            ) as rsci_response:
-                                rsci_response.raise_for_status()
-                                rsci_html = await rsci_response.text()
-                                
-                                if "Ничего не найдено" not in rsci_html:
-                                    status["RSCI"] = True
+            # Загружаем и разбираем детальную страницу
+            detail_status, _ = await fetch_detail_status(
+                session, journal_detail_link, cleaned_issn, trace
+            )
+            status.update(detail_status)
         
+        trace.finish(outcome, status)
         return status
     
     except Exception:
-        # Ошибка при проверке журнала
-        return status
+        # Ошибка при проверке журнала: "не найден" здесь был бы неверным
+        # итогом, поэтому журнал остается непроверенным
+        trace.finish("error")
+        return None
     finally:
+        if _trace_log is not None:
+            _trace_log.append(trace)
         if should_close_session:
             await session.close()
 
-async def parse_vak_journals(base_url):
+async def fetch_detail_status(session, url, cleaned_issn="", trace=None):
+    """
+    Загружает детальную страницу журнала и определяет по ней статус.
+    Если на странице нет блока с бейджами, RSCI проверяется отдельным
+    запросом по ISSN.
+    
+    Args:
+        session: aiohttp.ClientSession или OfflineSession
+        url (str): Адрес детальной страницы
+        cleaned_issn (str): ISSN для запроса rs=true
+        trace (ResolutionTrace, optional): Трасса запросов
+        
+    Returns:
+        tuple: (статус как у check_rcsi_status, все сведения со страницы
+               из extract_journal_details)
+    """
+    detail_html = await traced(trace, "detail", fetch_text(
+        session, url, RCSI_HEADERS, 15
+    ))
+    
+    # Разбираем детальную страницу за один проход
+    details = extract_journal_details(BeautifulSoup(detail_html, 'html.parser'))
+    
+    status = {
+        "white_level": details["white_level"],
+        "RSCI": False,
+        "rcsi_url": url,
+        "level_history": details["level_history"],
+        "vak_badge": details["vak_badge"],
+        "subject_areas": details["subject_areas"],
+        "rcsi_issns": details["issns"]
+    }
+    
+    # Если журнал найден в белом списке, проверяем RSCI
+    if details["white_level"] != "none":
+        if details["RSCI"] is not None:
+            status["RSCI"] = details["RSCI"]
+        elif cleaned_issn:
+            # Страница не содержит блока с бейджами -
+            # проверяем по отдельному запросу с ISSN
+            rsci_url = (
+                "https://journalrank.rcsi.science/ru/record-sources/"
+                f"?s={cleaned_issn}&adv=true&rs=true"
+            )
+            
+            rsci_html = await traced(trace, "rsci_search", fetch_text(
+                session, rsci_url, RCSI_HEADERS, 15
+            ))
+            
+            if "Ничего не найдено" not in rsci_html:
+                status["RSCI"] = True
+            elif trace is not None:
+                trace.mark_last("empty")
+    
+    return status, details
+
+def is_journal_page(details):
+    """
+    Похожа ли страница на страницу журнала (а не на заглушку или
+    главную страницу, куда перенаправляет устаревшая ссылка)
+    
+    Args:
+        details (dict): Результат extract_journal_details
+    """
+    return bool(
+        details["issns"] or details["level_history"]
+        or details["white_level"] != "none" or details["RSCI"] is not None
+    )
+
+async def revalidate_rcsi_status(journal, session=None, title_index=None):
+    """
+    Повторная проверка уже найденного журнала по сохраненной ссылке
+    rcsi_url: загружается только детальная страница, без поиска.
+    Если ссылка перестала работать (404/410 или страница не похожа на
+    страницу журнала), выполняется обычная проверка check_rcsi_status.
+    
+    Args:
+        journal (dict): Запись журнала с полями issn, name_of_publication
+                        и rcsi_url
+        session (aiohttp.ClientSession, optional): Сессия для запросов
+        title_index (TitleIndex, optional): Индекс названий для поиска
+        
+    Returns:
+        dict: Статус как у check_rcsi_status или None при временной
+              ошибке (журнал стоит проверить позже)
+    """
+    issn = journal.get("issn", "")
+    journal_name = journal.get("name_of_publication", "")
+    url = journal.get("rcsi_url")
+    
+    async with session_scope(session) as session:
+        if not url or url == "none":
+            return await check_rcsi_status(issn, journal_name, session, title_index)
+        
+        trace = ResolutionTrace(issn, journal_name)
+        trace.resolved_from = "detail"
+        issns = split_issns(issn)
+        # alive: True - страница журнала, False - ссылка устарела,
+        # None - временная ошибка
+        try:
+            status, details = await fetch_detail_status(
+                session, url, issns[0] if issns else "", trace
+            )
+            alive = is_journal_page(details)
+        except aiohttp.ClientResponseError as e:
+            alive = False if e.status in DEAD_URL_STATUSES else None
+        except Exception:
+            alive = None
+        
+        if alive is None:
+            trace.finish("error")
+        elif alive:
+            resolver_stats["revalidated"] += 1
+            trace.finish("revalidated", status)
+        else:
+            resolver_stats["stale_url"] += 1
+            trace.finish("stale_url")
+        if _trace_log is not None:
+            _trace_log.append(trace)
+        
+        if alive is None:
+            return None
+        if alive:
+            return status
+        # Ссылка устарела - ищем журнал заново
+        return await check_rcsi_status(issn, journal_name, session, title_index)
+
+async def parse_vak_journals(base_url, session=None):
     """
     Асинхронно парсит данные о журналах ВАК с указанного URL
-    и возвращает список словарей с данными.
+    и возвращает список словарей с данными. Если сессия не передана,
+    создается новая.
+    
+    Первая страница загружается один раз и сразу разбирается, число
+    записей на ней считается размером страницы. Записи считаются по
+    номерам журналов, а не по строкам: один журнал занимает несколько
+    строк (по строке на специальность), а пагинатор считает журналы. Остальные страницы
+    загружаются окнами по PAGE_WINDOW страниц. Если количество страниц
+    определить не удалось или последняя из ожидаемых страниц заполнена
+    полностью, загрузка продолжается до первой неполной страницы.
     """
     # Целевая специализация
     target_specialty = "2.3.4"
@@ -281,44 +893,85 @@ async def parse_vak_journals(base_url):
     processed_journals = set()
     
     try:
-        async with aiohttp.ClientSession() as session:
-            # Получаем первую страницу для определения общего количества
+        async with session_scope(session) as session:
+            # Первая страница служит и для определения количества страниц
+            first_url = build_page_url(base_url, 1)
             
             # Добавляем таймаут 20 секунд для запроса
-            async with session.get(
-                base_url, headers=headers, timeout=20
-            ) as response:
-                response.raise_for_status()
-                html_content = await response.text()
-                soup = BeautifulSoup(html_content, 'html.parser')
-            
-                # Определяем общее количество страниц
-                total_pages = get_total_pages(soup)
-                
-                # Создаем задачи для обработки страниц
-                page_tasks = []
-                for page in range(1, total_pages + 1):
-                    # Формируем URL для текущей страницы
-                    page_url = (
-                        f"{base_url.split('?')[0]}?page={page}&records_per_page=50"
-                        f"&q=&issn=&scientific_specialties=2.3.4&category="
-                    )
-                    page_tasks.append(
-                        process_page(
-                            page, page_url, headers, session, target_specialty
-                        )
+            html_content = await fetch_text(
+                session, first_url, headers, 20, kind="vak_list"
+            )
+            
+            soup = BeautifulSoup(html_content, 'html.parser')
+            page_results = [parse_page(soup, target_specialty)]
+            # Фактический размер страницы в записях (сайт может
+            # ограничить records_per_page)
+            page_size = page_results[0][2]
+            total_records = get_total_records(soup)
+            total_pages = get_total_pages(soup, page_size)
+            
+            semaphore = asyncio.Semaphore(PAGE_WINDOW)
+            
+            async def process_page_bounded(page):
+                async with semaphore:
+                    return await process_page(
+                        page, build_page_url(base_url, page),
+                        headers, session, target_specialty
                     )
-                
-                # Ждем завершения всех задач и собираем результаты
-                page_results = await asyncio.gather(*page_tasks)
-                
-                # Обрабатываем результаты и удаляем дубликаты
-                for journals, journal_keys in page_results:
-                    for journal in journals:
-                        journal_key = f"{journal['id']}_{journal['issn']}"
-                        if journal_key not in processed_journals:
-                            all_journals.append(journal)
-                            processed_journals.add(journal_key)
+            
+            next_page = 2
+            if total_pages is not None:
+                # Количество страниц известно - загружаем остальные
+                # с ограничением числа одновременных запросов
+                page_results.extend(await asyncio.gather(*[
+                    process_page_bounded(page)
+                    for page in range(2, total_pages + 1)
+                ]))
+                next_page = total_pages + 1
+            
+            # Последняя страница заполнена полностью, а загружено меньше
+            # записей, чем указано на сайте (или их число неизвестно) -
+            # данные могут продолжаться: загружаем окнами до неполной
+            # страницы
+            loaded_records = sum(
+                record_count or 0 for _, _, record_count in page_results
+            )
+            last_records = page_results[-1][2]
+            if (page_size and last_records is not None
+                    and last_records >= page_size
+                    and (total_records is None or loaded_records < total_records)):
+                if total_pages is None:
+                    print("Количество страниц не определено, "
+                          "загрузка до неполной страницы")
+                page = next_page
+                while page <= MAX_PAGES:
+                    window = await asyncio.gather(*[
+                        process_page_bounded(window_page)
+                        for window_page in range(page, page + PAGE_WINDOW)
+                    ])
+                    page_results.extend(window)
+                    
+                    record_counts = [
+                        record_count for _, _, record_count in window
+                    ]
+                    # Неполная или пустая страница - данные закончились
+                    if any(record_count is not None and record_count < page_size
+                           for record_count in record_counts):
+                        break
+                    # Все страницы окна завершились ошибкой
+                    if all(record_count is None for record_count in record_counts):
+                        print(f"Не удалось загрузить страницы {page}-"
+                              f"{page + PAGE_WINDOW - 1}, загрузка прервана")
+                        break
+                    page += PAGE_WINDOW
+            
+            # Обрабатываем результаты и удаляем дубликаты
+            for journals, journal_keys, _ in page_results:
+                for journal in journals:
+                    journal_key = f"{journal['id']}_{journal['issn']}"
+                    if journal_key not in processed_journals:
+                        all_journals.append(journal)
+                        processed_journals.add(journal_key)
         
         print(f"Найдено {len(all_journals)} журналов со специальностью {target_specialty}")
         return all_journals
@@ -332,175 +985,236 @@ async def parse_vak_journals(base_url):
 
 async def process_page(page, page_url, headers, session, target_specialty):
     """
-    Асинхронно обрабатывает одну страницу с журналами ВАК.
+    Асинхронно загружает и обрабатывает одну страницу с журналами ВАК.
+    
+    Returns:
+        tuple: (журналы, ключи журналов, число записей на странице);
+               число записей равно None, если страницу загрузить не удалось
     """
     try:
-        async with session.get(
-            page_url, headers=headers, timeout=20
-        ) as response:
-            response.raise_for_status()
-            html_content = await response.text()
-            soup = BeautifulSoup(html_content, 'html.parser')
+        html_content = await fetch_text(
+            session, page_url, headers, 20, kind="vak_list"
+        )
         
-            # Находим таблицу с данными
-            table = soup.find('table')
-            
-            if not table:
-                return [], set()
+        soup = BeautifulSoup(html_content, 'html.parser')
+        return parse_page(soup, target_specialty)
             
-            # Получаем все строки таблицы
-            rows = table.find_all('tr')
-            
-            # Словарь для хранения текущего журнала
-            current_journal = None
-            prev_number = None
-            has_target_specialty = False
-            journal_relevance = True  # По умолчанию журнал считается актуальным
-            
-            journals = []
-            journal_keys = set()
+    except Exception:
+        # Ошибка при обработке страницы
+        return [], set(), None
+
+def parse_page(soup, target_specialty):
+    """
+    Разбирает таблицу журналов на странице списка ВАК.
+    
+    Args:
+        soup (BeautifulSoup): Разобранная страница
+        target_specialty (str): Целевая научная специальность
+        
+    Returns:
+        tuple: (журналы, ключи журналов, число записей на странице -
+               журналов всех специальностей, по номерам в первой колонке)
+    """
+    # Находим таблицу с данными
+    table = soup.find('table')
+    
+    if not table:
+        return [], set(), 0
+    
+    # Получаем все строки таблицы
+    rows = table.find_all('tr')
+    record_count = 0
+    
+    # Словарь для хранения текущего журнала
+    current_journal = None
+    prev_number = None
+    has_target_specialty = False
+    journal_relevance = True  # По умолчанию журнал считается актуальным
+    
+    journals = []
+    journal_keys = set()
+    
+    # Пропускаем заголовок таблицы
+    for row in rows[1:]:
+        # Получаем все ячейки текущей строки
+        cells = row.find_all('td')
+        
+        if not cells:
+            continue
             
-            # Пропускаем заголовок таблицы
-            for row in rows[1:]:
-                # Получаем все ячейки текущей строки
-                cells = row.find_all('td')
-                
-                if not cells:
-                    continue
-                    
-                # Проверяем, есть ли номер журнала (новая запись)
-                number_cell = cells[0].text.strip()
-                
-                # Если ячейка с номером не пуста - это новый журнал
-                if number_cell and number_cell != prev_number:
-                    # Сохраняем предыдущий журнал с нужной специальностью
-                    if current_journal and has_target_specialty:
-                        journal_key = f"{current_journal['id']}_{current_journal['issn']}"
-                        if journal_key not in journal_keys:
-                            # Добавим журнал без проверки РЦНИ
-                            journals.append(current_journal)
-                            journal_keys.add(journal_key)
-                    
-                    # Извлекаем данные о журнале
-                    journal_name = cells[1].text.strip() if len(cells) > 1 else ""
-                    issn = cells[2].text.strip() if len(cells) > 2 else ""
-                    
-                    # Очищаем ISSN от возможных лишних символов
-                    cleaned_issn = ""
-                    if issn:
-                        # Удаляем все символы, кроме цифр, X и x
-                        cleaned_issn = ''.join(
-                            c for c in issn if c.isdigit() or c.upper() == 'X'
-                        )
-                        # Если длина больше 8, возможно склеены два ISSN - берем первый
-                        if len(cleaned_issn) > 8:
-                            cleaned_issn = cleaned_issn[:8]
-                        # Форматируем ISSN с дефисом 
-                        if len(cleaned_issn) == 8:
-                            cleaned_issn = f"{cleaned_issn[:4]}-{cleaned_issn[4:]}"
-                    
-                    # Формируем ссылку на elibrary
-                    elibrary_url = "none"
-                    if cleaned_issn:
-                        elibrary_url = (
-                            f"https://elibrary.ru/titles.asp?rubriccode=&sortorder=4"
-                            f"&titlename={cleaned_issn}&order=1"
-                        )
-                    elif journal_name:
-                        # Если нет ISSN, используем название журнала
-                        search_term = journal_name.replace(' ', '+')
-                        elibrary_url = (
-                            f"https://elibrary.ru/titles.asp?rubriccode=&sortorder=4"
-                            f"&titlename={search_term}&order=1"
-                        )
-                    
-                    # Определяем категорию ВАК, или "none" если не указана
-                    vak_category = ""
-                    if len(cells) > 5:
-                        vak_category = cells[5].text.strip()
-                    
-                    # Если категория пустая, устанавливаем "none"
-                    if not vak_category:
-                        vak_category = "none"
-                    # Если начинается с "К" и далее цифра, удаляем "К"
-                    elif (vak_category.startswith('К') 
-                          and vak_category[1:].isdigit()):
-                        vak_category = vak_category[1:]
-                    
-                    # Создаем новый журнал
-                    current_journal = {
-                        "id": number_cell,
-                        "name_of_publication": journal_name,
-                        "issn": issn,
-                        # Массив объектов {scientific_specialty, date}
-                        "specialties": [],
-                        "vak_category": vak_category,
-                        "white_level": "none",
-                        "RSCI": False,
-                        "rcsi_url": "none",
-                        "elibrary_url": elibrary_url,
-                        "relevance": True  # По умолчанию журнал актуален
-                    }
-                    
-                    prev_number = number_cell
-                    # Сбрасываем флаг для нового журнала
-                    has_target_specialty = False
-                    journal_relevance = True  # Сбрасываем статус актуальности для нового журнала
-                
-                # Извлекаем научную специальность и дату включения
-                if len(cells) > 3 and current_journal:
-                    specialty = cells[3].text.strip()
-                    # Проверяем, содержит ли специальность нашу целевую (2.3.4)
-                    if specialty and target_specialty in specialty:
-                        has_target_specialty = True
-                        
-                        # Получаем дату
-                        date = cells[4].text.strip() if len(cells) > 4 else ""
-                        
-                        # Проверка актуальности журнала по дате
-                        if date and "по " in date:
-                            # Формат даты: "с DD.MM.YYYY по DD.MM.YYYY"
-                            match = re.search(r'по (\d{2})\.(\d{2})\.(\d{4})', date)
-                            if match:
-                                day, month, year = map(int, match.groups())
-                                end_date = datetime.date(year, month, day)
-                                today = datetime.date.today()
-                                
-                                # Если срок истёк, отмечаем журнал как неактуальный
-                                if end_date < today:
-                                    journal_relevance = False
-                                    current_journal["relevance"] = False
-                        
-                        # Проверяем, что мы еще не добавили эту специальность
-                        specialty_exists = False
-                        for spec in current_journal["specialties"]:
-                            if spec["scientific_specialty"] == specialty:
-                                specialty_exists = True
-                                break
-                        
-                        if not specialty_exists and date:
-                            # Добавляем специальность и дату как объект
-                            current_journal["specialties"].append({
-                                "scientific_specialty": specialty,
-                                "date": date
-                            })
-            
-            # Добавляем последний журнал на странице с нужной специальностью
+        # Проверяем, есть ли номер журнала (новая запись)
+        number_cell = cells[0].text.strip()
+        
+        # Если ячейка с номером не пуста - это новый журнал
+        if number_cell and number_cell != prev_number:
+            record_count += 1
+            # Сохраняем предыдущий журнал с нужной специальностью
             if current_journal and has_target_specialty:
                 journal_key = f"{current_journal['id']}_{current_journal['issn']}"
                 if journal_key not in journal_keys:
+                    # Добавим журнал без проверки РЦНИ
                     journals.append(current_journal)
                     journal_keys.add(journal_key)
             
-            return journals, journal_keys
+            # Извлекаем данные о журнале
+            journal_name = cells[1].text.strip() if len(cells) > 1 else ""
+            issn = cells[2].text.strip() if len(cells) > 2 else ""
             
-    except Exception:
-        # Ошибка при обработке страницы
-        return [], set()
+            # Очищаем ISSN от возможных лишних символов
+            cleaned_issn = clean_issn(issn)
+            
+            # Формируем ссылку на elibrary
+            elibrary_url = "none"
+            if cleaned_issn:
+                elibrary_url = (
+                    f"https://elibrary.ru/titles.asp?rubriccode=&sortorder=4"
+                    f"&titlename={cleaned_issn}&order=1"
+                )
+            elif journal_name:
+                # Если нет ISSN, используем название журнала
+                search_term = journal_name.replace(' ', '+')
+                elibrary_url = (
+                    f"https://elibrary.ru/titles.asp?rubriccode=&sortorder=4"
+                    f"&titlename={search_term}&order=1"
+                )
+            
+            # Определяем категорию ВАК, или "none" если не указана
+            vak_category = ""
+            if len(cells) > 5:
+                vak_category = cells[5].text.strip()
+            
+            # Если категория пустая, устанавливаем "none"
+            if not vak_category:
+                vak_category = "none"
+            # Если начинается с "К" и далее цифра, удаляем "К"
+            elif (vak_category.startswith('К') 
+                  and vak_category[1:].isdigit()):
+                vak_category = vak_category[1:]
+            
+            # Создаем новый журнал
+            current_journal = {
+                "id": number_cell,
+                "name_of_publication": journal_name,
+                "issn": issn,
+                # Все ISSN из ячейки (печатный и электронный)
+                "issns": split_issns(issn),
+                # Массив объектов {scientific_specialty, date}
+                "specialties": [],
+                "vak_category": vak_category,
+                "white_level": "none",
+                "RSCI": False,
+                "rcsi_url": "none",
+                "elibrary_url": elibrary_url,
+                "relevance": True  # По умолчанию журнал актуален
+            }
+            
+            prev_number = number_cell
+            # Сбрасываем флаг для нового журнала
+            has_target_specialty = False
+            journal_relevance = True  # Сбрасываем статус актуальности для нового журнала
+        
+        # Извлекаем научную специальность и дату включения
+        if len(cells) > 3 and current_journal:
+            specialty = cells[3].text.strip()
+            # Проверяем, содержит ли специальность нашу целевую (2.3.4)
+            if specialty and target_specialty in specialty:
+                has_target_specialty = True
+                
+                # Получаем дату
+                date = cells[4].text.strip() if len(cells) > 4 else ""
+                
+                # Период включения "с DD.MM.YYYY по DD.MM.YYYY" разбираем
+                # один раз; актуальность на нужную дату вычисляется
+                # при запросе по этому периоду
+                interval = parse_interval(date)
+                
+                # Флаг актуальности на дату парсинга сохраняем для
+                # совместимости со старыми файлами
+                if interval and interval[1] is not None:
+                    if interval[1] < datetime.date.today().toordinal():
+                        journal_relevance = False
+                        current_journal["relevance"] = False
+                
+                # Проверяем, что мы еще не добавили эту специальность
+                specialty_exists = False
+                for spec in current_journal["specialties"]:
+                    if spec["scientific_specialty"] == specialty:
+                        specialty_exists = True
+                        break
+                
+                if not specialty_exists and date:
+                    # Добавляем специальность и дату как объект
+                    current_journal["specialties"].append({
+                        "scientific_specialty": specialty,
+                        "date": date,
+                        # [начало, конец] как date.toordinal(), None - открыт
+                        "interval": interval
+                    })
+    
+    # Добавляем последний журнал на странице с нужной специальностью
+    if current_journal and has_target_specialty:
+        journal_key = f"{current_journal['id']}_{current_journal['issn']}"
+        if journal_key not in journal_keys:
+            journals.append(current_journal)
+            journal_keys.add(journal_key)
+    
+    return journals, journal_keys, record_count
+
+# Поля записи, которые заполняются проверкой в РЦНИ
+STATUS_FIELDS = (
+    "white_level", "RSCI", "rcsi_url", "level_history", "vak_badge",
+    "subject_areas", "rcsi_issns"
+)
 
-async def check_journals_status(journals_data):
+def apply_status(journal, status):
     """
-    Асинхронно проверяет статус журналов в РЦНИ и RSCI.
+    Применение результата проверки к записи журнала. Статус со страницы
+    журнала применяется, даже если журнал выбыл из белого списка; "none"
+    без страницы означает, что журнал не найден, и прежний статус
+    сохраняется.
+    
+    Args:
+        journal (dict): Запись журнала
+        status (dict): Результат check_rcsi_status
+        
+    Returns:
+        bool: True, если статус применен
+    """
+    if (status.get("white_level") != "none"
+            or status.get("rcsi_url", "none") != "none"):
+        journal.update(status)
+        return True
+    return False
+
+async def check_journals_status(
+    journals_data, session=None, title_index=None, recheck_before=None,
+    revalidate=False, recheck_unresolved_before=None
+):
+    """
+    Асинхронно проверяет статус журналов в РЦНИ и RSCI. Если сессия
+    не передана, создается новая. Проверяются журналы без статуса, а при
+    заданном recheck_before - также журналы, проверенные раньше этого
+    времени. Время проверки сохраняется в поле "checked_at" только после
+    завершенной проверки (в том числе с итогом "не найден"); после ошибки
+    загрузки журнал остается непроверенным.
+    
+    В режиме revalidate уже найденные журналы проверяются по сохраненной
+    ссылке rcsi_url (один запрос на журнал, см. revalidate_rcsi_status);
+    если recheck_before не задан, перепроверяются все найденные журналы.
+    
+    Args:
+        journals_data (list): Список журналов
+        session (aiohttp.ClientSession, optional): Открытая сессия
+        title_index (TitleIndex, optional): Уже загруженный индекс названий;
+                                           по умолчанию загружается из файла
+        recheck_before (str, optional): Время в формате ISO 8601; журналы
+                                       с более ранним (или без) checked_at
+                                       проверяются повторно
+        revalidate (bool): Перепроверять найденные журналы по rcsi_url
+        recheck_unresolved_before (str, optional): Время в формате ISO 8601;
+                                       если задано, журналы без статуса
+                                       проверяются, только если проверены
+                                       раньше него (или не проверялись)
     """
     if not journals_data:
         return journals_data
@@ -513,7 +1227,7 @@ async def check_journals_status(journals_data):
     total_rsci = 0
     
     # Создаем задачи для проверки журналов
-    async with aiohttp.ClientSession() as session:
+    async with session_scope(session) as session:
         # Сначала подсчитываем статистику по уже имеющимся данным
         for journal in journals_data:
             if journal.get("white_level") and journal.get("white_level") != "none":
@@ -525,35 +1239,122 @@ async def check_journals_status(journals_data):
         # Создаем список журналов, требующих проверки
         journals_to_check = []
         for i, journal in enumerate(journals_data):
+            last_checked = journal.get("checked_at", "")
             if not journal.get("white_level") or journal.get("white_level") == "none":
+                if (recheck_unresolved_before is None
+                        or last_checked < recheck_unresolved_before):
+                    journals_to_check.append((i, journal))
+            elif recheck_before is not None and last_checked < recheck_before:
+                journals_to_check.append((i, journal))
+            elif revalidate and recheck_before is None:
                 journals_to_check.append((i, journal))
         
         if journals_to_check:
             print(f"Необходимо проверить {len(journals_to_check)} журналов")
         
+            detail_stats_before = dict(resolver_stats)
+            
             # Ограничим количество одновременных задач
             # Максимум 5 одновременных запросов
             semaphore = asyncio.Semaphore(5)
             
-            async def check_journal_with_semaphore(idx, journal):
+            # Локальный индекс названий из уже известных записей journalrank
+            if title_index is None:
+                title_index = TitleIndex()
+                title_index.load()
+            title_index.add_journals(journals_data)
+            
+            # Снимок индекса нужен для повторного извлечения из архива:
+            # с ним проверка пойдет по тем же путям, что и сейчас
+            if _page_archive is not None:
+                _page_archive.append(
+                    TITLE_INDEX_ARCHIVE_URL, title_index.dumps(),
+                    kind="title_index"
+                )
+            
+            async def check_with_semaphore(issn, journal_name):
                 async with semaphore:
                     return await check_rcsi_status(
-                        journal.get('issn', ''),
-                        journal.get('name_of_publication', ''),
-                        session
+                        issn, journal_name, session, title_index
                     )
             
+            # Дубликаты (общий ISSN или одинаковое название) проверяются
+            # один раз, остальные копии получают тот же результат
+            coalescer = LookupCoalescer(check_with_semaphore)
+            
+            # Перепроверка по сохраненной ссылке, одна на адрес
+            revalidations = {}
+            
+            async def revalidate_with_semaphore(journal):
+                async with semaphore:
+                    return await revalidate_rcsi_status(
+                        journal, session, title_index
+                    )
+            
+            async def check_journal(journal):
+                url = journal.get("rcsi_url")
+                known = journal.get("white_level") not in (None, "", "none")
+                if revalidate and known and url and url != "none":
+                    if url not in revalidations:
+                        revalidations[url] = asyncio.ensure_future(
+                            revalidate_with_semaphore(journal)
+                        )
+                    status = await revalidations[url]
+                    return dict(status) if status is not None else None
+                return await coalescer.check(
+                    journal.get('issn', ''),
+                    journal.get('name_of_publication', '')
+                )
+            
             # Создаем задачи для проверки
-            tasks = [
-                check_journal_with_semaphore(i, journal) 
-                for i, (_, journal) in enumerate(journals_to_check)
-            ]
+            tasks = [check_journal(journal) for _, journal in journals_to_check]
             results = await asyncio.gather(*tasks)
             
+            title_index.save()
+            
+            print(
+                f"Уникальных проверок: {coalescer.lookups_started}, "
+                f"повторных проверок сэкономлено: {coalescer.lookups_saved}"
+            )
+            
+            detail_counts = {
+                key: resolver_stats[key] - detail_stats_before.get(key, 0)
+                for key in (
+                    "detail_avoided", "detail_fetched", "ambiguous",
+                    "issn_catalogue", "secondary_issn", "revalidated",
+                    "stale_url"
+                )
+            }
+            print(
+                f"Статус из результатов поиска: {detail_counts['detail_avoided']}, "
+                f"загружено детальных страниц: {detail_counts['detail_fetched']}, "
+                f"неоднозначных результатов: {detail_counts['ambiguous']}"
+            )
+            print(
+                f"Найдено без поиска по названию: по каталогу ISSN "
+                f"{detail_counts['issn_catalogue']}, по второму ISSN "
+                f"{detail_counts['secondary_issn']}"
+            )
+            if revalidate:
+                print(
+                    f"Перепроверено по сохраненной ссылке: "
+                    f"{detail_counts['revalidated']}, устаревших ссылок: "
+                    f"{detail_counts['stale_url']}"
+                )
+            
             # Обновляем данные журналов
+            checked_at = datetime.datetime.now().isoformat(timespec="seconds")
             for (idx, journal), status in zip(journals_to_check, results):
-                if status.get("white_level") != "none":
-                    journal.update(status)
+                if status is None:
+                    # Временная ошибка - журнал будет проверен в следующий раз
+                    continue
+                journal["checked_at"] = checked_at
+                # Повторно проверенный журнал уже учтен в счетчиках
+                was_white = journal.get("white_level") not in (None, "", "none")
+                was_rsci = bool(journal.get("RSCI"))
+                if apply_status(journal, status):
+                    total_white_list -= was_white
+                    total_rsci -= was_rsci
                     
                     # Увеличиваем счетчики
                     if status.get("white_level") != "none":
@@ -572,13 +1373,22 @@ async def check_journals_status(journals_data):
     
     return journals_data
 
-def save_to_json(data, filename):
+def save_to_json(data, filename, base=None):
     """
     Сохраняет данные в JSON-файл
     
     Args:
         data: Данные для сохранения
         filename: Имя файла
+        base (StoreSnapshot, optional): Версия файла, из которой получены
+                                        данные; если задана, сохраняются
+                                        только изменения относительно нее,
+                                        а изменения других процессов
+                                        сохраняются
+    
+    Returns:
+        list: Сохраненные журналы (с изменениями других процессов)
+              или None при ошибке
     """
     # Определяем директорию приложения (директория, где находится EXE)
     if getattr(sys, 'frozen', False):
@@ -592,13 +1402,211 @@ def save_to_json(data, filename):
     full_path = os.path.join(app_dir, filename)
     
     try:
-        with open(full_path, 'w', encoding='utf-8') as f:
-            json.dump(data, f, ensure_ascii=False, indent=4)
+        # Файл заменяется целиком под блокировкой писателя, чтобы GUI
+        # и другие процессы не прочитали его наполовину записанным
+        snapshot = JournalStore(full_path).commit(base, data)
         print(f"Данные успешно сохранены в файл {full_path}")
+        return snapshot.journals
     except Exception as e:
         print(f"Ошибка при сохранении в JSON: {e}")
+        return None
+
+# Архив в процессе повторного извлечения (см. _init_reextract_worker)
+_reextract_archive = None
+
+def _init_reextract_worker(archive_filename, entries):
+    """
+    Инициализация процесса повторного извлечения: индекс архива
+    передается из основного процесса, файл заново не сканируется
+    """
+    global _reextract_archive
+    _reextract_archive = PageArchive(archive_filename, entries=entries)
+
+def _reextract_list_page(entry, target_specialty):
+    """
+    Разбор страницы списка ВАК из архива (выполняется в отдельном процессе)
+    """
+    soup = BeautifulSoup(_reextract_archive.read(entry), 'html.parser')
+    journals, _, _ = parse_page(soup, target_specialty)
+    return journals
+
+def _reextract_statuses(journals, before=None):
+    """
+    Повторная проверка статусов журналов по страницам из архива
+    (выполняется в отдельном процессе). Используется снимок индекса
+    названий из архива, а не текущий файл индекса, чтобы результат
+    зависел только от архива. Для журналов, страниц которых в архиве
+    нет, возвращается None.
+    """
+    archive = _reextract_archive
+    session = OfflineSession(archive, before)
+    title_index = TitleIndex()
+    entry = archive.latest(TITLE_INDEX_ARCHIVE_URL, before)
+    if entry is not None:
+        title_index.loads(archive.read(entry))
+    
+    async def check_all():
+        return await asyncio.gather(*[
+            check_rcsi_status(
+                journal.get('issn', ''),
+                journal.get('name_of_publication', ''),
+                session,
+                title_index
+            )
+            for journal in journals
+        ])
+    
+    return asyncio.run(check_all())
+
+def reextract_from_archive(
+    archive_filename, journals_data=None, workers=None, crawl=None, before=None
+):
+    """
+    Заново извлекает данные журналов из архива страниц без обращения
+    к сети. Страницы разбираются параллельно в нескольких процессах;
+    архив сканируется один раз, процессы получают готовый индекс.
+    
+    Статус журнала заменяется, только если архив отвечает на проверку
+    (есть страницы поиска или журнала); иначе сохраняется прежний статус.
+    Записи, заново собранные со страниц списка ВАК, получают из прежних
+    записей (по ключу журнала) поля, которых нет на этих страницах:
+    статус, checked_at, elibrary_metrics и т.п.
+    
+    Args:
+        archive_filename (str): Путь к архиву страниц
+        journals_data (list, optional): Текущие журналы: источник прежних
+                                        статусов и полей, а если в архиве
+                                        нет страниц списка ВАК - список
+                                        журналов для проверки
+        workers (int, optional): Число процессов (по умолчанию - число ядер)
+        crawl (str, optional): Обновление, из которого берутся страницы
+                               списка ВАК (по умолчанию - последнее)
+        before (str, optional): Использовать страницы РЦНИ, загруженные
+                                не позже этого времени (ISO 8601)
+        
+    Returns:
+        list: Список журналов со статусами
+    """
+    target_specialty = "2.3.4"
+    archive = PageArchive(archive_filename)
+    
+    crawls = archive.crawls(kind="vak_list")
+    if crawl is None and crawls:
+        crawl = crawls[-1]
+    list_pages = archive.pages("vak_list", crawl) if crawl else []
+    
+    if archive.latest(TITLE_INDEX_ARCHIVE_URL, before) is None:
+        print("В архиве нет снимка индекса названий, "
+              "проверка выполняется с пустым индексом")
+    
+    workers = workers or os.cpu_count() or 1
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        initializer=_init_reextract_worker,
+        initargs=(archive_filename, archive.entries)
+    ) as executor:
+        if list_pages:
+            print(f"Разбор {len(list_pages)} страниц списка ВАК "
+                  f"из обновления {crawl}...")
+            page_results = executor.map(
+                _reextract_list_page,
+                list_pages,
+                [target_specialty] * len(list_pages)
+            )
+            
+            # Удаляем дубликаты, как при обычном парсинге
+            rebuilt = []
+            processed_journals = set()
+            for journals in page_results:
+                for journal in journals:
+                    journal_key = f"{journal['id']}_{journal['issn']}"
+                    if journal_key not in processed_journals:
+                        rebuilt.append(journal)
+                        processed_journals.add(journal_key)
+            
+            # Прежние статус и поля, которых нет на страницах списка
+            previous = index_records(journals_data or [])
+            for key, journal in index_records(rebuilt).items():
+                old = previous.get(key)
+                if old is None:
+                    continue
+                for field, value in old.items():
+                    if field not in journal or field in STATUS_FIELDS:
+                        journal[field] = value
+            journals_data = rebuilt
+        
+        if not journals_data:
+            print("В архиве нет страниц списка ВАК и не переданы журналы")
+            return []
+        
+        print(f"Проверка {len(journals_data)} журналов по архиву...")
+        chunk_size = max(1, (len(journals_data) + workers - 1) // workers)
+        chunks = [
+            journals_data[start:start + chunk_size]
+            for start in range(0, len(journals_data), chunk_size)
+        ]
+        chunk_results = executor.map(
+            _reextract_statuses,
+            chunks,
+            [before] * len(chunks)
+        )
+        
+        kept = 0
+        for chunk, statuses in zip(chunks, chunk_results):
+            for journal, status in zip(chunk, statuses):
+                if status is None:
+                    # Архив не отвечает на проверку - статус прежний
+                    kept += 1
+                    continue
+                for field in STATUS_FIELDS:
+                    journal.pop(field, None)
+                journal.update({
+                    "white_level": "none",
+                    "RSCI": False,
+                    "rcsi_url": "none"
+                })
+                apply_status(journal, status)
+        if kept:
+            print(f"Нет страниц в архиве, статус сохранен: {kept} журналов")
+    
+    return journals_data
+
+async def enrich_elibrary_metrics(journals_data, session=None):
+    """
+    Дополняет журналы показателями elibrary.ru (см. модуль elibrary).
+    Загруженные страницы сохраняются в архив, если он включен.
+    """
+    headers = {
+        'User-Agent': ('Mozilla/5.0 (Windows NT 10.0; Win64; x64) '
+                      'AppleWebKit/537.36 (KHTML, like Gecko) '
+                      'Chrome/91.0.4472.124 Safari/537.36'),
+        'Accept-Language': 'ru-RU,ru;q=0.8,en-US;q=0.5,en;q=0.3'
+    }
+    
+    async def fetch(session, url):
+        return await fetch_text(session, url, headers, 30, kind="elibrary")
+    
+    async with session_scope(session) as session:
+        return await enrich_journals(journals_data, session, fetch=fetch)
 
-async def main_async():
+@profiling.profiled()
+async def main_async(
+    archive_pages=True, session=None, title_index=None, enrich_elibrary=False,
+    trace_lookups=True, revalidate=False
+):
+    """
+    Загрузка или парсинг списка ВАК, проверка статуса и сохранение
+    
+    Args:
+        archive_pages (bool): Сохранять загруженные страницы в архив
+        session (aiohttp.ClientSession, optional): Открытая сессия;
+                                                  по умолчанию создается новая
+        title_index (TitleIndex, optional): Уже загруженный индекс названий
+        enrich_elibrary (bool): Загрузить показатели журналов с elibrary.ru
+        trace_lookups (bool): Записывать трассы проверки журналов в РЦНИ
+        revalidate (bool): Перепроверить уже найденные журналы по
+                           сохраненным ссылкам rcsi_url
+    """
     # Имя JSON-файла с данными
     json_filename = "vak_journals_2.3.4.json"
     journals_data = []
@@ -614,13 +1622,26 @@ async def main_async():
     # Полный путь к файлу
     full_path = os.path.join(app_dir, json_filename)
     
+    # Сохраняем все загруженные страницы для повторного извлечения
+    if archive_pages:
+        set_page_archive(
+            PageArchive(os.path.join(app_dir, PAGE_ARCHIVE_FILENAME))
+        )
+    
+    # Трассы проверки журналов для анализа количества запросов
+    if trace_lookups:
+        set_trace_log(TraceLog())
+    
+    # Версия файла, от которой считаются изменения при сохранении
+    base = None
+    
     # Проверяем, существует ли файл с данными
     if os.path.exists(full_path):
         print(f"Найден существующий файл с данными: {full_path}")
         try:
             # Загружаем данные из существующего файла
-            with open(full_path, 'r', encoding='utf-8') as f:
-                journals_data = json.load(f)
+            base = JournalStore(full_path).read()
+            journals_data = base.journals
             print(f"Загружено {len(journals_data)} журналов из файла")
         except Exception as e:
             print(f"Ошибка при чтении файла {full_path}: {e}")
@@ -632,27 +1653,122 @@ async def main_async():
         # Базовый URL с фильтром по специальности 2.3.4
         base_url = (
             "https://vak.academy/?q=&issn=&scientific_specialties=2.3.4&category="
-            "&records_per_page=50"
+            f"&records_per_page={RECORDS_PER_PAGE}"
         )
         
         print("Парсинг данных...")
-        journals_data = await parse_vak_journals(base_url)
+        journals_data = await parse_vak_journals(base_url, session)
     
     # Асинхронно проверяем статус журналов в РЦНИ и RSCI
     if journals_data:
-        journals_data = await check_journals_status(journals_data)
+        journals_data = await check_journals_status(
+            journals_data, session, title_index, revalidate=revalidate
+        )
+        
+        # Показатели РИНЦ и SCIENCE INDEX с elibrary.ru
+        if enrich_elibrary:
+            await enrich_elibrary_metrics(journals_data, session)
         
         # Сохраняем обновленные данные в JSON-файл
-        save_to_json(journals_data, json_filename)
+        saved = save_to_json(journals_data, json_filename, base)
+        if saved is not None:
+            journals_data = saved
+        
+        # Сохраняем версию для сравнения с предыдущими обновлениями
+        try:
+            version = SnapshotStore().commit(journals_data)
+            if version:
+                print(f"Сохранена версия базы {version}")
+            else:
+                print("Данные не изменились с прошлого обновления")
+        except Exception as e:
+            print(f"Ошибка при сохранении версии: {e}")
     else:
         print("Данные не найдены")
 
-def main():
+def main(argv=None):
     """
     Точка входа в программу, запускает асинхронные функции
+    
+    Args:
+        argv (list, optional): Аргументы командной строки
     """
+    arg_parser = argparse.ArgumentParser(
+        description="Сбор журналов ВАК 2.3.4 и проверка статуса в РЦНИ"
+    )
+    arg_parser.add_argument(
+        "--no-archive", action="store_true",
+        help="Не сохранять загруженные страницы в архив"
+    )
+    arg_parser.add_argument(
+        "--no-trace", action="store_true",
+        help="Не записывать трассы проверки журналов в РЦНИ"
+    )
+    arg_parser.add_argument(
+        "--reextract", action="store_true",
+        help="Заново извлечь данные из архива страниц без обращения к сети"
+    )
+    arg_parser.add_argument(
+        "--workers", type=int, default=None,
+        help="Число процессов для повторного извлечения"
+    )
+    arg_parser.add_argument(
+        "--crawl", default=None,
+        help="Обновление в архиве, из которого брать список ВАК"
+    )
+    arg_parser.add_argument(
+        "--before", default=None,
+        help="Использовать страницы, загруженные не позже этого времени "
+             "(ГГГГ-ММ-ДДTЧЧ:ММ:СС)"
+    )
+    arg_parser.add_argument(
+        "--profile", action="store_true",
+        help="Сохранить профили CPU и памяти в директорию profiles"
+    )
+    arg_parser.add_argument(
+        "--elibrary", action="store_true",
+        help="Загрузить показатели РИНЦ и SCIENCE INDEX с elibrary.ru"
+    )
+    arg_parser.add_argument(
+        "--revalidate", action="store_true",
+        help="Перепроверить найденные журналы по сохраненным ссылкам РЦНИ"
+    )
+    args = arg_parser.parse_args(argv)
+    
+    if args.profile:
+        profiling.enable()
+    
+    if args.reextract:
+        # Определяем директорию приложения (директория, где находится EXE)
+        if getattr(sys, 'frozen', False):
+            app_dir = os.path.dirname(sys.executable)
+        else:
+            app_dir = os.path.dirname(os.path.abspath(__file__))
+        
+        json_filename = "vak_journals_2.3.4.json"
+        # Сохраняются только изменения относительно прочитанной версии,
+        # чтобы не затереть записи, обновленные за это время другими
+        # процессами
+        base = JournalStore(os.path.join(app_dir, json_filename)).read()
+        
+        journals_data = reextract_from_archive(
+            os.path.join(app_dir, PAGE_ARCHIVE_FILENAME),
+            base.journals or None,
+            workers=args.workers,
+            crawl=args.crawl,
+            before=args.before
+        )
+        if journals_data:
+            save_to_json(journals_data, json_filename, base)
+        return
+    
     # Запускаем асинхронную функцию main_async
-    asyncio.run(main_async())
+    asyncio.run(main_async(
+        archive_pages=not args.no_archive,
+        enrich_elibrary=args.elibrary,
+        trace_lookups=not args.no_trace,
+        revalidate=args.revalidate
+    ))
 
 if __name__ == "__main__":
     main() 
\ No newline at end of file
@@ -4,22 +4,35 @@
 """
 Модуль-обертка для парсера журналов.
 Используется для запуска парсера из графического интерфейса.
+
+Обертка держит постоянный цикл событий asyncio в отдельном потоке
+и одну сетевую сессию с пулом соединений, поэтому повторные обновления
+и проверка отдельных журналов не тратят время на создание цикла,
+сессии и установку соединений. Задачи передаются в цикл методами
+refresh и recheck_journal, которые возвращают concurrent.futures.Future.
 """
 
+import asyncio
+import concurrent.futures
 import os
 import json
 import sys
+import threading
 
 
 class ParserWrapper:
     """
     Класс для запуска парсера журналов из GUI.
     """
-    
+
+    # Ограничения пула соединений сессии
+    CONNECTION_LIMIT = 20
+    KEEPALIVE_TIMEOUT = 60
+
     def __init__(self, output_file="vak_journals_2.3.4.json"):
         """
         Инициализация обертки парсера
-        
+
         Args:
             output_file (str): Имя файла для сохранения результатов
         """
@@ -30,65 +43,217 @@ class ParserWrapper:
         else:
             # Если запущено как скрипт
             app_dir = os.path.dirname(os.path.abspath(__file__))
-            
+
         self.output_file = os.path.join(app_dir, output_file)
-    
+
+        # Цикл событий, его поток и "теплые" ресурсы создаются
+        # при первой задаче
+        self.loop = None
+        self.loop_thread = None
+        self.session = None
+        self.title_index = None
+        self._lock = threading.Lock()
+
+    def _ensure_loop(self):
+        """
+        Запуск фонового потока с циклом событий, если он еще не запущен
+        """
+        with self._lock:
+            if self.loop is None or self.loop.is_closed():
+                self.loop = asyncio.new_event_loop()
+                self.loop_thread = threading.Thread(
+                    target=self._run_loop,
+                    name="parser-loop",
+                    daemon=True
+                )
+                self.loop_thread.start()
+            return self.loop
+
+    def _run_loop(self):
+        asyncio.set_event_loop(self.loop)
+        self.loop.run_forever()
+
+    async def _get_session(self):
+        """
+        Общая сессия aiohttp; создается внутри цикла при первом обращении
+        """
+        if self.session is None or self.session.closed:
+            import aiohttp
+            self.session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(
+                    limit=self.CONNECTION_LIMIT,
+                    keepalive_timeout=self.KEEPALIVE_TIMEOUT
+                )
+            )
+        return self.session
+
+    def _get_title_index(self):
+        """
+        Индекс названий journalrank, загружаемый один раз
+        """
+        if self.title_index is None:
+            from title_index import TitleIndex
+            self.title_index = TitleIndex()
+            self.title_index.load()
+        return self.title_index
+
+    def submit(self, coro):
+        """
+        Передача корутины в фоновый цикл событий
+
+        Args:
+            coro: Корутина для выполнения
+
+        Returns:
+            concurrent.futures.Future: Результат выполнения корутины
+        """
+        return asyncio.run_coroutine_threadsafe(coro, self._ensure_loop())
+
+    def refresh(self):
+        """
+        Полное обновление базы в фоновом цикле
+
+        Returns:
+            concurrent.futures.Future: Будущий результат в формате run_parser
+        """
+        return self.submit(self._refresh())
+
+    async def _refresh(self):
+        try:
+            # Импортируем парсер напрямую вместо запуска через subprocess
+            import parser
+
+            await parser.main_async(
+                session=await self._get_session(),
+                title_index=self._get_title_index()
+            )
+        except Exception as e:
+            # В случае любой ошибки возвращаем нули
+            return {
+                "journals_processed": 0,
+                "white_list_journals": 0,
+                "rsci_journals": 0,
+                "error": str(e)
+            }
+        return self._collect_stats()
+
+    def recheck_journal(self, journal):
+        """
+        Повторная проверка статуса одного журнала в РЦНИ и RSCI: по
+        сохраненной ссылке rcsi_url, а если ее нет или она устарела -
+        поиском по ISSN и названию
+
+        Args:
+            journal (dict): Запись журнала (используются issn, название
+                            и rcsi_url)
+
+        Returns:
+            concurrent.futures.Future: Будущий словарь статуса, как у
+                                       parser.check_rcsi_status, или None
+                                       при временной ошибке
+        """
+        return self.submit(self._recheck_journal(dict(journal)))
+
+    async def _recheck_journal(self, journal):
+        import parser
+
+        return await parser.revalidate_rcsi_status(
+            journal,
+            await self._get_session(),
+            self._get_title_index()
+        )
+
+    def shutdown(self, timeout=5):
+        """
+        Отмена незавершенных задач, закрытие сессии и остановка
+        фонового цикла событий
+
+        Args:
+            timeout (float): Максимальное время ожидания в секундах
+        """
+        with self._lock:
+            loop = self.loop
+            self.loop = None
+        if loop is None:
+            return
+
+        session = self.session
+        self.session = None
+
+        async def cancel_pending():
+            current = asyncio.current_task()
+            tasks = [task for task in asyncio.all_tasks() if task is not current]
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            if session is not None and not session.closed:
+                await session.close()
+
+        try:
+            asyncio.run_coroutine_threadsafe(
+                cancel_pending(), loop
+            ).result(timeout)
+        except concurrent.futures.TimeoutError:
+            print("Задачи не завершились за отведенное время")
+        except Exception as e:
+            print(f"Ошибка при остановке задач: {e}")
+
+        loop.call_soon_threadsafe(loop.stop)
+        if self.loop_thread is not None:
+            self.loop_thread.join(timeout)
+            if self.loop_thread.is_alive():
+                # Цикл еще работает - закрыть его нельзя; поток фоновый
+                # и завершится вместе с программой
+                print("Цикл событий не остановился за отведенное время")
+                return
+        loop.close()
+
     def run_parser(self):
         """
-        Запуск парсера и возврат результатов
-        
+        Запуск парсера и возврат результатов (с ожиданием завершения)
+
         Returns:
             dict: Словарь с результатами парсинга:
                   journals_processed - количество обработанных журналов
                   white_list_journals - количество журналов в белом списке
                   rsci_journals - количество журналов в RSCI
         """
+        return self.refresh().result()
+
+    def _collect_stats(self):
+        """
+        Статистика по файлу с результатами
+        """
+        # Проверяем создание файла с данными
+        if not os.path.exists(self.output_file):
+            return {
+                "journals_processed": 0,
+                "white_list_journals": 0,
+                "rsci_journals": 0,
+                "error": "Файл с результатами не создан"
+            }
+
+        # Загружаем данные для статистики
         try:
-            # Импортируем парсер напрямую вместо запуска через subprocess
-            import parser
-            
-            # Запускаем парсер
-            parser.main()
-            
-            # Проверяем создание файла с данными
-            if not os.path.exists(self.output_file):
-                return {
-                    "journals_processed": 0,
-                    "white_list_journals": 0,
-                    "rsci_journals": 0,
-                    "error": "Файл с результатами не создан"
-                }
-            
-            # Загружаем данные для статистики
-            try:
-                with open(self.output_file, 'r', encoding='utf-8') as file:
-                    journals = json.load(file)
-                
-                # Считаем статистику
-                journals_count = len(journals)
-                white_list_count = sum(
-                    1 for j in journals if j.get("white_level") != "none"
-                )
-                rsci_count = sum(1 for j in journals if j.get("RSCI"))
-                
-                return {
-                    "journals_processed": journals_count,
-                    "white_list_journals": white_list_count,
-                    "rsci_journals": rsci_count
-                }
-            except Exception as e:
-                return {
-                    "journals_processed": 0,
-                    "white_list_journals": 0,
-                    "rsci_journals": 0,
-                    "error": f"Ошибка при чтении файла результатов: {str(e)}"
-                }
-                
+            with open(self.output_file, 'r', encoding='utf-8') as file:
+                journals = json.load(file)
+
+            # Считаем статистику
+            journals_count = len(journals)
+            white_list_count = sum(
+                1 for j in journals if j.get("white_level") != "none"
+            )
+            rsci_count = sum(1 for j in journals if j.get("RSCI"))
+
+            return {
+                "journals_processed": journals_count,
+                "white_list_journals": white_list_count,
+                "rsci_journals": rsci_count
+            }
         except Exception as e:
-            # В случае любой ошибки возвращаем нули
             return {
                 "journals_processed": 0,
                 "white_list_journals": 0,
                 "rsci_journals": 0,
-                "error": str(e)
-            } 
\ No newline at end of file
+                "error": f"Ошибка при чтении файла результатов: {str(e)}"
+            }
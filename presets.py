@@ -0,0 +1,291 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Именованные наборы фильтров (шаблоны) и пакетный экспорт.
+
+Шаблоны хранятся в файле filter_presets.json рядом с программой.
+Пакетный экспорт отбирает журналы для всех шаблонов за один проход
+по базе и сохраняет результаты либо на отдельные листы одной книги Excel,
+либо в отдельные файлы. Книга для тех же шаблонов и той же версии базы
+повторно не собирается, а копируется из кэша выгрузок (export_cache).
+
+Запуск без графического интерфейса:
+    python presets.py --list
+    python presets.py
+    python presets.py --files --output-dir exports
+    python presets.py --preset "Только RSCI" --output rsci.xlsx
+"""
+
+import argparse
+import json
+import os
+import re
+import sys
+
+import profiling
+from export_cache import cache_key
+from filter_expr import FilterSyntaxError
+from snapshots import get_app_dir
+
+
+PRESETS_FILENAME = "filter_presets.json"
+
+# Шаблоны, создаваемые при первом запуске
+DEFAULT_PRESETS = [
+    {
+        "name": "Категория 1-2, белый список 1-2",
+        "vak_categories": ["1", "2"],
+        "white_levels": ["1", "2"],
+        "rsci": None
+    },
+    {
+        "name": "Только RSCI",
+        "vak_categories": [],
+        "white_levels": [],
+        "rsci": True
+    },
+    {
+        "name": "Без категории, уровень 3",
+        "vak_categories": ["none"],
+        "white_levels": ["3"],
+        "rsci": None
+    },
+]
+
+
+def presets_path():
+    """
+    Путь к файлу шаблонов
+    """
+    return os.path.join(get_app_dir(), PRESETS_FILENAME)
+
+
+def unique_preset_names(presets):
+    """
+    Переименование шаблонов с повторяющимися именами: имя - ключ
+    результата пакетного экспорта и название листа, поэтому шаблоны
+    с одинаковым именем затирали бы друг друга. Повторы получают
+    суффикс " (2)", " (3)" и т.д.
+
+    Args:
+        presets (list): Шаблоны
+
+    Returns:
+        list: Шаблоны с уникальными именами (исходные не изменяются)
+    """
+    names = {preset["name"] for preset in presets}
+    seen = set()
+    result = []
+    for preset in presets:
+        name = preset["name"]
+        if name in seen:
+            suffix = 2
+            while f"{name} ({suffix})" in names:
+                suffix += 1
+            new_name = f"{name} ({suffix})"
+            print(f"Шаблон с повторяющимся именем \"{name}\" "
+                  f"переименован в \"{new_name}\"")
+            preset = dict(preset, name=new_name)
+            names.add(new_name)
+            name = new_name
+        seen.add(name)
+        result.append(preset)
+    return result
+
+
+def load_presets():
+    """
+    Загрузка шаблонов фильтров
+
+    Returns:
+        list: Список шаблонов (словари с ключами name, vak_categories,
+              white_levels, rsci и, возможно, query, min_metrics
+              и expression) с уникальными именами
+    """
+    filename = presets_path()
+    if not os.path.exists(filename):
+        return [dict(preset) for preset in DEFAULT_PRESETS]
+    try:
+        with open(filename, 'r', encoding='utf-8') as file:
+            return unique_preset_names(json.load(file))
+    except Exception as e:
+        print(f"Ошибка при загрузке шаблонов фильтров: {e}")
+        return [dict(preset) for preset in DEFAULT_PRESETS]
+
+
+def save_presets(presets):
+    """
+    Сохранение шаблонов фильтров
+
+    Returns:
+        bool: True, если сохранение прошло успешно, иначе False
+    """
+    try:
+        with open(presets_path(), 'w', encoding='utf-8') as file:
+            json.dump(presets, file, ensure_ascii=False, indent=2)
+        return True
+    except Exception as e:
+        print(f"Ошибка при сохранении шаблонов фильтров: {e}")
+        return False
+
+
+def add_preset(name, filters):
+    """
+    Добавление или замена шаблона с заданным именем
+
+    Args:
+        name (str): Имя шаблона
+        filters (dict): Фильтры (vak_categories, white_levels, rsci, query,
+                        min_metrics, expression)
+
+    Returns:
+        bool: True, если сохранение прошло успешно, иначе False
+    """
+    presets = [preset for preset in load_presets() if preset["name"] != name]
+    preset = {
+        "name": name,
+        "vak_categories": list(filters.get("vak_categories") or []),
+        "white_levels": list(filters.get("white_levels") or []),
+        "rsci": filters.get("rsci")
+    }
+    if filters.get("query"):
+        preset["query"] = filters["query"]
+    if filters.get("min_metrics"):
+        preset["min_metrics"] = dict(filters["min_metrics"])
+    if filters.get("expression"):
+        preset["expression"] = filters["expression"]
+    presets.append(preset)
+    return save_presets(presets)
+
+
+def _safe_filename(name):
+    return re.sub(r'[\\/:*?"<>|]+', '_', name).strip() or "preset"
+
+
+@profiling.profiled()
+def batch_export(db, presets=None, output_file=None, output_dir=None):
+    """
+    Пакетный экспорт по шаблонам за один проход по базе
+
+    Args:
+        db (JournalDatabase): База журналов
+        presets (list, optional): Шаблоны; по умолчанию - все сохраненные
+        output_file (str, optional): Книга Excel, в которой каждый шаблон
+                                     сохраняется на отдельный лист
+        output_dir (str, optional): Директория для отдельных файлов
+                                    (используется, если output_file не задан)
+
+    Returns:
+        dict: {имя шаблона: количество журналов} или None при ошибке
+    """
+    if presets is None:
+        presets = load_presets()
+    presets = unique_preset_names(presets)
+
+    # Та же книга для тех же шаблонов и версии данных берется из кэша
+    version = db.data_version()
+    key = None
+    if output_file and version:
+        key = cache_key(presets, "xlsx-sheets", version)
+        info = db.export_cache.get(key, output_file)
+        if info is not None:
+            return info.get("counts", {})
+
+    filter_sets = {preset["name"]: preset for preset in presets}
+    try:
+        results = db.filter_journals_batch(filter_sets)
+    except FilterSyntaxError as e:
+        print(f"Ошибка в выражении шаблона: {e}")
+        return None
+
+    counts = {name: len(journals) for name, journals in results.items()}
+    if output_file:
+        if not db.export_sheets_to_excel(results, output_file):
+            return None
+        if key:
+            db.export_cache.put(key, output_file, version, {"counts": counts})
+    else:
+        output_dir = output_dir or os.getcwd()
+        os.makedirs(output_dir, exist_ok=True)
+        for name, journals in results.items():
+            filename = os.path.join(output_dir, f"{_safe_filename(name)}.xlsx")
+            if not db.export_to_excel(journals, filename):
+                return None
+
+    return counts
+
+
+def main(argv=None):
+    """
+    Точка входа для командной строки
+    """
+    arg_parser = argparse.ArgumentParser(
+        description="Пакетный экспорт журналов по шаблонам фильтров"
+    )
+    arg_parser.add_argument(
+        "--list", action="store_true", help="Показать сохраненные шаблоны"
+    )
+    arg_parser.add_argument(
+        "--preset", action="append",
+        help="Экспортировать только указанные шаблоны (можно повторять)"
+    )
+    arg_parser.add_argument(
+        "--files", action="store_true",
+        help="Сохранить каждый шаблон в отдельный файл"
+    )
+    arg_parser.add_argument(
+        "--output", default="vak_journals_presets.xlsx",
+        help="Книга Excel для экспорта на отдельные листы"
+    )
+    arg_parser.add_argument(
+        "--output-dir", default=None,
+        help="Директория для отдельных файлов (с --files)"
+    )
+    arg_parser.add_argument(
+        "--profile", action="store_true",
+        help="Сохранить профили CPU и памяти в директорию profiles"
+    )
+    args = arg_parser.parse_args(argv)
+
+    if args.profile:
+        profiling.enable()
+
+    presets = load_presets()
+    if args.list:
+        for preset in presets:
+            print(f"{preset['name']}: категории {preset.get('vak_categories')}, "
+                  f"уровни {preset.get('white_levels')}, RSCI {preset.get('rsci')}"
+                  + (f", поиск \"{preset['query']}\"" if preset.get("query") else "")
+                  + (f", выражение {preset['expression']}" if preset.get("expression") else ""))
+        return 0
+
+    if args.preset:
+        presets = [preset for preset in presets if preset["name"] in args.preset]
+        if not presets:
+            print("Указанные шаблоны не найдены")
+            return 1
+
+    # Импортируем здесь, чтобы --list работал без pandas
+    from db_manager import JournalDatabase
+    db = JournalDatabase(use_columnar=True)
+    if not db.journals:
+        print("База журналов пуста. Необходимо обновить базу.")
+        return 1
+
+    counts = batch_export(
+        db, presets,
+        output_file=None if args.files else args.output,
+        output_dir=args.output_dir
+    )
+    if counts is None:
+        print("Не удалось экспортировать данные")
+        return 1
+
+    for name, count in counts.items():
+        print(f"{name}: {count} журналов")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
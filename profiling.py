@@ -0,0 +1,200 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Необязательное профилирование обновления, загрузки и экспорта.
+
+Профилирование включается переменной окружения JOURNALS_PROFILE=1 или
+флагом --profile в командной строке парсера и пакетного экспорта.
+Профилируются действия целиком (обновление, загрузка базы, изменение
+фильтров в окне, экспорт), а не отдельные внутренние вызовы: счетчики
+фильтров вызывают фильтрацию много раз за одно действие. Для каждого
+действия в директорию profiles рядом с программой записываются:
+    <время>-<имя>.prof - профиль cProfile (открывается pstats/snakeviz)
+    <время>-<имя>.txt  - сводка: самые долгие функции и места, где
+                         выделено больше всего памяти (tracemalloc)
+
+Вложенные вызовы (например, filter_journals внутри экспорта) отдельно
+не профилируются - они входят в профиль внешнего вызова.
+
+Контекстный менеджер memory_budget проверяет, что пиковое потребление
+памяти в блоке не превышает заданного предела; он используется в
+benchmark.py (--memory-budget) для проверки загрузки базы.
+"""
+
+import cProfile
+import datetime
+import functools
+import inspect
+import io
+import os
+import pstats
+import threading
+import tracemalloc
+from contextlib import contextmanager
+
+from snapshots import get_app_dir
+
+
+PROFILE_ENV = "JOURNALS_PROFILE"
+PROFILES_DIRNAME = "profiles"
+
+# Сколько строк выводить в сводке
+TOP_FUNCTIONS = 30
+TOP_ALLOCATIONS = 20
+
+_enabled = None
+_state = threading.local()
+
+
+def is_enabled():
+    """
+    Включено ли профилирование (флагом или переменной окружения)
+    """
+    if _enabled is not None:
+        return _enabled
+    return os.environ.get(PROFILE_ENV, "").lower() in ("1", "true", "yes")
+
+
+def enable(flag=True):
+    """
+    Включение или отключение профилирования независимо от окружения
+
+    Args:
+        flag (bool | None): True/False; None - снова брать значение
+                            из переменной окружения
+    """
+    global _enabled
+    _enabled = flag
+
+
+def profiles_dir():
+    """
+    Директория для профилей
+    """
+    return os.path.join(get_app_dir(), PROFILES_DIRNAME)
+
+
+def _reset_peak():
+    # tracemalloc.reset_peak появился в Python 3.9
+    if hasattr(tracemalloc, "reset_peak"):
+        tracemalloc.reset_peak()
+
+
+def _write_report(name, profiler, snapshot, peak, seconds):
+    """
+    Сохранение профиля и сводки по нему
+
+    Returns:
+        str: Путь к файлу сводки
+    """
+    directory = profiles_dir()
+    os.makedirs(directory, exist_ok=True)
+    stamp = datetime.datetime.now().strftime("%Y%m%d-%H%M%S-%f")
+    base = os.path.join(directory, f"{stamp}-{name}")
+
+    profiler.dump_stats(base + ".prof")
+
+    stream = io.StringIO()
+    stream.write(f"{name}: {seconds:.3f} с, пик памяти {peak / 1024 / 1024:.1f} МБ\n\n")
+    stats = pstats.Stats(profiler, stream=stream)
+    stats.sort_stats("cumulative").print_stats(TOP_FUNCTIONS)
+
+    stream.write(f"\nБольше всего памяти выделено ({TOP_ALLOCATIONS}):\n")
+    for stat in snapshot.statistics("lineno")[:TOP_ALLOCATIONS]:
+        stream.write(f"{stat}\n")
+
+    with open(base + ".txt", 'w', encoding='utf-8') as file:
+        file.write(stream.getvalue())
+    return base + ".txt"
+
+
+@contextmanager
+def profile_block(name):
+    """
+    Профилирование блока кода, если профилирование включено
+
+    Args:
+        name (str): Имя профиля (используется в имени файла)
+    """
+    if not is_enabled() or getattr(_state, "active", False):
+        yield
+        return
+
+    _state.active = True
+    started_tracing = not tracemalloc.is_tracing()
+    if started_tracing:
+        tracemalloc.start()
+    _reset_peak()
+    profiler = cProfile.Profile()
+    start = datetime.datetime.now()
+    profiler.enable()
+    try:
+        yield
+    finally:
+        profiler.disable()
+        seconds = (datetime.datetime.now() - start).total_seconds()
+        snapshot = tracemalloc.take_snapshot()
+        _, peak = tracemalloc.get_traced_memory()
+        if started_tracing:
+            tracemalloc.stop()
+        _state.active = False
+        try:
+            report = _write_report(name, profiler, snapshot, peak, seconds)
+            print(f"Профиль {name} сохранен: {report}")
+        except Exception as e:
+            print(f"Ошибка при сохранении профиля {name}: {e}")
+
+
+def profiled(name=None):
+    """
+    Декоратор для профилирования функции или корутины
+
+    Args:
+        name (str, optional): Имя профиля; по умолчанию - имя функции
+    """
+    def decorator(func):
+        profile_name = name or func.__name__
+
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                with profile_block(profile_name):
+                    return await func(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with profile_block(profile_name):
+                return func(*args, **kwargs)
+        return wrapper
+
+    return decorator
+
+
+@contextmanager
+def memory_budget(limit_bytes):
+    """
+    Проверка пикового потребления памяти в блоке кода
+
+    Args:
+        limit_bytes (int): Допустимый пик выделенной памяти в байтах
+
+    Raises:
+        AssertionError: если пик превысил limit_bytes
+    """
+    started_tracing = not tracemalloc.is_tracing()
+    if started_tracing:
+        tracemalloc.start()
+    baseline, _ = tracemalloc.get_traced_memory()
+    _reset_peak()
+    try:
+        yield
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        if started_tracing:
+            tracemalloc.stop()
+    used = peak - baseline
+    assert used <= limit_bytes, (
+        f"Превышен бюджет памяти: {used} байт при пределе {limit_bytes}"
+    )
@@ -0,0 +1,197 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Актуальность журналов по периодам включения в перечень ВАК.
+
+Строки вида "с DD.MM.YYYY по DD.MM.YYYY" разбираются один раз при парсинге
+в пары порядковых номеров дат (date.toordinal) и хранятся в записи журнала
+у каждой специальности в поле "interval". Индекс периодов (дерево
+интервалов) отвечает на вопрос "какие журналы актуальны на дату X" для
+любой даты - прошлой, текущей или будущей - без разбора строк и без
+просмотра всех периодов.
+
+Журнал актуален на дату, если она попадает хотя бы в один его период.
+Период, который еще не начался, журнал актуальным не делает (до перехода
+на периоды журнал считался неактуальным, только если какой-либо его
+период уже закончился). Журналы без периодов актуальны, если в записи
+не сохранен флаг relevance = False.
+"""
+
+import datetime
+import re
+
+
+DATE_PATTERN = r'(\d{2})\.(\d{2})\.(\d{4})'
+
+
+def _to_ordinal(match):
+    day, month, year = map(int, match.groups())
+    try:
+        return datetime.date(year, month, day).toordinal()
+    except ValueError:
+        return None
+
+
+def parse_interval(date_text):
+    """
+    Разбор периода включения в перечень
+
+    Args:
+        date_text (str): Строка вида "с 01.02.2022 по 31.12.2025"
+                         или "с 01.02.2022"
+
+    Returns:
+        list: [начало, конец] в виде порядковых номеров дат; None вместо
+              границы означает открытый период. None, если в строке
+              нет ни одной даты.
+    """
+    if not date_text:
+        return None
+
+    start_match = re.search(r'с\s*' + DATE_PATTERN, date_text)
+    end_match = re.search(r'по\s*' + DATE_PATTERN, date_text)
+    if not start_match and not end_match:
+        return None
+
+    start = _to_ordinal(start_match) if start_match else None
+    end = _to_ordinal(end_match) if end_match else None
+    return [start, end]
+
+
+def specialty_interval(specialty):
+    """
+    Период специальности из записи; для старых файлов без поля
+    "interval" разбирается строка даты
+    """
+    if "interval" in specialty:
+        return specialty["interval"]
+    return parse_interval(specialty.get("date", ""))
+
+
+def as_of_ordinal(as_of=None):
+    """
+    Порядковый номер даты; по умолчанию - сегодняшней
+
+    Args:
+        as_of (datetime.date | int | None): Дата или ее порядковый номер
+    """
+    if as_of is None:
+        return datetime.date.today().toordinal()
+    if isinstance(as_of, int):
+        return as_of
+    return as_of.toordinal()
+
+
+class _IntervalNode:
+    """
+    Узел дерева интервалов: периоды, содержащие точку center,
+    и поддеревья с периодами левее и правее нее
+    """
+
+    __slots__ = ("center", "by_start", "by_end", "left", "right")
+
+    def __init__(self, intervals):
+        endpoints = sorted(
+            point for start, end, _ in intervals for point in (start, end)
+        )
+        self.center = endpoints[len(endpoints) // 2]
+        left, right, here = [], [], []
+        for interval in intervals:
+            start, end, _ = interval
+            if end < self.center:
+                left.append(interval)
+            elif start > self.center:
+                right.append(interval)
+            else:
+                here.append(interval)
+        # Для даты левее центра нужны периоды, начавшиеся не позже нее,
+        # для даты правее - закончившиеся не раньше нее
+        self.by_start = sorted(here, key=lambda item: item[0])
+        self.by_end = sorted(here, key=lambda item: item[1], reverse=True)
+        self.left = _IntervalNode(left) if left else None
+        self.right = _IntervalNode(right) if right else None
+
+
+class RelevanceIndex:
+    """
+    Индекс периодов включения журналов в перечень. Журналы
+    идентифицируются номером в списке, по которому построен индекс:
+    поле "id" (номер строки на сайте) не уникально. Индекс
+    перестраивается при каждом изменении состава списка.
+    """
+
+    # Сколько результатов для разных дат хранить в кэше
+    CACHE_SIZE = 8
+
+    def __init__(self, journals):
+        """
+        Построение индекса
+
+        Args:
+            journals (list): Список журналов базы
+        """
+        # Периоды: (начало, конец, номер журнала)
+        intervals = []
+        # Журналы без периодов и их сохраненный флаг актуальности
+        self.undated = set()
+
+        for position, journal in enumerate(journals):
+            has_interval = False
+            for specialty in journal.get("specialties", []):
+                interval = specialty_interval(specialty)
+                if not interval:
+                    continue
+                start, end = interval
+                start = start if start is not None else -1
+                end = end if end is not None else float("inf")
+                has_interval = True
+                # Период с концом раньше начала не содержит ни одной даты
+                if start <= end:
+                    intervals.append((start, end, position))
+            if not has_interval and journal.get("relevance", True) is not False:
+                self.undated.add(position)
+
+        self.root = _IntervalNode(intervals) if intervals else None
+        self.cache = {}
+
+    def relevant_positions(self, as_of=None):
+        """
+        Номера журналов, актуальных на дату. Просматриваются только узлы
+        дерева на пути к дате и подходящие периоды.
+
+        Args:
+            as_of (datetime.date | int | None): Дата; по умолчанию сегодня
+
+        Returns:
+            frozenset: Номера актуальных журналов в списке
+        """
+        day = as_of_ordinal(as_of)
+        cached = self.cache.get(day)
+        if cached is not None:
+            return cached
+
+        relevant = set(self.undated)
+        node = self.root
+        while node is not None:
+            if day < node.center:
+                for start, _, position in node.by_start:
+                    if start > day:
+                        break
+                    relevant.add(position)
+                node = node.left
+            elif day > node.center:
+                for _, end, position in node.by_end:
+                    if end < day:
+                        break
+                    relevant.add(position)
+                node = node.right
+            else:
+                relevant.update(position for _, _, position in node.by_start)
+                break
+        result = frozenset(relevant)
+
+        if len(self.cache) >= self.CACHE_SIZE:
+            self.cache.pop(next(iter(self.cache)))
+        self.cache[day] = result
+        return result
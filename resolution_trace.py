@@ -0,0 +1,289 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Трассировка проверки журналов в РЦНИ.
+
+Для каждой проверки журнала (check_rcsi_status, revalidate_rcsi_status)
+записывается, какие запросы выполнялись и в каком порядке (поиск по ISSN,
+поиск по названию, детальная страница, запрос rs=true), их результат,
+время и объем ответа, а также какая ветка определила итог. Записи дописываются в файл
+resolution_traces.jsonl (одна строка JSON на журнал).
+
+Сводка по количеству запросов на журнал для каждого итога:
+    python resolution_trace.py
+    python resolution_trace.py --all
+"""
+
+import argparse
+import datetime
+import json
+import os
+import sys
+import time
+from collections import Counter
+
+from snapshots import get_app_dir
+
+
+TRACE_FILENAME = "resolution_traces.jsonl"
+
+# Итоги проверки (какая ветка определила результат)
+OUTCOMES = (
+    "revalidated",     # статус обновлен по сохраненной ссылке rcsi_url
+    "stale_url",       # сохраненная ссылка устарела (далее - обычная проверка)
+    "issn_catalogue",  # найден по ISSN в локальном каталоге
+    "issn_search",     # найден поиском по ISSN
+    "title_index",     # найден в локальном индексе названий
+    "name_search",     # найден поиском по названию на сайте
+    "not_found",       # не найден
+    "no_identifiers",  # нет ни ISSN, ни названия
+    "error",           # ошибка при проверке
+)
+
+
+class ResolutionTrace:
+    """
+    Трасса проверки одного журнала.
+    """
+
+    def __init__(self, issn="", journal_name=""):
+        self.issn = issn
+        self.journal_name = journal_name
+        self.steps = []
+        self.outcome = None
+        self.resolved = False
+        # "search_row" - статус взят из строки результатов поиска,
+        # "detail" - с детальной страницы
+        self.resolved_from = None
+        self.started = time.perf_counter()
+
+    def start_step(self, step):
+        """
+        Начало запроса
+
+        Args:
+            step (str): "issn_search", "name_search", "detail" или "rsci_search"
+
+        Returns:
+            dict: Запись шага (заполняется в finish_step)
+        """
+        entry = {"step": step, "status": "pending", "ms": 0.0, "bytes": 0}
+        entry["_started"] = time.perf_counter()
+        self.steps.append(entry)
+        return entry
+
+    @staticmethod
+    def finish_step(entry, status, size=0):
+        """
+        Завершение запроса
+
+        Args:
+            entry (dict): Запись шага из start_step
+            status (str): "ok", "empty" или "error: <тип ошибки>"
+            size (int): Объем ответа в байтах
+        """
+        entry["ms"] = round((time.perf_counter() - entry.pop("_started")) * 1000, 1)
+        entry["status"] = status
+        entry["bytes"] = size
+
+    def mark_last(self, status):
+        """
+        Уточнение результата последнего запроса (например, "empty",
+        если поиск ничего не нашел)
+        """
+        if self.steps:
+            self.steps[-1]["status"] = status
+
+    def finish(self, outcome, status=None):
+        """
+        Фиксация итога проверки
+
+        Args:
+            outcome (str): Один из OUTCOMES
+            status (dict, optional): Результат check_rcsi_status
+        """
+        self.outcome = outcome
+        self.resolved = bool(status) and status.get("white_level") != "none"
+
+    def to_dict(self):
+        return {
+            "issn": self.issn,
+            "name": self.journal_name,
+            "outcome": self.outcome or "error",
+            "resolved": self.resolved,
+            "resolved_from": self.resolved_from,
+            "requests": len(self.steps),
+            "ms": round((time.perf_counter() - self.started) * 1000, 1),
+            "steps": self.steps,
+        }
+
+
+async def traced(trace, step, coro):
+    """
+    Выполнение запроса с записью в трассу
+
+    Args:
+        trace (ResolutionTrace | None): Трасса; None - без записи
+        step (str): Название шага
+        coro: Корутина, возвращающая текст страницы
+
+    Returns:
+        str: Текст страницы
+    """
+    if trace is None:
+        return await coro
+    entry = trace.start_step(step)
+    try:
+        text = await coro
+    except Exception as e:
+        trace.finish_step(entry, f"error: {type(e).__name__}")
+        raise
+    trace.finish_step(entry, "ok", len(text.encode('utf-8')))
+    return text
+
+
+class TraceLog:
+    """
+    Журнал трасс в формате JSON Lines.
+    """
+
+    def __init__(self, filename=None, run=None):
+        """
+        Args:
+            filename (str, optional): Файл журнала; по умолчанию
+                                      resolution_traces.jsonl рядом с программой
+            run (str, optional): Идентификатор обновления; по умолчанию -
+                                 время создания
+        """
+        self.filename = filename or os.path.join(get_app_dir(), TRACE_FILENAME)
+        self.run = run or datetime.datetime.now().strftime("%Y%m%d-%H%M%S")
+
+    def append(self, trace):
+        """
+        Дозапись трассы одного журнала
+        """
+        record = trace.to_dict()
+        record["run"] = self.run
+        try:
+            with open(self.filename, 'a', encoding='utf-8') as file:
+                file.write(json.dumps(record, ensure_ascii=False) + "\n")
+        except Exception as e:
+            print(f"Ошибка при записи трассы: {e}")
+
+
+def load_traces(filename=None, run=None):
+    """
+    Чтение трасс
+
+    Args:
+        filename (str, optional): Файл журнала трасс
+        run (str, optional): Только трассы этого обновления;
+                             "last" - последнего
+
+    Returns:
+        list: Записи трасс
+    """
+    filename = filename or os.path.join(get_app_dir(), TRACE_FILENAME)
+    if not os.path.exists(filename):
+        return []
+    traces = []
+    with open(filename, 'r', encoding='utf-8') as file:
+        for line in file:
+            line = line.strip()
+            if line:
+                traces.append(json.loads(line))
+    if run == "last" and traces:
+        run = traces[-1].get("run")
+    if run:
+        traces = [trace for trace in traces if trace.get("run") == run]
+    return traces
+
+
+def summarize(traces):
+    """
+    Сводка по количеству запросов на журнал для каждого итога
+
+    Returns:
+        dict: {итог: {"journals", "requests", "mean_requests", "mean_ms",
+                      "mean_kb", "from_search_row", "distribution", "steps"}}
+    """
+    summary = {}
+    for trace in traces:
+        group = summary.setdefault(trace["outcome"], {
+            "journals": 0, "requests": 0, "ms": 0.0, "bytes": 0,
+            "from_search_row": 0,
+            "distribution": Counter(), "steps": Counter()
+        })
+        group["journals"] += 1
+        if trace.get("resolved_from") == "search_row":
+            group["from_search_row"] += 1
+        group["requests"] += trace["requests"]
+        group["ms"] += trace["ms"]
+        group["distribution"][trace["requests"]] += 1
+        for step in trace["steps"]:
+            group["bytes"] += step["bytes"]
+            group["steps"][step["step"]] += 1
+
+    for group in summary.values():
+        count = group["journals"]
+        group["mean_requests"] = group["requests"] / count
+        group["mean_ms"] = group.pop("ms") / count
+        group["mean_kb"] = group.pop("bytes") / count / 1024
+    return summary
+
+
+def print_summary(summary):
+    """
+    Вывод сводки в виде таблицы
+    """
+    total_journals = sum(group["journals"] for group in summary.values())
+    total_requests = sum(group["requests"] for group in summary.values())
+    print(f"Журналов: {total_journals}, запросов: {total_requests}")
+    print(f"{'Итог':<15} {'Журналов':>9} {'Запросов':>9} {'На журнал':>10} "
+          f"{'мс':>8} {'КБ':>7} {'Без детальной':>14}  Распределение / шаги")
+    ordered = sorted(summary, key=lambda outcome: (
+        OUTCOMES.index(outcome) if outcome in OUTCOMES else len(OUTCOMES)
+    ))
+    for outcome in ordered:
+        group = summary[outcome]
+        distribution = ", ".join(
+            f"{requests}: {count}"
+            for requests, count in sorted(group["distribution"].items())
+        )
+        steps = ", ".join(
+            f"{step} {count}" for step, count in group["steps"].most_common()
+        )
+        print(f"{outcome:<15} {group['journals']:>9} {group['requests']:>9} "
+              f"{group['mean_requests']:>10.2f} {group['mean_ms']:>8.0f} "
+              f"{group['mean_kb']:>7.1f} {group['from_search_row']:>14}  "
+              f"{{{distribution}}} {steps}")
+
+
+def main(argv=None):
+    """
+    Точка входа для командной строки
+    """
+    arg_parser = argparse.ArgumentParser(
+        description="Сводка по трассам проверки журналов в РЦНИ"
+    )
+    arg_parser.add_argument("--file", default=None, help="Файл трасс")
+    arg_parser.add_argument(
+        "--run", default="last",
+        help="Идентификатор обновления (по умолчанию последнее)"
+    )
+    arg_parser.add_argument(
+        "--all", action="store_true", help="Учитывать все обновления"
+    )
+    args = arg_parser.parse_args(argv)
+
+    traces = load_traces(args.file, None if args.all else args.run)
+    if not traces:
+        print("Трассы не найдены")
+        return 1
+    print_summary(summarize(traces))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,245 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Таблица результатов фильтрации с виртуальной прокруткой.
+
+В ttk.Treeview создается только столько строк, сколько помещается
+на экране; при прокрутке у этих строк меняются значения. Поэтому таблица
+остается быстрой и на десятках тысяч журналов. Сортировка по колонкам
+использует порядки, заранее вычисленные базой при загрузке.
+"""
+
+import tkinter as tk
+import webbrowser
+from tkinter import ttk
+
+
+class VirtualJournalGrid(ttk.Frame):
+    """
+    Таблица журналов с виртуальной прокруткой и сортировкой по колонкам.
+    """
+
+    # Ключ записи, заголовок, ширина колонки
+    COLUMNS = (
+        ("name_of_publication", "Название журнала", 380),
+        ("issn", "ISSN", 120),
+        ("vak_category", "Категория ВАК", 100),
+        ("white_level", "Белый список", 100),
+        ("RSCI", "RSCI", 60),
+    )
+
+    # Высота строки в пикселях для расчета числа видимых строк
+    ROW_HEIGHT = 20
+    HEADER_HEIGHT = 25
+
+    def __init__(self, master, **kwargs):
+        """
+        Инициализация таблицы
+
+        Args:
+            master: Родительский виджет
+        """
+        super().__init__(master, **kwargs)
+
+        self.source = []
+        self.sort_orders = {}
+        self.filtered = []
+        self.filtered_ids = set()
+        self.rows = []
+        self.offset = 0
+        self.visible_count = 10
+        self.sort_key = None
+        self.sort_descending = False
+        self.item_ids = []
+
+        self.tree = ttk.Treeview(
+            self,
+            columns=[key for key, _, _ in self.COLUMNS],
+            show="headings",
+            selectmode="browse"
+        )
+        for key, title, width in self.COLUMNS:
+            self.tree.heading(
+                key, text=title,
+                command=lambda column=key: self.sort_by(column)
+            )
+            self.tree.column(
+                key, width=width,
+                stretch=key == "name_of_publication",
+                anchor=tk.W if key == "name_of_publication" else tk.CENTER
+            )
+
+        self.scrollbar = ttk.Scrollbar(
+            self, orient=tk.VERTICAL, command=self._on_scrollbar
+        )
+        self.tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        self.scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+
+        self.tree.bind("<Configure>", self._on_resize)
+        self.tree.bind("<MouseWheel>", self._on_mousewheel)
+        self.tree.bind("<Button-4>", lambda event: self.scroll(-3))
+        self.tree.bind("<Button-5>", lambda event: self.scroll(3))
+        self.tree.bind("<Prior>", lambda event: self.scroll(-self.visible_count))
+        self.tree.bind("<Next>", lambda event: self.scroll(self.visible_count))
+        self.tree.bind("<Double-1>", self._on_double_click)
+
+    def set_source(self, journals, sort_orders):
+        """
+        Установка полного списка журналов и заранее вычисленных
+        порядков сортировки
+
+        Args:
+            journals (list): Все журналы базы
+            sort_orders (dict): {ключ колонки: список индексов журналов}
+        """
+        self.source = journals
+        self.sort_orders = sort_orders
+
+    def set_rows(self, journals):
+        """
+        Отображение нового набора журналов. Перерисовываются только
+        видимые строки.
+
+        Args:
+            journals (list): Журналы для отображения
+        """
+        self.filtered = journals
+        self.filtered_ids = {id(journal) for journal in journals}
+        self._apply_order()
+        self.offset = 0
+        self._render()
+
+    def selected_journal(self):
+        """
+        Журнал в выделенной строке
+
+        Returns:
+            dict: Запись журнала или None, если ничего не выделено
+        """
+        for item_id in self.tree.selection():
+            if item_id in self.item_ids:
+                return self.rows[self.offset + self.item_ids.index(item_id)]
+        return None
+
+    def sort_by(self, column):
+        """
+        Сортировка по колонке; повторный щелчок меняет направление
+        """
+        if self.sort_key == column:
+            self.sort_descending = not self.sort_descending
+        else:
+            self.sort_key = column
+            self.sort_descending = False
+
+        for key, title, _ in self.COLUMNS:
+            marker = ""
+            if key == self.sort_key:
+                marker = " ▼" if self.sort_descending else " ▲"
+            self.tree.heading(key, text=title + marker)
+
+        self._apply_order()
+        self._render()
+
+    def _apply_order(self):
+        order = self.sort_orders.get(self.sort_key)
+        if order is None:
+            self.rows = list(self.filtered)
+        else:
+            # Проходим по готовому порядку и оставляем отфильтрованные
+            self.rows = [
+                self.source[index] for index in order
+                if id(self.source[index]) in self.filtered_ids
+            ]
+        if self.sort_descending:
+            self.rows.reverse()
+
+    def scroll(self, delta):
+        """
+        Прокрутка на delta строк
+        """
+        self._set_offset(self.offset + delta)
+        return "break"
+
+    def _set_offset(self, offset):
+        max_offset = max(0, len(self.rows) - self.visible_count)
+        offset = min(max(0, int(offset)), max_offset)
+        if offset != self.offset:
+            self.offset = offset
+            self._render()
+        else:
+            self._update_scrollbar()
+
+    def _on_scrollbar(self, action, value, unit=None):
+        if action == "moveto":
+            self._set_offset(float(value) * len(self.rows))
+        elif action == "scroll":
+            step = self.visible_count if unit == "pages" else 1
+            self._set_offset(self.offset + int(value) * step)
+
+    def _on_mousewheel(self, event):
+        return self.scroll(-3 if event.delta > 0 else 3)
+
+    def _on_resize(self, event):
+        count = max(1, (event.height - self.HEADER_HEIGHT) // self.ROW_HEIGHT)
+        if count != self.visible_count:
+            self.visible_count = count
+            self._set_offset(self.offset)
+            self._render()
+
+    def _values(self, journal):
+        return (
+            journal.get("name_of_publication", ""),
+            journal.get("issn", ""),
+            journal.get("vak_category", "none"),
+            journal.get("white_level", "none"),
+            "Да" if journal.get("RSCI") else "Нет",
+        )
+
+    def _render(self):
+        needed = min(self.visible_count, len(self.rows) - self.offset)
+        needed = max(needed, 0)
+
+        # Создаем или удаляем строки, чтобы их было ровно столько,
+        # сколько видно на экране
+        while len(self.item_ids) < needed:
+            self.item_ids.append(self.tree.insert("", tk.END, values=()))
+        while len(self.item_ids) > needed:
+            self.tree.delete(self.item_ids.pop())
+
+        for position, item_id in enumerate(self.item_ids):
+            self.tree.item(
+                item_id, values=self._values(self.rows[self.offset + position])
+            )
+        self.tree.selection_set(())
+        self._update_scrollbar()
+
+    def _update_scrollbar(self):
+        if not self.rows:
+            self.scrollbar.set(0, 1)
+            return
+        total = len(self.rows)
+        first = self.offset / total
+        last = min(1.0, (self.offset + self.visible_count) / total)
+        self.scrollbar.set(first, last)
+
+    def _on_double_click(self, event):
+        item_id = self.tree.identify_row(event.y)
+        if not item_id or item_id not in self.item_ids:
+            return
+        journal = self.rows[self.offset + self.item_ids.index(item_id)]
+
+        # В колонке белого списка или RSCI открываем страницу РЦНИ,
+        # в остальных - страницу elibrary
+        column_id = self.tree.identify_column(event.x)
+        column = ""
+        if column_id and column_id[1:].isdigit():
+            column = self.COLUMNS[int(column_id[1:]) - 1][0]
+        urls = [journal.get("elibrary_url"), journal.get("rcsi_url")]
+        if column in ("white_level", "RSCI"):
+            urls.reverse()
+
+        for url in urls:
+            if url and url != "none":
+                webbrowser.open(url)
+                return
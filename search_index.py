@@ -0,0 +1,138 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Полнотекстовый поиск журналов по названию и шифрам специальностей.
+
+При загрузке базы строится инвертированный индекс: слово названия
+(в нижнем регистре, "ё" приравнена к "е") -> номера журналов, и шифр
+специальности ("2.3.4") -> номера журналов. Поиск по префиксу слова
+выполняется двоичным поиском по отсортированному словарю.
+"""
+
+import bisect
+import re
+
+from normalize import normalize_title
+
+
+# Шифр специальности или его начало: "2", "2.3", "2.3.4"
+SPECIALTY_CODE_PATTERN = re.compile(r'^\d+(\.\d+)*\.?$')
+SPECIALTY_CODE_IN_TEXT = re.compile(r'\d+\.\d+\.\d+')
+
+# Веса совпадений для ранжирования
+EXACT_WORD_WEIGHT = 3.0
+PREFIX_WORD_WEIGHT = 1.0
+SPECIALTY_WEIGHT = 2.0
+
+
+def tokenize(text):
+    """
+    Разбиение текста на нормализованные слова
+    """
+    return normalize_title(text).split()
+
+
+class JournalSearchIndex:
+    """
+    Инвертированный индекс по названиям журналов и шифрам специальностей.
+    """
+
+    def __init__(self, journals):
+        """
+        Построение индекса
+
+        Args:
+            journals (list): Список журналов базы
+        """
+        self.words = {}
+        self.codes = {}
+        self.title_lengths = []
+
+        for index, journal in enumerate(journals):
+            tokens = tokenize(journal.get("name_of_publication", ""))
+            self.title_lengths.append(len(tokens))
+            for token in set(tokens):
+                self.words.setdefault(token, set()).add(index)
+
+            for specialty in journal.get("specialties", []):
+                text = specialty.get("scientific_specialty", "")
+                for code in SPECIALTY_CODE_IN_TEXT.findall(text):
+                    self.codes.setdefault(code, set()).add(index)
+
+        self.sorted_words = sorted(self.words)
+        self.sorted_codes = sorted(self.codes)
+
+    @staticmethod
+    def _prefixed(sorted_keys, prefix):
+        start = bisect.bisect_left(sorted_keys, prefix)
+        for position in range(start, len(sorted_keys)):
+            key = sorted_keys[position]
+            if not key.startswith(prefix):
+                break
+            yield key
+
+    def _match_code(self, term):
+        code = term.rstrip('.')
+        scores = {}
+        for key in self._prefixed(self.sorted_codes, code):
+            # "2.3" совпадает с "2.3.4", но не с "2.31.1"
+            if key != code and not key.startswith(code + '.'):
+                continue
+            for index in self.codes[key]:
+                scores[index] = SPECIALTY_WEIGHT
+        return scores
+
+    def _match_word(self, term):
+        scores = {}
+        for key in self._prefixed(self.sorted_words, term):
+            weight = EXACT_WORD_WEIGHT if key == term else PREFIX_WORD_WEIGHT
+            for index in self.words[key]:
+                if scores.get(index, 0) < weight:
+                    scores[index] = weight
+        return scores
+
+    def search(self, query):
+        """
+        Поиск журналов. Каждое слово запроса должно совпасть с началом
+        слова названия или с шифром специальности.
+
+        Args:
+            query (str): Строка запроса
+
+        Returns:
+            list: Номера журналов, от более релевантных к менее
+        """
+        terms = []
+        for raw in query.split():
+            if SPECIALTY_CODE_PATTERN.match(raw):
+                terms.append((True, raw))
+            else:
+                terms.extend((False, token) for token in tokenize(raw))
+        if not terms:
+            return []
+
+        total = None
+        for is_code, term in terms:
+            if is_code:
+                scores = self._match_code(term)
+                # Число без точек может быть и словом названия ("Серия 2")
+                if '.' not in term:
+                    for index, score in self._match_word(term).items():
+                        scores[index] = max(scores.get(index, 0), score)
+            else:
+                scores = self._match_word(term)
+            if total is None:
+                total = scores
+            else:
+                total = {
+                    index: total[index] + score
+                    for index, score in scores.items() if index in total
+                }
+            if not total:
+                return []
+
+        # Более короткие названия при равном счете считаются точнее
+        return sorted(
+            total, key=lambda index: (-total[index], self.title_lengths[index])
+        )
@@ -0,0 +1,518 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Модуль для хранения версий базы журналов и сравнения версий между собой.
+
+Каждое обновление сохраняется как версия со своим хешем содержимого для
+каждой записи. Хранятся только изменения относительно предыдущей версии
+(дельты), а каждые FULL_SNAPSHOT_INTERVAL версий - полная копия, чтобы
+восстановление не требовало длинной цепочки дельт. Хеши записей лежат
+в отдельных небольших файлах, поэтому сравнение версий не требует
+загрузки самих записей и выполняется за линейное время.
+
+Запуск из командной строки:
+    python snapshots.py list
+    python snapshots.py diff [старая_версия] [новая_версия] [--details]
+"""
+
+import argparse
+import datetime
+import gzip
+import hashlib
+import json
+import os
+import sys
+import time
+from contextlib import contextmanager
+
+from normalize import journal_key
+
+if os.name == 'nt':
+    import msvcrt
+else:
+    import fcntl
+
+
+# Каждая N-я версия сохраняется целиком
+FULL_SNAPSHOT_INTERVAL = 10
+
+# Поля, не влияющие на содержимое записи (порядковый номер на сайте
+# и время последней проверки)
+HASH_IGNORED_FIELDS = ("id", "checked_at")
+
+
+def get_app_dir():
+    """
+    Определяет директорию приложения (директория, где находится EXE)
+
+    Returns:
+        str: Путь к директории приложения
+    """
+    if getattr(sys, 'frozen', False):
+        # Если запущено как EXE
+        return os.path.dirname(sys.executable)
+    # Если запущено как скрипт
+    return os.path.dirname(os.path.abspath(__file__))
+
+
+# Сколько раз повторять замену файла, если его держит открытым
+# другой процесс (в Windows замена открытого файла невозможна)
+REPLACE_RETRIES = 20
+REPLACE_RETRY_DELAY = 0.05
+
+
+def write_bytes_atomic(filename, data):
+    """
+    Записывает данные во временный файл и заменяет им исходный, чтобы
+    читатели никогда не видели наполовину записанный файл
+
+    Args:
+        filename (str): Путь к файлу
+        data (bytes): Содержимое файла
+    """
+    temp_filename = f"{filename}.{os.getpid()}.tmp"
+    try:
+        with open(temp_filename, 'wb') as file:
+            file.write(data)
+            file.flush()
+            os.fsync(file.fileno())
+        for attempt in range(REPLACE_RETRIES):
+            try:
+                os.replace(temp_filename, filename)
+                break
+            except PermissionError:
+                # Читатель еще не закрыл файл
+                if attempt == REPLACE_RETRIES - 1:
+                    raise
+                time.sleep(REPLACE_RETRY_DELAY)
+    finally:
+        if os.path.exists(temp_filename):
+            os.remove(temp_filename)
+
+
+# Сколько ждать освобождения блокировки другим процессом
+LOCK_TIMEOUT = 60
+LOCK_POLL_INTERVAL = 0.1
+
+
+def _try_lock(file):
+    if os.name == 'nt':
+        file.seek(0)
+        msvcrt.locking(file.fileno(), msvcrt.LK_NBLCK, 1)
+    else:
+        fcntl.flock(file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+
+
+def _unlock(file):
+    if os.name == 'nt':
+        file.seek(0)
+        msvcrt.locking(file.fileno(), msvcrt.LK_UNLCK, 1)
+    else:
+        fcntl.flock(file.fileno(), fcntl.LOCK_UN)
+
+
+@contextmanager
+def file_lock(lock_filename, timeout=LOCK_TIMEOUT, message=None):
+    """
+    Исключительная блокировка между процессами через файл блокировки
+
+    Args:
+        lock_filename (str): Путь к файлу блокировки
+        timeout (float): Сколько секунд ждать блокировки
+        message (str, optional): Текст ошибки при истечении ожидания
+
+    Raises:
+        TimeoutError: если блокировку не удалось получить за timeout секунд
+    """
+    with open(lock_filename, 'a+b') as file:
+        deadline = time.monotonic() + timeout
+        while True:
+            try:
+                _try_lock(file)
+                break
+            except OSError:
+                if time.monotonic() >= deadline:
+                    raise TimeoutError(
+                        message or f"Файл занят другим процессом: {lock_filename}"
+                    )
+                time.sleep(LOCK_POLL_INTERVAL)
+        try:
+            yield
+        finally:
+            _unlock(file)
+
+
+def write_json_atomic(filename, data, indent=None):
+    """
+    Атомарно записывает JSON (см. write_bytes_atomic)
+
+    Args:
+        filename (str): Путь к файлу
+        data: Данные для сохранения
+        indent (int, optional): Отступ JSON
+    """
+    text = json.dumps(data, ensure_ascii=False, indent=indent)
+    write_bytes_atomic(filename, text.encode('utf-8'))
+
+
+def record_hash(journal):
+    """
+    Вычисляет хеш содержимого записи журнала
+
+    Args:
+        journal (dict): Запись журнала
+
+    Returns:
+        str: Шестнадцатеричный хеш записи
+    """
+    content = {
+        key: value for key, value in journal.items()
+        if key not in HASH_IGNORED_FIELDS
+    }
+    data = json.dumps(content, ensure_ascii=False, sort_keys=True)
+    return hashlib.sha1(data.encode('utf-8')).hexdigest()[:16]
+
+
+def index_records(journals):
+    """
+    Строит словарь {ключ журнала: запись}. Повторяющиеся ключи
+    получают суффикс с порядковым номером.
+
+    Args:
+        journals (list): Список журналов
+
+    Returns:
+        dict: Записи по ключам
+    """
+    records = {}
+    for journal in journals:
+        key = journal_key(journal)
+        unique_key = key
+        suffix = 2
+        while unique_key in records:
+            unique_key = f"{key}#{suffix}"
+            suffix += 1
+        records[unique_key] = journal
+    return records
+
+
+def diff_hashes(old_hashes, new_hashes):
+    """
+    Сравнивает две версии по хешам записей
+
+    Args:
+        old_hashes (dict): Хеши старой версии {ключ: хеш}
+        new_hashes (dict): Хеши новой версии {ключ: хеш}
+
+    Returns:
+        dict: Словарь со списками ключей added, removed, changed
+    """
+    added = []
+    changed = []
+    for key, value in new_hashes.items():
+        old_value = old_hashes.get(key)
+        if old_value is None:
+            added.append(key)
+        elif old_value != value:
+            changed.append(key)
+    removed = [key for key in old_hashes if key not in new_hashes]
+
+    return {
+        "added": added,
+        "removed": removed,
+        "changed": changed
+    }
+
+
+class SnapshotStore:
+    """
+    Хранилище версий базы журналов.
+    """
+
+    def __init__(self, directory="snapshots"):
+        """
+        Инициализация хранилища версий
+
+        Args:
+            directory (str): Директория для хранения версий
+        """
+        self.directory = os.path.join(get_app_dir(), directory)
+        self.index_file = os.path.join(self.directory, "index.json")
+        self.lock_file = self.index_file + ".lock"
+
+    def _path(self, version, kind):
+        if kind == "hashes":
+            return os.path.join(self.directory, f"{version}.hashes.json")
+        return os.path.join(self.directory, f"{version}.records.json.gz")
+
+    def list_versions(self):
+        """
+        Получение списка версий от старой к новой
+
+        Returns:
+            list: Список словарей с описанием версий
+        """
+        if not os.path.exists(self.index_file):
+            return []
+        try:
+            with open(self.index_file, 'r', encoding='utf-8') as file:
+                return json.load(file)
+        except Exception as e:
+            print(f"Ошибка при чтении списка версий: {e}")
+            return []
+
+    def latest_version(self):
+        """
+        Returns:
+            str: Идентификатор последней версии или None
+        """
+        versions = self.list_versions()
+        return versions[-1]["version"] if versions else None
+
+    def load_hashes(self, version):
+        """
+        Загрузка хешей записей версии (без самих записей)
+
+        Args:
+            version (str): Идентификатор версии
+
+        Returns:
+            dict: Хеши записей {ключ: хеш}
+        """
+        with open(self._path(version, "hashes"), 'r', encoding='utf-8') as file:
+            return json.load(file)
+
+    def _load_records_file(self, version):
+        with gzip.open(self._path(version, "records"), 'rt', encoding='utf-8') as file:
+            return json.load(file)
+
+    def load_records(self, version):
+        """
+        Восстановление записей версии из ближайшей полной копии и дельт
+
+        Args:
+            version (str): Идентификатор версии
+
+        Returns:
+            dict: Записи версии {ключ: запись}
+        """
+        versions = self.list_versions()
+        position = next(
+            (i for i, item in enumerate(versions) if item["version"] == version),
+            None
+        )
+        if position is None:
+            raise KeyError(f"Версия {version} не найдена")
+
+        # Ищем ближайшую полную копию
+        start = position
+        while start > 0 and not versions[start].get("full"):
+            start -= 1
+
+        records = {}
+        for item in versions[start:position + 1]:
+            data = self._load_records_file(item["version"])
+            if item.get("full"):
+                records = data["upserts"]
+            else:
+                records.update(data["upserts"])
+                for key in data["removed"]:
+                    records.pop(key, None)
+        return records
+
+    def commit(self, journals):
+        """
+        Сохранение новой версии базы журналов. Если содержимое не
+        изменилось, новая версия не создается. Версии сохраняют демон,
+        GUI и координатор очереди, поэтому чтение и дополнение списка
+        версий выполняются под блокировкой index.json.lock.
+
+        Args:
+            journals (list): Список журналов
+
+        Returns:
+            str: Идентификатор новой версии или None, если изменений нет
+        """
+        records = index_records(journals)
+        hashes = {key: record_hash(record) for key, record in records.items()}
+
+        os.makedirs(self.directory, exist_ok=True)
+        with file_lock(self.lock_file, message="Список версий занят другим процессом"):
+            return self._commit_locked(records, hashes)
+
+    def _commit_locked(self, records, hashes):
+        versions = self.list_versions()
+        parent = versions[-1]["version"] if versions else None
+        parent_hashes = self.load_hashes(parent) if parent else {}
+        diff = diff_hashes(parent_hashes, hashes)
+
+        if parent and not any(diff.values()):
+            return None
+
+        full = len(versions) % FULL_SNAPSHOT_INTERVAL == 0
+        if full:
+            payload = {"upserts": records, "removed": []}
+        else:
+            payload = {
+                "upserts": {
+                    key: records[key]
+                    for key in diff["added"] + diff["changed"]
+                },
+                "removed": diff["removed"]
+            }
+
+        version = datetime.datetime.now().strftime("%Y%m%d-%H%M%S-%f")
+
+        with gzip.open(self._path(version, "records"), 'wt', encoding='utf-8') as file:
+            json.dump(payload, file, ensure_ascii=False)
+        with open(self._path(version, "hashes"), 'w', encoding='utf-8') as file:
+            json.dump(hashes, file, ensure_ascii=False)
+
+        versions.append({
+            "version": version,
+            "parent": parent,
+            "created": datetime.datetime.now().isoformat(timespec="seconds"),
+            "count": len(records),
+            "full": full,
+            "added": len(diff["added"]),
+            "removed": len(diff["removed"]),
+            "changed": len(diff["changed"])
+        })
+
+        # Индекс записываем последним, атомарно
+        write_json_atomic(self.index_file, versions, indent=2)
+
+        return version
+
+    def diff(self, old_version, new_version):
+        """
+        Сравнение двух версий по хешам записей
+
+        Args:
+            old_version (str): Идентификатор старой версии
+            new_version (str): Идентификатор новой версии
+
+        Returns:
+            dict: Словарь со списками ключей added, removed, changed
+        """
+        return diff_hashes(
+            self.load_hashes(old_version), self.load_hashes(new_version)
+        )
+
+    def changes_since_previous(self, journals=None):
+        """
+        Изменения последнего обновления: сравнение текущих журналов
+        (или последней версии) с предыдущей версией
+
+        Args:
+            journals (list, optional): Текущий список журналов. По умолчанию
+                                      берется последняя сохраненная версия
+
+        Returns:
+            dict: Словарь со списками ключей added, removed, changed
+                  или None, если сравнивать не с чем
+        """
+        versions = self.list_versions()
+        try:
+            if journals is None:
+                if len(versions) < 2:
+                    return None
+                return self.diff(versions[-2]["version"], versions[-1]["version"])
+
+            if not versions:
+                return None
+            current = {
+                key: record_hash(record)
+                for key, record in index_records(journals).items()
+            }
+            # Если текущие данные совпадают с последней версией,
+            # сравниваем с предыдущей
+            base = versions[-1]
+            latest_hashes = self.load_hashes(base["version"])
+            if latest_hashes == current:
+                if not base.get("parent"):
+                    return None
+                return diff_hashes(self.load_hashes(base["parent"]), current)
+            return diff_hashes(latest_hashes, current)
+        except Exception as e:
+            print(f"Ошибка при сравнении версий: {e}")
+            return None
+
+
+def _print_diff(store, old_version, new_version, details):
+    diff = store.diff(old_version, new_version)
+    print(f"Сравнение версий {old_version} -> {new_version}")
+    print(f"Добавлено: {len(diff['added'])}")
+    print(f"Удалено: {len(diff['removed'])}")
+    print(f"Изменено: {len(diff['changed'])}")
+
+    if not details:
+        return
+
+    old_records = store.load_records(old_version)
+    new_records = store.load_records(new_version)
+
+    for key in diff["added"]:
+        name = new_records[key].get("name_of_publication", "")
+        print(f"+ {key} {name}")
+    for key in diff["removed"]:
+        name = old_records[key].get("name_of_publication", "")
+        print(f"- {key} {name}")
+    for key in diff["changed"]:
+        old_record = old_records[key]
+        new_record = new_records[key]
+        print(f"~ {key} {new_record.get('name_of_publication', '')}")
+        for field in sorted(set(old_record) | set(new_record)):
+            if field in HASH_IGNORED_FIELDS:
+                continue
+            if old_record.get(field) != new_record.get(field):
+                print(f"    {field}: {old_record.get(field)!r} -> "
+                      f"{new_record.get(field)!r}")
+
+
+def main(argv=None):
+    """
+    Точка входа для командной строки
+    """
+    arg_parser = argparse.ArgumentParser(
+        description="Версии базы журналов ВАК"
+    )
+    commands = arg_parser.add_subparsers(dest="command", required=True)
+
+    commands.add_parser("list", help="Список версий")
+
+    diff_parser = commands.add_parser("diff", help="Сравнение двух версий")
+    diff_parser.add_argument("old", nargs="?", help="Старая версия")
+    diff_parser.add_argument("new", nargs="?", help="Новая версия")
+    diff_parser.add_argument(
+        "--details", action="store_true", help="Показать изменения по записям"
+    )
+
+    args = arg_parser.parse_args(argv)
+    store = SnapshotStore()
+    versions = store.list_versions()
+
+    if args.command == "list":
+        for item in versions:
+            kind = "полная" if item.get("full") else "дельта"
+            print(f"{item['version']}  {item['created']}  "
+                  f"записей: {item['count']}  ({kind}, +{item['added']} "
+                  f"-{item['removed']} ~{item['changed']})")
+        return 0
+
+    # По умолчанию сравниваем две последние версии
+    new_version = args.new or (versions[-1]["version"] if versions else None)
+    old_version = args.old
+    if old_version is None and len(versions) >= 2:
+        old_version = versions[-2]["version"]
+    if not old_version or not new_version:
+        print("Недостаточно версий для сравнения")
+        return 1
+
+    _print_diff(store, old_version, new_version, args.details)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
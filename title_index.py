@@ -0,0 +1,259 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Локальный индекс названий журналов journalrank.
+
+Позволяет найти запись journalrank по названию журнала без сетевого
+запроса: названия нормализуются и сравниваются по сходству триграмм
+(коэффициент Дайса). Индекс пополняется записями, которые встречаются
+в результатах поиска, и сохраняется между запусками.
+"""
+
+import json
+import os
+import re
+
+from normalize import normalize_title, split_issns
+from snapshots import get_app_dir
+
+
+# Минимальное сходство, при котором совпадение считается надежным
+TITLE_MATCH_THRESHOLD = 0.85
+
+
+def title_trigrams(normalized):
+    """
+    Множество символьных триграмм нормализованного названия
+
+    Args:
+        normalized (str): Нормализованное название
+
+    Returns:
+        set: Триграммы названия
+    """
+    padded = f"  {normalized} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def title_numbers(normalized):
+    """
+    Числа в названии (номера серий, выпусков). Названия с разными
+    числами считаются разными журналами независимо от сходства.
+    """
+    return frozenset(re.findall(r'\d+', normalized))
+
+
+class TitleIndex:
+    """
+    Индекс названий журналов journalrank с нечетким поиском.
+    """
+
+    def __init__(self, filename="journalrank_titles.json"):
+        """
+        Инициализация индекса
+
+        Args:
+            filename (str): Имя файла для хранения индекса
+        """
+        self.filename = os.path.join(get_app_dir(), filename)
+        # URL детальной страницы -> исходное название
+        self.titles = {}
+        # Нормализованное название -> URL
+        self.exact = {}
+        # Названия и ISSN, которые встречаются у разных URL: такие
+        # совпадения не выдаются, чтобы не перепутать журналы
+        self.ambiguous_titles = set()
+        self.ambiguous_issns = set()
+        # Триграмма -> множество URL
+        self.trigrams = {}
+        self.trigram_counts = {}
+        self.numbers = {}
+        # Каталог ISSN -> URL (строится из базы и результатов поиска
+        # в рамках обновления, в файл не сохраняется)
+        self.issns = {}
+        self.changed = False
+
+    def add(self, title, url):
+        """
+        Добавление записи в индекс
+
+        Args:
+            title (str): Название журнала
+            url (str): Ссылка на детальную страницу journalrank
+        """
+        normalized = normalize_title(title)
+        if not normalized or not url or url == "none" or url in self.titles:
+            return
+
+        self.titles[url] = title.strip()
+        if self.exact.setdefault(normalized, url) != url:
+            self.ambiguous_titles.add(normalized)
+        grams = title_trigrams(normalized)
+        self.trigram_counts[url] = len(grams)
+        self.numbers[url] = title_numbers(normalized)
+        for gram in grams:
+            self.trigrams.setdefault(gram, set()).add(url)
+        self.changed = True
+
+    def add_issns(self, issns, url):
+        """
+        Добавление ISSN журнала в каталог
+
+        Args:
+            issns (list): ISSN в виде XXXX-XXXX
+            url (str): Ссылка на детальную страницу journalrank
+        """
+        if not url or url == "none":
+            return
+        for issn in issns:
+            if self.issns.setdefault(issn, url) != url:
+                self.ambiguous_issns.add(issn)
+
+    def add_journals(self, journals):
+        """
+        Добавление в индекс журналов с известной ссылкой journalrank
+
+        Args:
+            journals (list): Список журналов
+        """
+        for journal in journals:
+            url = journal.get("rcsi_url", "none")
+            self.add(journal.get("name_of_publication", ""), url)
+            self.add_issns(
+                split_issns(journal.get("issn", ""))
+                + list(journal.get("rcsi_issns") or []),
+                url
+            )
+
+    def match_issns(self, issns):
+        """
+        Поиск журнала в каталоге по любому из ISSN (ISSN нескольких
+        журналов не учитываются)
+
+        Args:
+            issns (list): ISSN в виде XXXX-XXXX
+
+        Returns:
+            str: Ссылка на детальную страницу или None
+        """
+        for issn in issns:
+            if issn in self.ambiguous_issns:
+                continue
+            url = self.issns.get(issn)
+            if url:
+                return url
+        return None
+
+    def match(self, title, threshold=TITLE_MATCH_THRESHOLD):
+        """
+        Поиск наиболее похожего названия в индексе
+
+        Args:
+            title (str): Название журнала
+            threshold (float): Минимальное сходство от 0 до 1
+
+        Returns:
+            tuple: (URL, сходство, название из индекса) или None,
+                   если сходство ниже порога или такое название
+                   у нескольких журналов
+        """
+        normalized = normalize_title(title)
+        if not normalized or normalized in self.ambiguous_titles:
+            return None
+
+        url = self.exact.get(normalized)
+        if url:
+            return url, 1.0, self.titles[url]
+
+        # Считаем общие триграммы только для кандидатов из индекса
+        grams = title_trigrams(normalized)
+        shared = {}
+        for gram in grams:
+            for candidate in self.trigrams.get(gram, ()):
+                shared[candidate] = shared.get(candidate, 0) + 1
+
+        numbers = title_numbers(normalized)
+        best_url = None
+        best_score = 0.0
+        for candidate, count in shared.items():
+            if self.numbers[candidate] != numbers:
+                continue
+            score = 2.0 * count / (len(grams) + self.trigram_counts[candidate])
+            if score > best_score:
+                best_url, best_score = candidate, score
+
+        if best_url is None or best_score < threshold:
+            return None
+        if normalize_title(self.titles[best_url]) in self.ambiguous_titles:
+            return None
+        return best_url, best_score, self.titles[best_url]
+
+    def dumps(self):
+        """
+        Снимок индекса (названия и каталог ISSN) в виде строки JSON;
+        сохраняется в архив страниц, чтобы повторное извлечение
+        использовало тот же индекс, что и обновление
+
+        Returns:
+            str: JSON со снимком
+        """
+        return json.dumps(
+            {
+                "titles": self.titles,
+                "issns": self.issns,
+                "ambiguous_issns": sorted(self.ambiguous_issns)
+            },
+            ensure_ascii=False
+        )
+
+    def loads(self, data):
+        """
+        Загрузка снимка, полученного из dumps (вместо файла индекса)
+
+        Args:
+            data (str): JSON со снимком
+        """
+        snapshot = json.loads(data)
+        for url, title in snapshot.get("titles", {}).items():
+            self.add(title, url)
+        self.issns.update(snapshot.get("issns", {}))
+        self.ambiguous_issns.update(snapshot.get("ambiguous_issns", []))
+        self.changed = False
+
+    def load(self):
+        """
+        Загрузка индекса из файла
+
+        Returns:
+            bool: True, если загрузка прошла успешно, иначе False
+        """
+        try:
+            if os.path.exists(self.filename):
+                with open(self.filename, 'r', encoding='utf-8') as file:
+                    for url, title in json.load(file).items():
+                        self.add(title, url)
+                self.changed = False
+                return True
+            return False
+        except Exception as e:
+            print(f"Ошибка при загрузке индекса названий: {e}")
+            return False
+
+    def save(self):
+        """
+        Сохранение индекса в файл, если он изменился
+
+        Returns:
+            bool: True, если сохранение прошло успешно, иначе False
+        """
+        if not self.changed:
+            return True
+        try:
+            with open(self.filename, 'w', encoding='utf-8') as file:
+                json.dump(self.titles, file, ensure_ascii=False, indent=2)
+            self.changed = False
+            return True
+        except Exception as e:
+            print(f"Ошибка при сохранении индекса названий: {e}")
+            return False
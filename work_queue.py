@@ -0,0 +1,497 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Распределенное обновление статусов через общую очередь задач.
+
+Журналы, которым нужна проверка в РЦНИ, помещаются в очередь - файл
+SQLite (refresh_queue.db). Любое количество процессов-исполнителей,
+на этой машине или на других с доступом к файлу очереди, забирают
+задачи пачками с арендой (lease), выполняют check_rcsi_status и
+записывают результаты. Задачи, проверка которых завершилась ошибкой
+загрузки, возвращаются в очередь (не более MAX_ATTEMPTS попыток). Если
+исполнитель не завершил пачку до истечения аренды, ее задачи достаются
+другому исполнителю. Координатор переносит результаты в базу и сохраняет
+новую версию.
+
+Каждый исполнитель использует собственную сессию и собственное
+ограничение одновременных запросов, поэтому скорость обновления растет
+примерно пропорционально числу исполнителей (на разных машинах - и
+с разных IP-адресов).
+
+Запуск:
+    python work_queue.py run --workers 4      # все этапы на одной машине
+    python work_queue.py enqueue              # координатор: заполнить очередь
+    python work_queue.py worker               # исполнитель (сколько угодно)
+    python work_queue.py status
+    python work_queue.py merge                # координатор: перенести результаты
+
+Очередь работает в режиме журнала DELETE, а не WAL: индекс WAL
+хранится в общей памяти и не работает на сетевых файловых системах.
+Поэтому для нескольких машин файл очереди можно держать в общем каталоге
+на NFS/SMB, но только с работающими блокировками файлов (для NFS -
+с lockd/NFSv4, без опции nolock); без блокировок исполнители могут
+получить одни и те же задачи или повредить файл.
+"""
+
+import argparse
+import asyncio
+import datetime
+import json
+import os
+import socket
+import sqlite3
+import sys
+import time
+from contextlib import contextmanager
+from multiprocessing import Process
+
+from journal_store import JournalStore
+from normalize import journal_key
+from snapshots import get_app_dir
+
+
+QUEUE_FILENAME = "refresh_queue.db"
+JSON_FILENAME = "vak_journals_2.3.4.json"
+
+# Параметры по умолчанию
+BATCH_SIZE = 20
+WORKER_CONCURRENCY = 5
+LEASE_SECONDS = 300
+MAX_ATTEMPTS = 3
+IDLE_POLL_SECONDS = 5
+
+
+class WorkQueue:
+    """
+    Очередь проверок журналов в файле SQLite с арендой задач.
+    """
+
+    def __init__(self, filename=None):
+        """
+        Args:
+            filename (str, optional): Файл очереди; по умолчанию
+                                      refresh_queue.db рядом с программой
+        """
+        self.filename = filename or os.path.join(get_app_dir(), QUEUE_FILENAME)
+        self.connection = sqlite3.connect(
+            self.filename, timeout=30, isolation_level=None
+        )
+        # WAL требует общей памяти и не подходит для файла на сетевом диске
+        self.connection.execute("PRAGMA journal_mode=DELETE")
+        self.connection.execute("PRAGMA busy_timeout=30000")
+        self.connection.execute("""
+            CREATE TABLE IF NOT EXISTS tasks (
+                key TEXT PRIMARY KEY,
+                issn TEXT NOT NULL,
+                name TEXT NOT NULL,
+                state TEXT NOT NULL DEFAULT 'pending',
+                lease_owner TEXT,
+                lease_expires REAL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                result TEXT,
+                updated REAL
+            )
+        """)
+        self.connection.execute(
+            "CREATE INDEX IF NOT EXISTS tasks_state ON tasks (state, lease_expires)"
+        )
+
+    def close(self):
+        self.connection.close()
+
+    @contextmanager
+    def _transaction(self):
+        # BEGIN IMMEDIATE берет блокировку записи сразу, поэтому два
+        # исполнителя не получат одни и те же задачи
+        self.connection.execute("BEGIN IMMEDIATE")
+        try:
+            yield self.connection
+            self.connection.execute("COMMIT")
+        except Exception:
+            self.connection.execute("ROLLBACK")
+            raise
+
+    def enqueue(self, journals):
+        """
+        Добавление журналов в очередь (повторяющиеся ключи - один раз).
+        Выполненные и неудавшиеся задачи прошлого цикла с теми же ключами
+        снова становятся ожидающими; арендованные не трогаются.
+
+        Args:
+            journals (list): Журналы для проверки
+
+        Returns:
+            int: Количество новых и повторно поставленных задач
+        """
+        now = time.time()
+        rows = {}
+        for journal in journals:
+            key = journal_key(journal)
+            if key and key != "title:" and key not in rows:
+                rows[key] = (
+                    key,
+                    journal.get("issn", ""),
+                    journal.get("name_of_publication", ""),
+                    now
+                )
+        with self._transaction():
+            before = self.connection.total_changes
+            self.connection.executemany(
+                "INSERT INTO tasks (key, issn, name, updated) "
+                "VALUES (?, ?, ?, ?) "
+                "ON CONFLICT (key) DO UPDATE SET "
+                "issn = excluded.issn, name = excluded.name, "
+                "state = 'pending', attempts = 0, result = NULL, "
+                "lease_owner = NULL, lease_expires = NULL, "
+                "updated = excluded.updated "
+                "WHERE tasks.state IN ('done', 'failed')",
+                rows.values()
+            )
+            return self.connection.total_changes - before
+
+    def claim(self, owner, batch_size=BATCH_SIZE, lease_seconds=LEASE_SECONDS):
+        """
+        Аренда пачки задач: свободных или с истекшей арендой
+
+        Args:
+            owner (str): Идентификатор исполнителя
+            batch_size (int): Размер пачки
+            lease_seconds (float): Срок аренды
+
+        Returns:
+            list: Список кортежей (key, issn, name)
+        """
+        now = time.time()
+        with self._transaction():
+            # Задачи, аренда которых истекала MAX_ATTEMPTS раз, больше
+            # не выдаются
+            self.connection.execute(
+                "UPDATE tasks SET state = 'failed', lease_owner = NULL, "
+                "lease_expires = NULL, updated = ? "
+                "WHERE state = 'leased' AND lease_expires < ? AND attempts >= ?",
+                (now, now, MAX_ATTEMPTS)
+            )
+            tasks = self.connection.execute(
+                "SELECT key, issn, name FROM tasks "
+                "WHERE state = 'pending' "
+                "   OR (state = 'leased' AND lease_expires < ?) "
+                "LIMIT ?",
+                (now, batch_size)
+            ).fetchall()
+            self.connection.executemany(
+                "UPDATE tasks SET state = 'leased', lease_owner = ?, "
+                "lease_expires = ?, attempts = attempts + 1, updated = ? "
+                "WHERE key = ?",
+                [(owner, now + lease_seconds, now, key) for key, _, _ in tasks]
+            )
+        return tasks
+
+    def complete(self, owner, results):
+        """
+        Запись результатов. Результаты по задачам, аренда которых уже
+        перешла к другому исполнителю, отбрасываются.
+
+        Args:
+            owner (str): Идентификатор исполнителя
+            results (dict): {ключ: статус}
+
+        Returns:
+            int: Количество принятых результатов
+        """
+        now = time.time()
+        with self._transaction():
+            before = self.connection.total_changes
+            self.connection.executemany(
+                "UPDATE tasks SET state = 'done', result = ?, updated = ?, "
+                "lease_owner = NULL, lease_expires = NULL "
+                "WHERE key = ? AND state = 'leased' AND lease_owner = ?",
+                [
+                    (json.dumps(status, ensure_ascii=False), now, key, owner)
+                    for key, status in results.items()
+                ]
+            )
+            return self.connection.total_changes - before
+
+    def release(self, owner, keys):
+        """
+        Возврат задач после ошибки: снова в очередь или, после
+        MAX_ATTEMPTS попыток, в состояние failed
+        """
+        now = time.time()
+        with self._transaction():
+            self.connection.executemany(
+                "UPDATE tasks SET "
+                "state = CASE WHEN attempts >= ? THEN 'failed' ELSE 'pending' END, "
+                "lease_owner = NULL, lease_expires = NULL, updated = ? "
+                "WHERE key = ? AND state = 'leased' AND lease_owner = ?",
+                [(MAX_ATTEMPTS, now, key, owner) for key in keys]
+            )
+
+    def counts(self):
+        """
+        Количество задач по состояниям
+
+        Returns:
+            dict: {состояние: количество}
+        """
+        return dict(self.connection.execute(
+            "SELECT state, COUNT(*) FROM tasks GROUP BY state"
+        ).fetchall())
+
+    def results(self):
+        """
+        Результаты выполненных задач
+
+        Returns:
+            dict: {ключ: статус}
+        """
+        return {
+            key: json.loads(result)
+            for key, result in self.connection.execute(
+                "SELECT key, result FROM tasks WHERE state = 'done'"
+            )
+        }
+
+    def discard(self, keys):
+        """
+        Удаление выполненных задач (после переноса результатов в базу)
+
+        Args:
+            keys (iterable): Ключи задач
+        """
+        with self._transaction():
+            self.connection.executemany(
+                "DELETE FROM tasks WHERE key = ? AND state = 'done'",
+                [(key,) for key in keys]
+            )
+
+    def clear(self):
+        """
+        Удаление всех задач
+        """
+        with self._transaction():
+            self.connection.execute("DELETE FROM tasks")
+
+
+def _json_path():
+    return os.path.join(get_app_dir(), JSON_FILENAME)
+
+
+def _load_journals():
+    with open(_json_path(), 'r', encoding='utf-8') as file:
+        return json.load(file)
+
+
+def needs_check(journal):
+    """
+    Нужна ли журналу проверка (как в check_journals_status)
+    """
+    return not journal.get("white_level") or journal.get("white_level") == "none"
+
+
+def enqueue_from_database(queue, journals=None):
+    """
+    Заполнение очереди журналами без статуса из базы
+
+    Returns:
+        int: Количество новых задач
+    """
+    if journals is None:
+        journals = _load_journals()
+    return queue.enqueue([journal for journal in journals if needs_check(journal)])
+
+
+async def _process_batch(tasks, session, title_index, concurrency):
+    # Импортируем здесь, чтобы команды status/enqueue работали без aiohttp
+    from parser import check_rcsi_status
+
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def check(task):
+        key, issn, name = task
+        async with semaphore:
+            return key, await check_rcsi_status(issn, name, session, title_index)
+
+    # None - ошибка загрузки, такие задачи возвращаются в очередь
+    return dict(await asyncio.gather(*(check(task) for task in tasks)))
+
+
+async def _worker_async(queue, owner, batch_size, concurrency, lease_seconds):
+    import aiohttp
+    from title_index import TitleIndex
+
+    title_index = TitleIndex()
+    title_index.load()
+
+    processed = 0
+    async with aiohttp.ClientSession() as session:
+        while True:
+            tasks = queue.claim(owner, batch_size, lease_seconds)
+            if not tasks:
+                counts = queue.counts()
+                if not counts.get("pending") and not counts.get("leased"):
+                    break
+                # Задачи арендованы другими исполнителями; ждем, пока
+                # они завершатся или их аренда истечет
+                await asyncio.sleep(IDLE_POLL_SECONDS)
+                continue
+
+            try:
+                results = await _process_batch(
+                    tasks, session, title_index, concurrency
+                )
+            except Exception as e:
+                print(f"[{owner}] Ошибка при обработке пачки: {e}")
+                queue.release(owner, [key for key, _, _ in tasks])
+                continue
+
+            failed = [key for key, status in results.items() if status is None]
+            if failed:
+                queue.release(owner, failed)
+            accepted = queue.complete(owner, {
+                key: status for key, status in results.items()
+                if status is not None
+            })
+            processed += accepted
+            print(f"[{owner}] Обработано {processed} журналов")
+    return processed
+
+
+def run_worker(
+    queue_file=None, batch_size=BATCH_SIZE, concurrency=WORKER_CONCURRENCY,
+    lease_seconds=LEASE_SECONDS, owner=None
+):
+    """
+    Исполнитель: забирает пачки задач, пока очередь не опустеет
+
+    Args:
+        queue_file (str, optional): Файл очереди
+        batch_size (int): Размер пачки
+        concurrency (int): Одновременных запросов на исполнителя
+        lease_seconds (float): Срок аренды пачки
+        owner (str, optional): Идентификатор исполнителя
+
+    Returns:
+        int: Количество обработанных журналов
+    """
+    owner = owner or f"{socket.gethostname()}-{os.getpid()}"
+    queue = WorkQueue(queue_file)
+    try:
+        return asyncio.run(_worker_async(
+            queue, owner, batch_size, concurrency, lease_seconds
+        ))
+    finally:
+        queue.close()
+
+
+def merge_results(queue, commit_snapshot=True):
+    """
+    Координатор: перенос результатов из очереди в базу и сохранение версии.
+    Перенесенные задачи удаляются из очереди, чтобы повторный merge
+    не применил старые результаты с новым временем проверки.
+
+    Returns:
+        int: Количество обновленных журналов
+    """
+    from parser import apply_status, save_to_json
+    from snapshots import SnapshotStore
+
+    base = JournalStore(_json_path()).read()
+    journals = base.journals
+    results = queue.results()
+    updated = 0
+    checked_at = datetime.datetime.now().isoformat(timespec="seconds")
+    for journal in journals:
+        if not needs_check(journal):
+            continue
+        status = results.get(journal_key(journal))
+        if status is None:
+            continue
+        journal["checked_at"] = checked_at
+        if apply_status(journal, status):
+            updated += 1
+
+    saved = save_to_json(journals, JSON_FILENAME, base)
+    if saved is None:
+        # Результаты остаются в очереди до успешного сохранения
+        return 0
+    journals = saved
+    queue.discard(results)
+    if commit_snapshot:
+        version = SnapshotStore().commit(journals)
+        if version:
+            print(f"Сохранена версия базы {version}")
+    return updated
+
+
+def main(argv=None):
+    """
+    Точка входа для командной строки
+    """
+    arg_parser = argparse.ArgumentParser(
+        description="Распределенное обновление статусов журналов"
+    )
+    arg_parser.add_argument(
+        "command", choices=["enqueue", "worker", "status", "merge", "run"]
+    )
+    arg_parser.add_argument("--queue", default=None, help="Файл очереди")
+    arg_parser.add_argument(
+        "--workers", type=int, default=os.cpu_count() or 2,
+        help="Число исполнителей для команды run"
+    )
+    arg_parser.add_argument("--batch", type=int, default=BATCH_SIZE)
+    arg_parser.add_argument(
+        "--concurrency", type=int, default=WORKER_CONCURRENCY,
+        help="Одновременных запросов на исполнителя"
+    )
+    arg_parser.add_argument(
+        "--lease", type=float, default=LEASE_SECONDS,
+        help="Срок аренды пачки в секундах"
+    )
+    args = arg_parser.parse_args(argv)
+
+    if args.command == "worker":
+        run_worker(args.queue, args.batch, args.concurrency, args.lease)
+        return 0
+
+    queue = WorkQueue(args.queue)
+    try:
+        if args.command in ("enqueue", "run"):
+            if args.command == "run":
+                queue.clear()
+            added = enqueue_from_database(queue)
+            print(f"Добавлено задач: {added}")
+
+        if args.command == "run":
+            workers = [
+                Process(
+                    target=run_worker,
+                    args=(queue.filename, args.batch, args.concurrency, args.lease)
+                )
+                for _ in range(max(1, args.workers))
+            ]
+            started = time.perf_counter()
+            for worker in workers:
+                worker.start()
+            for worker in workers:
+                worker.join()
+            print(f"Исполнители завершили работу за "
+                  f"{time.perf_counter() - started:.1f} с")
+
+        if args.command in ("status", "run", "merge"):
+            counts = queue.counts()
+            print(", ".join(
+                f"{state}: {count}" for state, count in sorted(counts.items())
+            ) or "Очередь пуста")
+
+        if args.command in ("merge", "run"):
+            updated = merge_results(queue)
+            print(f"Обновлено журналов: {updated}")
+    finally:
+        queue.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())